@@ -0,0 +1,237 @@
+// Clientside mode of the range pages (CLIENTSIDE_FILTERING in config.py): the slider filter, the map
+// aggregation and the histogram run in the browser, on a typed-array copy of the data downloaded once
+// per data version (src/utils/client_data.py). Mirrors the server callbacks of src/pages/.
+(function () {
+    const datasets = {};
+
+    function pathnamePrefix() {
+        const config = document.getElementById('_dash-config');
+        return config ? JSON.parse(config.textContent).requests_pathname_prefix || '/' : '/';
+    }
+
+    // Parsed dataset {n_rows, categories, columns: {name: typed array}}, fetched once per version
+    function loadDataset(version) {
+        if (!datasets[version]) {
+            datasets[version] = fetch(`${pathnamePrefix()}data/${version}/columns.bin`)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`columns.bin: HTTP ${response.status}`);
+                    }
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    const headerLength = new DataView(buffer).getUint32(0, true);
+                    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+                    const start = 4 + headerLength;
+                    const columns = {};
+                    header.columns.forEach(column => {
+                        const type = column.dtype === 'int16' ? Int16Array : Float32Array;
+                        columns[column.name] = new type(buffer, start + column.offset, header.n_rows);
+                    });
+                    return {n_rows: header.n_rows, categories: header.categories, columns: columns};
+                })
+                .catch(error => {
+                    delete datasets[version];
+                    throw error;
+                });
+        }
+        return datasets[version];
+    }
+
+    // Same rounding as snap_range (src/utils/figure_cache.py): outward to the step, within the slider bounds
+    function snapRange(range, step, min, max) {
+        if (!step) {
+            return range;
+        }
+        let low = Math.round(Math.floor(range[0] / step + 1e-9) * step * 1e10) / 1e10;
+        let high = Math.round(Math.ceil(range[1] / step - 1e-9) * step * 1e10) / 1e10;
+        if (min !== undefined && min !== null) {
+            low = Math.max(low, min);
+        }
+        if (max !== undefined && max !== null) {
+            high = Math.min(high, max);
+        }
+        return [low, high];
+    }
+
+    // Same viewport as map_bounds (src/components/scatter_map.py): [south, north, west, east]
+    function mapBounds(relayoutData) {
+        const derived = relayoutData && relayoutData['map._derived'];
+        if (!derived || !derived.coordinates) {
+            return null;
+        }
+        const lons = derived.coordinates.map(corner => corner[0]);
+        const lats = derived.coordinates.map(corner => corner[1]);
+        let west = Math.min(...lons), east = Math.max(...lons);
+        if (east - west >= 360) {
+            west = -180;
+            east = 180;
+        } else {
+            west = ((west + 180) % 360 + 360) % 360 - 180;
+            east = ((east + 180) % 360 + 360) % 360 - 180;
+        }
+        return [Math.max(-90, Math.min(...lats)), Math.min(90, Math.max(...lats)), west, east];
+    }
+
+    function inBounds(bounds, lat, lon) {
+        if (lat < bounds[0] || lat > bounds[1]) {
+            return false;
+        }
+        return bounds[2] <= bounds[3] ? lon >= bounds[2] && lon <= bounds[3] : lon >= bounds[2] || lon <= bounds[3];
+    }
+
+    // Same rounding as nice_width (src/utils/histogram_cube.py)
+    function niceWidth(rawWidth) {
+        if (!(rawWidth > 0) || !isFinite(rawWidth)) {
+            return 1;
+        }
+        const magnitude = Math.pow(10, Math.floor(Math.log10(rawWidth)));
+        for (const factor of [1, 2, 5, 10]) {
+            if (factor * magnitude >= rawWidth) {
+                return factor * magnitude;
+            }
+        }
+        return 10 * magnitude;
+    }
+
+    function mapFigure(data, rows, settings, title, zoom) {
+        const lat = data.columns.latitude, lon = data.columns.longitude, codes = data.columns.category;
+        const values = data.columns[settings.column];
+        const currentZoom = zoom === null || zoom === undefined ? settings.default_zoom : zoom;
+        const raw = rows.length <= settings.max_points || currentZoom >= settings.detail_zoom;
+        const traces = data.categories.map((name, code) => ({
+            type: 'scattermap', mode: 'markers', name: name, legendgroup: name,
+            lat: [], lon: [], customdata: [], marker: {color: settings.colors[code % settings.colors.length]}
+        }));
+        let fullTitle = title;
+
+        if (raw) {
+            rows.forEach(row => {
+                const trace = traces[codes[row]];
+                trace.lat.push(lat[row]);
+                trace.lon.push(lon[row]);
+                trace.customdata.push([values[row]]);
+            });
+            const label = settings.labels[settings.column] || settings.column;
+            traces.forEach(trace => {
+                trace.hovertemplate = `category=${trace.name}<br>latitude=%{lat}<br>longitude=%{lon}`
+                    + `<br>${label}=%{customdata[0]}<extra></extra>`;
+            });
+        } else {
+            // Same grid as aggregate_cells: cells halved at each zoom level
+            const level = Math.min(Math.max(Math.floor(currentZoom), 0), settings.detail_zoom);
+            const cellDeg = 180 / Math.pow(2, level + 3);
+            const cells = new Map();
+            rows.forEach(row => {
+                const key = `${codes[row]}:${Math.floor((lat[row] + 90) / cellDeg)}:${Math.floor((lon[row] + 180) / cellDeg)}`;
+                cells.set(key, (cells.get(key) || 0) + 1);
+            });
+            let largest = 1;
+            cells.forEach((count, key) => {
+                const [code, cellLat, cellLon] = key.split(':').map(Number);
+                const trace = traces[code];
+                trace.lat.push((cellLat + 0.5) * cellDeg - 90);
+                trace.lon.push((cellLon + 0.5) * cellDeg - 180);
+                trace.customdata.push([count]);
+                largest = Math.max(largest, count);
+            });
+            traces.forEach(trace => {
+                trace.marker.size = trace.customdata.map(item => item[0]);
+                trace.marker.sizemode = 'area';
+                trace.marker.sizeref = 2 * largest / (25 * 25);
+                trace.hovertemplate = `category=${trace.name}<br>observations=%{customdata[0]}<extra></extra>`;
+            });
+            fullTitle = `${title} - ${rows.length} obs. grouped by area, zoom in for details`;
+        }
+
+        return {
+            data: traces.filter(trace => trace.lat.length),
+            layout: {
+                title: {text: fullTitle}, legend: {title: {text: 'category'}, tracegroupgap: 0},
+                map: {style: 'open-street-map', zoom: settings.default_zoom, center: {lat: 0, lon: 0}},
+                margin: {t: 60}, uirevision: 'map'
+            }
+        };
+    }
+
+    function histogramFigure(data, rows, settings, low, high) {
+        const values = data.columns[settings.column], codes = data.columns.category;
+        const width = niceWidth((high - low) / 20);
+        const origin = Math.floor(low / width) * width;
+        const nBins = Math.max(1, Math.ceil((high - origin) / width));
+        const counts = data.categories.map(() => new Array(nBins).fill(0));
+        rows.forEach(row => {
+            const bin = Math.min(nBins - 1, Math.max(0, Math.floor((values[row] - origin) / width)));
+            counts[codes[row]][bin] += 1;
+        });
+
+        // One facet per category, two per row, as in src/components/histogram.py
+        const categories = data.categories.map((name, code) => code).filter(code => counts[code].some(count => count));
+        const nRows = Math.ceil(categories.length / 2);
+        const spacing = 0.12, height = (1 - spacing * (nRows - 1)) / nRows;
+        const label = settings.labels[settings.column] || settings.column;
+        const countLabel = settings.labels.count || 'count';
+        const layout = {title: {text: settings.hist_title}, bargap: 0, annotations: [], legend: {title: {text: 'category'}}};
+        const traces = categories.map((code, i) => {
+            const row = Math.floor(i / 2), col = i % 2, suffix = i ? String(i + 1) : '';
+            const top = 1 - row * (height + spacing);
+            layout[`xaxis${suffix}`] = {domain: col ? [0.53, 1] : [0, 0.47], anchor: `y${suffix}`,
+                                        title: row === nRows - 1 ? {text: label} : undefined};
+            layout[`yaxis${suffix}`] = {domain: [top - height, top], anchor: `x${suffix}`,
+                                        title: col === 0 ? {text: countLabel} : undefined};
+            layout.annotations.push({text: `category=${data.categories[code]}`, showarrow: false,
+                                     xref: 'paper', yref: 'paper', x: col ? 0.765 : 0.235, y: top,
+                                     xanchor: 'center', yanchor: 'bottom'});
+            const edges = Array.from({length: nBins + 1}, (_, bin) => origin + bin * width);
+            return {
+                type: 'bar', name: data.categories[code], xaxis: `x${suffix}`, yaxis: `y${suffix}`,
+                x: edges.slice(0, -1).map((edge, bin) => edge + width / 2), y: counts[code],
+                width: new Array(nBins).fill(width), customdata: edges.slice(0, -1).map(edge => [edge, edge + width]),
+                // Colored by category code, as on the map (the blob categories are already grouped)
+                marker: {color: settings.colors[code % settings.colors.length]},
+                hovertemplate: `category=${data.categories[code]}<br>${label}=%{customdata[0]:.4g} - %{customdata[1]:.4g}`
+                    + `<br>${countLabel}=%{y}<extra></extra>`
+            };
+        });
+        return {data: traces, layout: layout};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        whalife: {
+            rangePage: async function (valRange, relayoutData, version, step, sliderMin, sliderMax, settings) {
+                const noUpdate = window.dash_clientside.no_update;
+                if (!version || !settings) {
+                    return [noUpdate, noUpdate];
+                }
+                const data = await loadDataset(version);
+                const values = data.columns[settings.column];
+                const [low, high] = snapRange(valRange || [0, values.reduce((max, value) => value > max ? value : max, 0)], step, sliderMin, sliderMax);
+                const triggered = (window.dash_clientside.callback_context.triggered || []).map(item => item.prop_id);
+                const zoomed = triggered.some(propId => propId.endsWith('.relayoutData'));
+                const zoom = relayoutData ? relayoutData['map.zoom'] : null;
+                const bounds = zoomed ? mapBounds(relayoutData) : null;
+
+                const rows = [], visible = [];
+                for (let row = 0; row < data.n_rows; row++) {
+                    const value = values[row];
+                    if (value >= low && value <= high && data.columns.category[row] >= 0) {
+                        rows.push(row);
+                        if (bounds && inBounds(bounds, data.columns.latitude[row], data.columns.longitude[row])) {
+                            visible.push(row);
+                        }
+                    }
+                }
+                // A zoom/pan on the map only matters when the map is aggregated
+                if (zoomed && (zoom === null || zoom === undefined || rows.length <= settings.max_points)) {
+                    return [noUpdate, noUpdate];
+                }
+                const title = settings.map_title.replace('{low}', low).replace('{high}', high);
+                const map = mapFigure(data, bounds ? visible : rows, settings, title, zoom);
+                if (zoomed) {
+                    return [map, noUpdate];
+                }
+                return [map, histogramFigure(data, rows, settings, low, high)];
+            }
+        }
+    });
+})();
@@ -0,0 +1,29 @@
+// Species page: swaps the model of the persistent 3D viewer (src/components/model_viewer.py) in place.
+// The viewer lives in a same-origin iframe (srcDoc), so its <model-viewer> element is reached directly.
+(function () {
+    function setModel(iframe, url) {
+        const doc = iframe.contentDocument;
+        const viewer = doc && doc.querySelector('model-viewer');
+        if (!viewer) {
+            return false;
+        }
+        if (url && viewer.getAttribute('src') !== url) {
+            viewer.setAttribute('src', url);
+        }
+        viewer.style.visibility = url ? 'visible' : 'hidden';
+        return true;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        models: {
+            swapModel: function (url) {
+                const iframe = document.getElementById('model-viewer');
+                // The iframe document may not be parsed yet on the first call
+                if (iframe && !setModel(iframe, url)) {
+                    iframe.addEventListener('load', () => setModel(iframe, url), {once: true});
+                }
+                return url ? '3D model' : 'No 3D model';
+            }
+        }
+    });
+})();
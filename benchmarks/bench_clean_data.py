@@ -0,0 +1,83 @@
+"""
+Rows/sec of `clean_data` before (per-row `.apply`, several full copies) and after the vectorized rewrite,
+on a synthetic OBIS-shaped frame:
+
+    python -m benchmarks.bench_clean_data --rows 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import raw_occurrences
+from src.utils.clean_data import clean_data, clean_data_chunks
+
+
+def legacy_clean_data(df):
+    """`clean_data` as it was before the vectorized rewrite, kept as the benchmark baseline."""
+    cols_to_keep = [
+        'scientificName', 'vernacularName',
+        'decimalLatitude', 'decimalLongitude',
+        'eventDate', 'year', 'month',
+        'basisOfRecord', 'datasetName',
+        'sst', 'sss', 'bathymetry', 'shoredistance',
+        'id'
+    ]
+
+    df_clean = df[[col for col in cols_to_keep if col in df.columns]].copy()
+
+    def categorize_species(name):
+        name = str(name).lower()
+        if 'megaptera' in name: return 'Humpback Whale'
+        if 'orcinus' in name: return 'Orca'
+        if 'delphinus' in name: return 'Dolphin'
+        if 'balaenoptera' in name: return 'Blue Whale'
+        return 'Other'
+
+    df_clean['category'] = df_clean['scientificName'].apply(categorize_species)
+    df_clean = df_clean[df_clean['category'] != 'Other']
+    df_clean['eventDate'] = pd.to_datetime(df_clean['eventDate'], errors='coerce')
+    df_clean = df_clean.rename(columns={'decimalLatitude': 'latitude', 'decimalLongitude': 'longitude'})
+    df_clean['latitude'] = pd.to_numeric(df_clean['latitude'], errors='coerce')
+    df_clean['longitude'] = pd.to_numeric(df_clean['longitude'], errors='coerce')
+    df_clean = df_clean.dropna(subset=['latitude', 'longitude'])
+    df_clean['bathymetry'] = df_clean['bathymetry'].abs()
+    df_clean['shoredistance'] = df_clean['shoredistance'].abs()
+    return df_clean
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n_rows, chunk_size):
+    raw = raw_occurrences(n_rows)
+    legacy, legacy_time = timed(legacy_clean_data, raw)
+    vectorized, vectorized_time = timed(clean_data, raw)
+    chunks = (raw.iloc[start:start + chunk_size] for start in range(0, n_rows, chunk_size))
+    streamed, streamed_time = timed(lambda: pd.concat(list(clean_data_chunks(chunks)), ignore_index=True))
+
+    assert len(legacy) == len(vectorized) == len(streamed)
+    assert (legacy['category'].to_numpy() == vectorized['category'].astype(str).to_numpy()).all()
+    return {
+        'rows': n_rows,
+        'legacy_rows_per_sec': n_rows / legacy_time,
+        'vectorized_rows_per_sec': n_rows / vectorized_time,
+        'chunked_rows_per_sec': n_rows / streamed_time,
+        'speedup': legacy_time / vectorized_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+    for key, value in run(args.rows, args.chunk_size).items():
+        print(f"{key:>24}: {value:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Rows/sec of the environmental enrichment (`src/utils/enrichment.py`) on synthetic grids written to a temporary
+folder and memory-mapped like the real ones: a global bathymetry grid and a monthly SST climatology.
+
+    python -m benchmarks.bench_enrichment --rows 2000000 --bathymetry-step 0.05
+
+Points are drawn around a fixed set of stations (as the OBIS surveys are) plus a uniform share, so the
+per-cell cache has repeats to skip. "cold" samples every distinct cell, "warm" finds them all in the cache.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.enrichment import Grid, enrich, load_grids
+
+
+def write_grid(directory, column, step, monthly, seed=0):
+    """Smooth synthetic field on a global grid of `step` degrees (NaN on a band of 'land'), as build_grids.py writes it."""
+    rng = np.random.default_rng(seed)
+    lat = np.arange(-90 + step / 2, 90, step)
+    lon = np.arange(-180 + step / 2, 180, step)
+    shape = (12, len(lat), len(lon)) if monthly else (len(lat), len(lon))
+    values = np.lib.format.open_memmap(directory / f"{column}.npy", mode="w+", dtype=np.float32, shape=shape)
+    wave = np.sin(np.radians(lon) * 3 + rng.uniform(0, np.pi))
+    for m in range(12 if monthly else 1):
+        layer = 25 * np.cos(np.radians(lat))[:, None] + 2 * wave[None, :] + m * 0.5
+        layer[(lat > 60)[:, None] & (np.abs(lon) < 20)[None, :]] = np.nan
+        if monthly:
+            values[m] = layer
+        else:
+            values[:] = np.abs(layer) * 150
+    values.flush()
+    with open(directory / f"{column}.json", "w", encoding="utf-8") as file:
+        json.dump({'lat_min': float(lat[0]), 'lon_min': float(lon[0]), 'lat_step': step, 'lon_step': step}, file)
+
+
+def synthetic_points(n_rows, n_stations, seed=0):
+    rng = np.random.default_rng(seed)
+    stations = np.column_stack([rng.uniform(-70, 70, n_stations), rng.uniform(-180, 180, n_stations)])
+    # 80% of the observations at a station (a few hundred metres around it), the others anywhere
+    at_station = rng.random(n_rows) < 0.8
+    picks = stations[rng.integers(0, n_stations, n_rows)] + rng.normal(0, 0.003, (n_rows, 2))
+    latitude = np.where(at_station, picks[:, 0], rng.uniform(-70, 70, n_rows))
+    longitude = np.where(at_station, picks[:, 1], rng.uniform(-180, 180, n_rows))
+    return pd.DataFrame({
+        'latitude': latitude, 'longitude': longitude,
+        'month': rng.integers(0, 13, n_rows).astype(np.int16),
+        'sst': np.where(rng.random(n_rows) < 0.5, np.nan, 15.0),
+        'bathymetry': np.where(rng.random(n_rows) < 0.5, np.nan, 1000.0),
+    })
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(n_rows, n_stations, bathymetry_step, sst_step):
+    results = {'rows': n_rows}
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        _, results['write_grids_sec'] = timed(write_grid, directory, 'bathymetry', bathymetry_step, False)
+        timed(write_grid, directory, 'sst', sst_step, True)
+        df = synthetic_points(n_rows, n_stations)
+        lat, lon, month = (df[name].to_numpy(dtype=float) for name in ('latitude', 'longitude', 'month'))
+
+        for column in ('bathymetry', 'sst'):
+            for method in ('nearest', 'bilinear'):
+                grid = Grid.load(directory / f"{column}.npy")
+                direct, direct_time = timed(grid.sample, lat, lon, month, method)
+                (cached, n_cells), cold_time = timed(grid.sample_cells, lat, lon, month, method)
+                _, warm_time = timed(grid.sample_cells, lat, lon, month, method)
+                both = ~np.isnan(direct) & ~np.isnan(cached)
+                results[f'{column}_{method}_rows_per_sec'] = n_rows / direct_time
+                results[f'{column}_{method}_cold_rows_per_sec'] = n_rows / cold_time
+                results[f'{column}_{method}_warm_rows_per_sec'] = n_rows / warm_time
+                results[f'{column}_{method}_cells'] = n_cells
+                results[f'{column}_{method}_max_cell_error'] = float(np.max(np.abs(direct - cached)[both], initial=0))
+
+        # Whole stage, as load_data runs it (fill mode, both grids, fresh caches)
+        load_grids.cache_clear()
+        _, enrich_time = timed(enrich, df, grids_dir=str(directory), mode="fill", method="bilinear")
+        results['enrich_fill_rows_per_sec'] = n_rows / enrich_time
+        load_grids.cache_clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--stations", type=int, default=20_000)
+    parser.add_argument("--bathymetry-step", type=float, default=0.05, help="Degrees (0.05 = a 104 MB grid)")
+    parser.add_argument("--sst-step", type=float, default=0.25, help="Degrees, 12 monthly layers")
+    args = parser.parse_args()
+    for key, value in run(args.rows, args.stations, args.bathymetry_step, args.sst_step).items():
+        print(f"{key:>40}: {value:,.3f}")
+
+
+if __name__ == "__main__":
+    main()
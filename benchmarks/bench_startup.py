@@ -0,0 +1,111 @@
+"""
+Startup budget: time to import `main`, time until the server answers its first request (/health) and time until
+it is ready (/ready), with the data loaded on import and with BACKGROUND_LOADING. Run from a checkout holding
+the data to load (data/cleaned/ or the fallback CSV), from its root directory:
+
+    python -m benchmarks.bench_startup --repeat 3
+
+Exits with status 1 when the background mode goes over its budget.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Budgets of the background mode, in seconds (the orchestrator's readiness probe starts well after these)
+IMPORT_BUDGET_S = 2.0
+FIRST_RESPONSE_BUDGET_S = 3.0
+IMPORT_SCRIPT = ("import sys, time; start = time.perf_counter(); import main; "
+                 "print(time.perf_counter() - start, 'plotly.express' in sys.modules)")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def environment(background, port=None):
+    env = dict(os.environ, WHALIFE_DEBUG="0", WHALIFE_BACKGROUND_LOADING="1" if background else "0")
+    if port:
+        env["PORT"] = str(port)
+    return env
+
+
+def import_time(background):
+    """:return: (seconds to import main, whether plotly.express got imported)"""
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], env=environment(background), text=True,
+                                     stderr=subprocess.DEVNULL)
+    seconds, express = output.strip().splitlines()[-1].split()
+    return float(seconds), express == "True"
+
+
+def status_code(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def serve_times(background, timeout=300):
+    """
+    Starts `python main.py` and polls it.
+    :return: (seconds until /health answers, seconds until /ready answers 200), from the process start
+    """
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], env=environment(background, port),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_response = ready = None
+    try:
+        while ready is None and time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"main.py exited with status {process.returncode}")
+            if first_response is None and status_code(f"http://127.0.0.1:{port}/health") == 200:
+                first_response = time.perf_counter() - start
+            if first_response is not None and status_code(f"http://127.0.0.1:{port}/ready") == 200:
+                ready = time.perf_counter() - start
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+    return first_response, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs kept as the best time")
+    args = parser.parse_args()
+
+    report = {}
+    for mode, background in (("on import", False), ("background", True)):
+        imports = [import_time(background) for _ in range(args.repeat)]
+        serves = [serve_times(background) for _ in range(args.repeat)]
+        report[mode] = {
+            'import_main': min(seconds for seconds, _ in imports),
+            'plotly_express_on_import': imports[0][1],
+            'first_response': min(first for first, _ in serves),
+            'ready': min(ready for _, ready in serves),
+        }
+    print(json.dumps(report, indent=2))
+
+    background = report["background"]
+    over = [f"{name} {background[name]:.2f}s > {budget}s"
+            for name, budget in (("import_main", IMPORT_BUDGET_S), ("first_response", FIRST_RESPONSE_BUDGET_S))
+            if background[name] > budget]
+    if over:
+        print("❌ Over budget: " + ", ".join(over), file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Within budget (import {IMPORT_BUDGET_S}s, first response {FIRST_RESPONSE_BUDGET_S}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Offline benchmark suite: cleaning, saving/loading the cleaned data, dataset registration and every page
+callback (through the Dash HTTP endpoint, so JSON serialization is included) on synthetic OBIS-shaped data.
+Results are written as JSON, to compare two commits:
+
+    python -m benchmarks.run --output before.json
+    git checkout <other commit>
+    python -m benchmarks.run --output after.json --compare before.json
+
+The 10M rows size needs a few GB of memory: `python -m benchmarks.run --rows 10000 100000 1000000 10000000`
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import raw_occurrences
+from src.utils.clean_data import clean_data
+from src.pages import depth, shore_distance, temperature, salinity, species
+from src.utils.warmup import callback_body, CALLBACK_PATH, RANGE_CALLBACKS
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+CHUNK_SIZE = 500_000
+# Callback name -> column filtered by its slider (None = the species dropdown)
+PAGE_CALLBACKS = {
+    depth.update_depth_page.__name__: 'bathymetry',
+    shore_distance.update_distance_page.__name__: 'shoredistance',
+    temperature.update_temperature_page.__name__: 'sst',
+    salinity.update_salinity_page.__name__: 'sss',
+    species.update_species_page.__name__: None,
+}
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def cleaned_dataset(n_rows, seed=0):
+    """
+    `clean_data` output for `n_rows` raw occurrences, generated and cleaned chunk by chunk to bound memory.
+    :return: (cleaned DataFrame, seconds spent in clean_data)
+    """
+    chunks, seconds = [], 0.0
+    for i, start in enumerate(range(0, n_rows, CHUNK_SIZE)):
+        raw = raw_occurrences(min(CHUNK_SIZE, n_rows - start), seed=seed + i)
+        chunk, elapsed = timed(clean_data, raw)
+        chunks.append(chunk)
+        seconds += elapsed
+    return pd.concat(chunks, ignore_index=True), seconds
+
+
+def bench_callbacks(app, dataset, repeat):
+    """
+    Times each page callback with a cold figure cache (best of `repeat`), on the full range and on the
+    interquartile range of its column. Also records the response size (the serialized figures).
+    """
+    from src.utils.figure_cache import figure_cache
+
+    meta = dataset.page_meta()
+    client = app.server.test_client()
+    results = {}
+    for name, column in PAGE_CALLBACKS.items():
+        if column is None:
+            scenarios, step, bounds = {'first': meta.default_category}, None, (None, None)
+        else:
+            scenarios = {'full': list(meta.bounds(column)),
+                         'iqr': [meta.quantile(column, 0.25), meta.quantile(column, 0.75)]}
+            # Slider states read by the range pages, as the browser sends them
+            slider_min, slider_max, step, _ = RANGE_CALLBACKS[name][0](meta)
+            bounds = (slider_min, slider_max)
+        for scenario, value in scenarios.items():
+            body = callback_body(app, name, value, dataset.version, step, bounds=bounds)
+            best, size = None, 0
+            for _ in range(repeat):
+                figure_cache.clear()
+                response, seconds = timed(client.post, CALLBACK_PATH, json=body)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name} returned {response.status_code}")
+                best = seconds if best is None else min(best, seconds)
+                size = len(response.data)
+            results[f"{name}[{scenario}]"] = {'seconds': best, 'response_bytes': size}
+    return results
+
+
+def run(sizes, repeat):
+    workdir = tempfile.mkdtemp(prefix="whalife-bench-")
+    os.chdir(workdir)  # load_data reads and writes data/cleaned/ relative to the working directory
+    Path("data/cleaned").mkdir(parents=True)
+
+    from src.utils.data_store import register_dataset, get_dataset
+    from src.utils.load_data import load_data, save_cleaned
+
+    app = None
+    results = []
+    for n_rows in sizes:
+        df, clean_seconds = cleaned_dataset(n_rows)
+        entry = {'rows': n_rows, 'cleaned_rows': len(df), 'clean_data': clean_seconds}
+        _, entry['save_cleaned'] = timed(save_cleaned, df)
+        del df
+        loaded, entry['load_data'] = timed(load_data)
+        version, entry['register_dataset'] = timed(register_dataset, loaded)
+
+        if app is None:
+            # The app loads the data when it is imported: only once the first dataset is on disk
+            import main
+            app = main.app
+            app.server.test_client().get('/')
+        entry['callbacks'] = bench_callbacks(app, get_dataset(version), repeat)
+        results.append(entry)
+        print(f"⏱️ {n_rows:,} rows done", file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results):
+    """:return: {(rows, measure): seconds} for every timing of a report"""
+    flat = {}
+    for entry in results:
+        for key in ('clean_data', 'save_cleaned', 'load_data', 'register_dataset'):
+            flat[(entry['rows'], key)] = entry[key]
+        for key, callback in entry['callbacks'].items():
+            flat[(entry['rows'], key)] = callback['seconds']
+    return flat
+
+
+def compare(report, baseline):
+    """Prints the timings of `report` next to the ones of `baseline` (ratio > 1 = slower now)."""
+    current, previous = flatten(report['results']), flatten(baseline['results'])
+    print(f"{'rows':>10} {'measure':<40} {baseline.get('commit') or 'before':>10} {report.get('commit') or 'after':>10} ratio")
+    for key, seconds in current.items():
+        if key in previous:
+            print(f"{key[0]:>10,} {key[1]:<40} {previous[key]:>10.4f} {seconds:>10.4f} {seconds / previous[key]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3, help="Callback runs kept as the best time")
+    parser.add_argument("--output", help="JSON file of the results (printed otherwise)")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    args = parser.parse_args()
+    output = Path(args.output).resolve() if args.output else None
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+
+    report = {
+        'commit': git_commit(),
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': run(args.rows, args.repeat),
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Synthetic OBIS-shaped datasets, generated offline with a fixed seed."""
+import numpy as np
+import pandas as pd
+
+SCIENTIFIC_NAMES = [
+    'Megaptera novaeangliae', 'Balaenoptera musculus', 'Balaenoptera musculus intermedia', 'Orcinus orca',
+    'Delphinus delphis', 'Delphinus capensis', 'Tursiops truncatus', 'Physeter macrocephalus', None,
+]
+BASIS_OF_RECORD = ['HumanObservation', 'humanObservation', 'MachineObservation', 'PreservedSpecimen']
+DATASETS = [f'Survey dataset {i}' for i in range(40)]
+
+
+def _uuids(rng, n):
+    raw = rng.integers(0, 2 ** 63, size=(n, 2), dtype=np.int64).view(np.uint8).reshape(n, 16)
+    hexes = np.char.mod('%02x', raw).reshape(n, 16)
+    joined = [''.join(row) for row in hexes]
+    return [f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}" for h in joined]
+
+
+def raw_occurrences(n_rows, seed=0):
+    """
+    Raw occurrences as returned by the OBIS `occurrence` endpoint (string dates, unknown taxa,
+    missing positions and environmental values), ready for `clean_data`.
+    """
+    rng = np.random.default_rng(seed)
+    year = rng.integers(1950, 2025, n_rows)
+    month = rng.integers(1, 13, n_rows)
+    day = rng.integers(1, 29, n_rows)
+    dates = pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day})).dt.strftime('%Y-%m-%d')
+    dates = dates.where(rng.random(n_rows) > 0.1, None)
+
+    latitude = rng.uniform(-70, 70, n_rows)
+    latitude[rng.random(n_rows) < 0.01] = np.nan
+
+    def with_missing(values, rate=0.15):
+        values[rng.random(n_rows) < rate] = np.nan
+        return values
+
+    return pd.DataFrame({
+        'id': _uuids(rng, n_rows),
+        'scientificName': rng.choice(np.array(SCIENTIFIC_NAMES, dtype=object), n_rows),
+        'vernacularName': rng.choice(np.array(['Humpback whale', 'Blue whale', 'Killer whale', None], dtype=object), n_rows),
+        'decimalLatitude': latitude,
+        'decimalLongitude': rng.uniform(-180, 180, n_rows),
+        'eventDate': dates,
+        'year': year.astype(str),
+        'month': month.astype(str),
+        'basisOfRecord': rng.choice(BASIS_OF_RECORD, n_rows),
+        'datasetName': rng.choice(DATASETS, n_rows),
+        'sst': with_missing(rng.normal(15, 8, n_rows).round(2)),
+        'sss': with_missing(rng.normal(34, 2, n_rows).round(2)),
+        'bathymetry': with_missing(-rng.gamma(1.5, 800, n_rows).round(0)),
+        'shoredistance': with_missing(rng.gamma(1.2, 40000, n_rows).round(0)),
+        'flags': rng.choice(['', 'NO_DEPTH', 'ON_LAND'], n_rows),
+        'node_id': rng.choice(['a', 'b', 'c'], n_rows),
+    })
@@ -0,0 +1,35 @@
+"""
+Production server:
+
+    gunicorn -c gunicorn.conf.py
+
+The app (and the dataset) is loaded once in the master process before the workers are forked: the
+memory-mapped columns and the indexes are shared copy-on-write instead of being rebuilt by every worker.
+Each worker then warms its own caches before it accepts requests.
+With WHALIFE_BACKGROUND_LOADING=1, nothing is loaded before the fork: each worker accepts requests at once and
+loads the data (memory-mapped, so the pages are still shared by the OS) in a background thread, see /ready.
+"""
+import os
+
+wsgi_app = "main:server"
+bind = os.environ.get("WHALIFE_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WHALIFE_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+# One request at a time per worker: plotly.express is not thread-safe (concurrent figures fail with
+# "Invalid value"), so the concurrency comes from the number of workers
+threads = 1
+preload_app = True
+timeout = 120
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    from config import BACKGROUND_LOADING
+    from main import warmup, load_dataset
+    from src.utils.startup import start_background
+    if BACKGROUND_LOADING:
+        # Threads do not survive the fork: each worker loads the data itself, while already answering
+        start_background(load_dataset)
+        worker.log.info("Worker %s loading the data in the background", worker.pid)
+        return
+    warmup()
+    worker.log.info("Worker %s warmed up", worker.pid)
@@ -1,12 +1,17 @@
-from dash import Dash, html, dcc, Output, Input
-import pandas as pd
 import os
-from pathlib import Path
+from functools import lru_cache
 
-from config import TAXON_CONFIG
+from dash import Dash, html, dcc, Output, Input, no_update
 
-from src.utils.clean_data import clean_data
-from src.utils.get_data import get_data
+from src.utils.load_data import load_data
+from src.utils.data_store import register_dataset, get_dataset, current_version
+from src.utils.metrics import init_metrics
+from src.utils.client_data import init_client_data
+from src.utils.static_assets import init_static_assets
+from src.utils.export import init_export
+from src.utils.startup import init_health, start_background, set_step, mark_ready, status
+from src.utils.warmup import warm_figures
+from config import DEBUG, BACKGROUND_LOADING
 
 from src.components.header import header
 
@@ -15,58 +20,43 @@ from src.pages.shore_distance import layout_distance
 from src.pages.species import layout_species
 from src.pages.temperature import layout_temperature
 from src.pages.depth import layout_depth
+from src.pages.crossfilter import layout_crossfilter
 
 app = Dash(__name__, suppress_callback_exceptions=True)
 
 app.title = "WhaLife"
-data = {}
-compiled_data = []
-if not os.path.exists("data/cleaned"):
-    os.makedirs("data/cleaned")
-
-if not os.path.exists("data/raw"):
-    os.makedirs("data/raw")
-
-CLEANED_FILE = Path("data/cleaned/cleaned_data.csv")
-RAW_DIR = Path("data/raw")
-FALLBACK_CSV = Path("data/fallback_data.csv")
-
-def load_data():
-    if CLEANED_FILE.exists():
-        print("✅ Loading clean data from disk...")
-        return pd.read_csv(CLEANED_FILE)
-
-    try:
-        print("🌐 Clean data not found. Attempting to fetch from API...")
-        RAW_DIR.mkdir(parents=True, exist_ok=True)
-        CLEANED_FILE.parent.mkdir(parents=True, exist_ok=True)
-        compiled_data = []
-
-        for species, taxon_id in TAXON_CONFIG.items():
-            results = get_data(taxon_id, 2500)["results"]
-            df_species = pd.DataFrame(results)
-            df_species.to_csv(RAW_DIR / f"{species}.csv", index=False)
-            compiled_data.extend(results)
-
-        raw_df = pd.DataFrame(compiled_data)
-        df_final = clean_data(raw_df)
-
-        CLEANED_FILE.parent.mkdir(parents=True, exist_ok=True)
-        df_final.to_csv(CLEANED_FILE, index=False)
-        return df_final
-
-    except Exception as e:
-        print(f"⚠️ Fetch failed (No internet or API error): {e}")
-        if FALLBACK_CSV.exists():
-            print(f"💾 Using local fallback: {FALLBACK_CSV}")
-            fallback = pd.read_csv(FALLBACK_CSV, low_memory=False)
-            return fallback
-        else:
-            print("❌ Error: No clean data, no internet, and no fallback data found.")
-            return pd.DataFrame(
-                columns=['category', 'bathymetry', 'sst', 'sss', 'shoredistance', 'latitude', 'longitude', 'year'])
-
-df = load_data()
+# WSGI entry point for production servers: gunicorn -c gunicorn.conf.py (see gunicorn.conf.py)
+server = app.server
+# Callback timings and payload sizes, exported on /metrics
+init_metrics(app)
+# Typed-array copy of the data for the clientside mode (CLIENTSIDE_FILTERING)
+init_client_data(app)
+# Content-hashed, long-cached URLs of the 3D models and viewer script (/cached-assets/)
+init_static_assets(app)
+# Bulk export of the filtered observations (/export/csv, /export/geojson, /export/arrow)
+init_export(app)
+# Liveness and readiness probes (/health, /ready)
+init_health(app)
+
+
+def load_dataset():
+    """Loads the cleaned data, registers it (indexes included) and warms the caches. :return: Its version"""
+    set_step("loading data")
+    df = load_data()
+    set_step("building indexes")
+    version = register_dataset(df)
+    set_step("warming caches")
+    warmup()
+    return version
+
+
+if BACKGROUND_LOADING:
+    # Registered by the loading thread (start_background, run by each server process): pages show a
+    # "data warming" message until then
+    DATA_VERSION = None
+else:
+    DATA_VERSION = register_dataset(load_data())
+    mark_ready(DATA_VERSION)
 
 menu_button_style = {
     'backgroundColor': '#007bff', 'color': 'white', 'border': 'none',
@@ -77,7 +67,10 @@ menu_button_style = {
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
 
-    dcc.Store(id='main-data-store', data=df.to_dict('records')),
+    # Only the dataset version travels to the browser, the rows stay in the server-side registry
+    dcc.Store(id='main-data-store', data=DATA_VERSION),
+    # Polls for the end of the background loading, disabled once a dataset is served
+    dcc.Interval(id='warming-poll', interval=1000, disabled=DATA_VERSION is not None),
 
     header(),
 
@@ -88,26 +81,61 @@ app.layout = html.Div([
         dcc.Link(html.Button('Temperature', style=menu_button_style), href='/temperature',
                  style={'marginLeft': '10px'}),
         dcc.Link(html.Button('Salinity', style=menu_button_style), href='/salinity', style={'marginLeft': '10px'}),
+        dcc.Link(html.Button('Combined', style=menu_button_style), href='/combined', style={'marginLeft': '10px'}),
     ], style={'textAlign': 'center', 'padding': '10px'}),
 
     html.Div(id='page-content')
 ])
 
+# Layout function of each page, keyed by its URL (any other URL shows the species page)
+PAGES = {
+    '/': layout_species,
+    '/depth': layout_depth,
+    '/distance': layout_distance,
+    '/temperature': layout_temperature,
+    '/salinity': layout_salinity,
+    '/combined': layout_crossfilter,
+}
+
+
+@lru_cache(maxsize=32)
+def page_layout(pathname, version):
+    """Builds a page on its first visit, then reuses it until the dataset version changes."""
+    return PAGES[pathname](get_dataset(version).page_meta())
+
+
+def warming_page():
+    """Shown while the data loads in the background, with the current loading step."""
+    state = status()
+    message = "Data loading failed, see the server logs" if state['state'] == 'failed' \
+        else f"Data warming up ({state['step']})..."
+    return html.Div(message, style={'textAlign': 'center', 'padding': '40px', 'fontSize': '18px'})
+
+
 @app.callback(
     Output('page-content', 'children'),
-    Input('url', 'pathname')
+    Output('main-data-store', 'data'),
+    Output('warming-poll', 'disabled'),
+    Input('url', 'pathname'),
+    Input('warming-poll', 'n_intervals')
 )
-def display_page(pathname):
-    if pathname == '/depth':
-        return layout_depth(df)
-    elif pathname == '/distance':
-        return layout_distance(df)
-    elif pathname == '/temperature':
-        return layout_temperature(df)
-    elif pathname == '/salinity':
-        return layout_salinity(df)
-    else:
-        return layout_species(df)
+def display_page(pathname, _):
+    version = current_version()
+    if version is None:
+        return warming_page(), no_update, status()['state'] == 'failed'
+    # The page and the store always follow the current version: a reloaded dataset is picked up on navigation
+    return page_layout(pathname if pathname in PAGES else '/', version), version, True
+
+
+def warmup():
+    """Builds every page layout and the figures shown when a page opens (run in each worker before serving)."""
+    for pathname in PAGES:
+        page_layout(pathname, current_version())
+    warm_figures(app)
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # With the debug reloader, only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if BACKGROUND_LOADING and (not DEBUG or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        start_background(load_dataset)
+    app.run(debug=DEBUG)
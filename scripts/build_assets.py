@@ -0,0 +1,85 @@
+"""
+Offline build of the static assets served on /cached-assets/ (src/utils/static_assets.py), run after changing
+a model and before deploying:
+
+    python scripts/build_assets.py --texture-size 1024
+
+- .glb models: meshes compressed (meshopt) and textures resized and converted to WebP by gltf-transform
+  (`npm install -g @gltf-transform/cli`). Without it, models are copied as is.
+- every built file gets precompressed variants: .gz, and .br when the `brotli` package is installed.
+
+The built files land in build/assets/ and are served instead of the originals of assets/.
+"""
+import argparse
+import gzip
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.static_assets import ASSETS_DIR, BUILD_DIR
+
+# Assets fetched by the 3D viewer (the models and the viewer script)
+PATTERNS = ["*.glb", "model-viewer.min.js"]
+
+
+def optimize_model(source, target, texture_size):
+    """Writes a size-reduced copy of a .glb model. :return: True if it was optimized, False if copied as is"""
+    if shutil.which("gltf-transform"):
+        result = subprocess.run(["gltf-transform", "optimize", str(source), str(target), "--compress", "meshopt",
+                                 "--texture-compress", "webp", "--texture-size", str(texture_size)],
+                                capture_output=True, text=True)
+        if result.returncode == 0 and target.exists():
+            return True
+        print(f"⚠️ gltf-transform failed on {source.name}: {result.stderr.strip()[-300:]}")
+    shutil.copyfile(source, target)
+    return False
+
+
+def precompress(path):
+    """Writes `path`.gz and, if brotli is installed, `path`.br. :return: {encoding: size in bytes}"""
+    data = path.read_bytes()
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        variants['br'] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    sizes = {}
+    for encoding, compressed in variants.items():
+        # A variant that is not smaller (already compressed textures...) is not worth serving
+        variant = path.with_name(path.name + ('.br' if encoding == 'br' else '.gz'))
+        if len(compressed) < len(data):
+            variant.write_bytes(compressed)
+            sizes[encoding] = len(compressed)
+        else:
+            variant.unlink(missing_ok=True)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texture-size", type=int, default=1024, help="Maximum texture size, in pixels")
+    parser.add_argument("--no-optimize", action="store_true", help="Only precompress, keep the models as they are")
+    args = parser.parse_args()
+
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    if not args.no_optimize and not shutil.which("gltf-transform"):
+        print("ℹ️ gltf-transform not found: the models are only precompressed")
+    for source in sorted(path for pattern in PATTERNS for path in ASSETS_DIR.glob(pattern)):
+        target = BUILD_DIR / source.name
+        if source.suffix == ".glb" and not args.no_optimize:
+            optimized = optimize_model(source, target, args.texture_size)
+        else:
+            shutil.copyfile(source, target)
+            optimized = False
+        sizes = precompress(target)
+        print(f"📦 {source.name}: {source.stat().st_size / 1e6:.2f} MB -> {target.stat().st_size / 1e6:.2f} MB"
+              + (" (optimized)" if optimized else "")
+              + "".join(f", {encoding} {size / 1e6:.2f} MB" for encoding, size in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
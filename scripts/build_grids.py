@@ -0,0 +1,114 @@
+"""
+Offline conversion of a gridded NetCDF dataset to the memory-mapped grids of the enrichment
+(src/utils/enrichment.py), run once per grid:
+
+    python scripts/build_grids.py gebco_2024.nc --column bathymetry --variable elevation --elevation --stride 4
+    python scripts/build_grids.py woa23_t_monthly.nc --column sst --variable t_an
+    python scripts/build_grids.py sss_daily.nc --column sss --variable sos --climatology
+
+Writes data/grids/<column>.npy (float32, latitudes ascending, longitudes in [-180, 180[) and <column>.json.
+A variable with a time axis becomes a monthly grid: 12 steps are taken as the 12 months, a longer series needs
+`--climatology` (mean of each calendar month). Reading NetCDF needs the optional `xarray` and `netCDF4` packages;
+the app itself only reads the .npy files.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import ENRICH_GRIDS_DIR
+from src.utils.enrichment import ENRICH_COLUMNS
+
+LAT_NAMES = ['lat', 'latitude', 'y']
+LON_NAMES = ['lon', 'longitude', 'x']
+# Rows converted at a time (a global 15" bathymetry does not fit in memory)
+BLOCK_ROWS = 1000
+
+
+def _dim(da, names):
+    for name in names:
+        if name in da.dims:
+            return name
+    sys.exit(f"❌ No dimension among {names} in {da.dims}")
+
+
+def _step(coords):
+    steps = np.diff(coords)
+    if not len(steps) or not np.allclose(steps, steps[0], rtol=1e-3):
+        sys.exit("❌ The grid is not regular")
+    return float(steps[0])
+
+
+def open_variable(path, variable, stride, climatology):
+    """:return: DataArray (month?, lat, lon), lazily read, latitudes ascending and longitudes in [-180, 180["""
+    try:
+        import xarray as xr
+    except ImportError:
+        sys.exit("❌ Reading NetCDF needs the xarray and netCDF4 packages (pip install xarray netCDF4)")
+
+    da = xr.open_dataset(path)[variable]
+    lat, lon = _dim(da, LAT_NAMES), _dim(da, LON_NAMES)
+    time = next((dim for dim in da.dims if dim not in (lat, lon) and 'time' in dim.lower()), None)
+    # Other axes (depth levels...): the first level, i.e. the surface
+    da = da.isel({dim: 0 for dim in da.dims if dim not in (lat, lon, time)})
+    if time is not None:
+        if climatology:
+            da = da.groupby(f"{time}.month").mean(time).rename(month=time)
+        elif da.sizes[time] != 12:
+            sys.exit(f"❌ {da.sizes[time]} time steps: use --climatology to average them by month")
+
+    da = da.isel({lat: slice(None, None, stride), lon: slice(None, None, stride)})
+    da = da.assign_coords({lon: ((da[lon] + 180) % 360) - 180}).sortby([lat, lon])
+    return da.transpose(*([time] if time else []), lat, lon), lat, lon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="NetCDF file")
+    parser.add_argument("--column", required=True, choices=ENRICH_COLUMNS)
+    parser.add_argument("--variable", required=True, help="Variable of the NetCDF file")
+    parser.add_argument("--stride", type=int, default=1, help="Keep one cell out of N in each direction")
+    parser.add_argument("--climatology", action="store_true", help="Average a time series by calendar month")
+    parser.add_argument("--elevation", action="store_true",
+                        help="Values are elevations (negative at sea): stored as positive depths, land as NaN")
+    parser.add_argument("--scale", type=float, default=1.0, help="Unit conversion: value * scale + offset")
+    parser.add_argument("--offset", type=float, default=0.0, help="e.g. -273.15 for a temperature in Kelvin")
+    parser.add_argument("--output-dir", default=ENRICH_GRIDS_DIR)
+    args = parser.parse_args()
+
+    da, lat, lon = open_variable(args.input, args.variable, args.stride, args.climatology)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    target = output_dir / f"{args.column}.npy"
+    tmp_target = target.with_name(target.name + ".tmp.npy")
+
+    values = np.lib.format.open_memmap(tmp_target, mode="w+", dtype=np.float32, shape=da.shape)
+    n_lat = da.sizes[lat]
+    for start in range(0, n_lat, BLOCK_ROWS):
+        block = da.isel({lat: slice(start, start + BLOCK_ROWS)}).to_numpy().astype(np.float64)
+        block = block * args.scale + args.offset
+        if args.elevation:
+            block = np.where(block < 0, -block, np.nan)
+        if args.column in ('bathymetry', 'shoredistance'):
+            # Same convention as clean_data
+            block = np.abs(block)
+        values[..., start:start + BLOCK_ROWS, :] = block
+        print(f"⏳ {args.column}: {min(start + BLOCK_ROWS, n_lat):,}/{n_lat:,} rows", end="\r")
+    values.flush()
+    del values
+    tmp_target.replace(target)
+
+    meta = {'lat_min': float(da[lat][0]), 'lon_min': float(da[lon][0]),
+            'lat_step': _step(da[lat].to_numpy()), 'lon_step': _step(da[lon].to_numpy()),
+            'source': Path(args.input).name, 'variable': args.variable}
+    with open(target.with_suffix(".json"), "w", encoding="utf-8") as file:
+        json.dump(meta, file, indent=2)
+    print(f"\n✅ {target}: {da.shape} ({target.stat().st_size / 1e6:.1f} MB), step {meta['lat_step']}°")
+
+
+if __name__ == "__main__":
+    main()
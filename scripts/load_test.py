@@ -0,0 +1,160 @@
+"""
+Load test of a running instance: drives the page callbacks concurrently, with random slider ranges and
+species, and reports the latency percentiles of each callback.
+
+    gunicorn -c gunicorn.conf.py &
+    python scripts/load_test.py --url http://127.0.0.1:8050 --concurrency 16 --requests 500
+
+The script only talks HTTP: the pages, their sliders and the data version are read from the app itself.
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+CALLBACK_PATH = "/_dash-update-component"
+PAGES = ['/', '/depth', '/distance', '/temperature', '/salinity']
+
+
+def find_components(tree, found=None):
+    """:return: Every component of a serialized layout, as a flat list of {type, props}"""
+    found = [] if found is None else found
+    if isinstance(tree, dict):
+        if 'type' in tree and 'props' in tree:
+            found.append(tree)
+            find_components(tree['props'].get('children'), found)
+    elif isinstance(tree, list):
+        for child in tree:
+            find_components(child, found)
+    return found
+
+
+def callback_body(callback, values):
+    """:param values: Dictionary {"component_id.property": value} of the inputs and states"""
+    def items(key):
+        return [dict(item, value=values.get(f"{item['id']}.{item['property']}")) for item in callback[key]]
+    outputs = [{'id': id_, 'property': prop}
+               for id_, prop in (part.rsplit('.', 1) for part in callback['output'].strip('.').split('...'))]
+    return {
+        'output': callback['output'],
+        # Multi-output callbacks ("..a.x...b.y..") get a list, single-output ones a single item
+        'outputs': outputs if callback['output'].startswith('..') else outputs[0],
+        'inputs': items('inputs'),
+        'state': items('state'),
+        'changedPropIds': [f"{callback['inputs'][0]['id']}.{callback['inputs'][0]['property']}"],
+    }
+
+
+def discover(session, url):
+    """
+    Renders every page through the routing callback and builds, for each page callback, a function that
+    returns a random request body.
+    :return: Dictionary {callback output: function returning a request body}
+    """
+    callbacks = session.get(f"{url}/_dash-dependencies").json()
+    by_input = {f"{c['inputs'][0]['id']}.{c['inputs'][0]['property']}": c for c in callbacks}
+    layout = session.get(f"{url}/_dash-layout").json()
+    version = next(c['props']['data'] for c in find_components(layout) if c['props'].get('id') == 'main-data-store')
+
+    generators = {}
+    router = by_input['url.pathname']
+    for page in PAGES:
+        response = session.post(f"{url}{CALLBACK_PATH}", json=callback_body(router, {'url.pathname': page}))
+        response.raise_for_status()
+        children = response.json()['response']['page-content']['children']
+        for component in find_components(children):
+            props = component['props']
+            callback = by_input.get(f"{props.get('id')}.value")
+            if callback is None:
+                continue
+            if component['type'] == 'RangeSlider':
+                generators[callback['output']] = range_generator(callback, props, version)
+            elif component['type'] == 'Dropdown':
+                generators[callback['output']] = dropdown_generator(callback, props, version)
+    return generators
+
+
+def range_generator(callback, props, version):
+    slider_id, low, high, step = props['id'], props['min'], props['max'], props.get('step') or 1
+
+    def body():
+        a, b = sorted(random.uniform(low, high) for _ in range(2))
+        value = [round(a / step) * step, round(b / step) * step]
+        # Slider states as the browser sends them; the other stores (map on screen) are empty, as on a first visit
+        return callback_body(callback, {f"{slider_id}.value": value, f"{slider_id}.step": step,
+                                        f"{slider_id}.min": low, f"{slider_id}.max": high,
+                                        'main-data-store.data': version})
+    return body
+
+
+def dropdown_generator(callback, props, version):
+    options = [option['value'] for option in props['options']]
+
+    def body():
+        return callback_body(callback, {f"{props['id']}.value": random.choice(options), 'main-data-store.data': version})
+    return body
+
+
+def run(url, concurrency, n_requests, seed):
+    random.seed(seed)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    generators = discover(session, url)
+    if not generators:
+        raise RuntimeError(f"No page callback found on {url}")
+    jobs = [random.choice(list(generators.items())) for _ in range(n_requests)]
+
+    def call(job):
+        output, generate = job
+        start = time.perf_counter()
+        response = session.post(f"{url}{CALLBACK_PATH}", json=generate())
+        return output, time.perf_counter() - start, response.status_code
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for output, seconds, status in executor.map(call, jobs):
+            latencies[output].append(seconds)
+            if status != 200:
+                errors[output] += 1
+    elapsed = time.perf_counter() - start
+
+    report = {'url': url, 'concurrency': concurrency, 'requests': n_requests,
+              'throughput_per_sec': n_requests / elapsed, 'callbacks': {}}
+    for output, values in sorted(latencies.items()) + [('all', sum(latencies.values(), []))]:
+        values = np.array(values) * 1000
+        report['callbacks'][output] = {
+            'requests': len(values), 'errors': errors[output] if output != 'all' else sum(errors.values()),
+            'p50_ms': float(np.percentile(values, 50)), 'p99_ms': float(np.percentile(values, 99)),
+            'mean_ms': float(values.mean()),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.url.rstrip('/'), args.concurrency, args.requests, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}: "
+          f"{report['throughput_per_sec']:.1f} requests/s")
+    for output, stats in report['callbacks'].items():
+        print(f"{output[:70]:<70} n={stats['requests']:<5} p50={stats['p50_ms']:8.1f} ms "
+              f"p99={stats['p99_ms']:8.1f} ms errors={stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
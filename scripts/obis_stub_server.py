@@ -0,0 +1,91 @@
+"""
+Local stand-in for the OBIS v3 `occurrence` endpoint, replaying pages recorded by `fetch_all`.
+
+    python scripts/obis_stub_server.py data/raw --port 8765 --fail-every 3
+    OBIS_API_URL=http://127.0.0.1:8765/v3 python main.py
+
+Every sub-folder of the recordings folder holding a `cursor.json` is one taxon. Its recorded
+occurrences are served in order, `size` at a time, starting after the `after` occurrence id
+(optionally restricted to event dates from `startdate` on).
+`--fail-every N` answers every Nth request with a 503 to exercise the retry/backoff path.
+"""
+import argparse
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+def load_recordings(recordings_dir):
+    """:return: Dictionnaire {taxonID: (occurrences enregistrées, {id: position de l'occurrence suivante})}"""
+    recordings = {}
+    for cursor_file in Path(recordings_dir).glob("*/cursor.json"):
+        with open(cursor_file, encoding="utf-8") as file:
+            taxon_id = str(json.load(file)["taxon_id"])
+        records = []
+        for page in sorted(cursor_file.parent.glob("page_*.json")):
+            with open(page, encoding="utf-8") as file:
+                records.extend(json.load(file)["results"])
+        positions = {record["id"]: position + 1 for position, record in enumerate(records)}
+        recordings[taxon_id] = (records, positions)
+    return recordings
+
+
+def make_handler(recordings, fail_every):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            with lock:
+                request_number = next(counter)
+            if fail_every and request_number % fail_every == 0:
+                return self.send_json(503, {"error": "stub failure"})
+            if url.path.rstrip("/") != "/v3/occurrence" or "taxonid" not in query:
+                return self.send_json(404, {"error": "unknown route"})
+
+            records, positions = recordings.get(query["taxonid"][0], ([], {}))
+            if "startdate" in query:
+                startdate = query["startdate"][0]
+                records = [record for record in records if str(record.get("eventDate") or "")[:10] >= startdate]
+                positions = {record["id"]: position + 1 for position, record in enumerate(records)}
+            start = positions.get(query.get("after", [None])[0], 0)
+            size = int(query.get("size", ["5000"])[0])
+            self.send_json(200, {"total": len(records), "results": records[start:start + size]})
+
+        def send_json(self, status, data):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", help="Folder of recorded pages (same layout as data/raw)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.recordings)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(recordings, args.fail_every))
+    print(f"Replaying {sum(len(records) for records, _ in recordings.values())} occurrences "
+          f"for {len(recordings)} taxa on "
+          f"http://{args.host}:{args.port}/v3")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
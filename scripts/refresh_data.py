@@ -0,0 +1,32 @@
+"""
+Incremental refresh of the cleaned data (the columnar store data/cleaned/cleaned_data/, its time cube and the
+CSV export), meant to be scheduled (cron, systemd timer...):
+
+    python scripts/refresh_data.py
+
+Each taxon is downloaded again (up to MAX_RECORDS_PER_TAXON occurrences, as the first download), and only the
+occurrences whose id is not in the cleaned data yet are cleaned and merged.
+After adding or updating a grid in data/grids/, `--enrich` samples it again over the whole cleaned data.
+
+A running server keeps serving the data it loaded: restart it to serve the refreshed data (see the README).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.load_data import enrich_cleaned, refresh_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--enrich", action="store_true", help="Re-sample the local grids over all the cleaned data")
+    args = parser.parse_args()
+    refresh_data()
+    if args.enrich:
+        enrich_cleaned()
+
+
+if __name__ == "__main__":
+    main()
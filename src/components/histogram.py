@@ -1,13 +1,56 @@
-import plotly.express as px
+import math
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
-def histogram(dff, x, title, labels):
-    return px.histogram(
-        dff,
-        x=x,
-        color="category",
-        facet_col="category",
-        facet_col_wrap=2,
-        title=title,
-        labels=labels,
-        nbins=20
-    )
\ No newline at end of file
+from src.components.scatter_map import category_colors
+from src.utils.taxonomy import group_counts
+
+def histogram(edges, counts, x, title, labels, categories=None):
+    """
+    :param edges: Bin edges shared by every category
+    :param counts: Dictionary {category: number of observations per bin}
+    :param x: Binned column (used to look up the axis label)
+    :param categories: Categories of the dataset, in order (default: the keys of `counts`): they give the
+                       "Other" grouping and the colors, the same as on the map
+    :return: One facet per category, two facets per row, with one bar trace per facet
+    """
+    categories = list(counts) if categories is None else list(categories)
+    colors = category_colors(categories)
+    # Only the facets of the most observed categories are built, the others are summed into one "Other" facet
+    counts = group_counts(counts, categories)
+    categories = list(counts)
+    if not categories:
+        return go.Figure(layout={'title': title})
+
+    n_rows = math.ceil(len(categories) / 2)
+    fig = make_subplots(
+        rows=n_rows,
+        cols=2,
+        subplot_titles=[f"category={category}" for category in categories],
+        horizontal_spacing=0.06,
+        vertical_spacing=min(0.12, 0.36 / max(n_rows - 1, 1))
+    )
+    centers = (edges[:-1] + edges[1:]) / 2
+    widths = edges[1:] - edges[:-1]
+    for i, category in enumerate(categories):
+        fig.add_trace(
+            go.Bar(
+                x=centers,
+                y=counts[category],
+                width=widths,
+                customdata=list(zip(edges[:-1], edges[1:])),
+                name=category,
+                marker_color=colors[category],
+                hovertemplate=f"category={category}<br>{labels.get(x, x)}=%{{customdata[0]:.4g}} - %{{customdata[1]:.4g}}"
+                              f"<br>{labels.get('count', 'count')}=%{{y}}<extra></extra>"
+            ),
+            row=i // 2 + 1,
+            col=i % 2 + 1
+        )
+    fig.update_xaxes(title_text=labels.get(x, x), row=n_rows)
+    fig.update_yaxes(title_text=labels.get('count', 'count'), col=1)
+    fig.update_layout(title=title, bargap=0, legend_title_text='category')
+    if n_rows > 2:
+        # Up to MAX_CATEGORIES + 1 facets: each row keeps a readable height
+        fig.update_layout(height=220 * n_rows)
+    return fig
\ No newline at end of file
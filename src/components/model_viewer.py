@@ -1,13 +1,44 @@
 from dash import html
 
+from src.utils.static_assets import asset_url
+
+# Models of the species next to the selected one in the dropdown, prefetched into the browser cache
+PRELOAD_MODELS = 2
+
+
+def model_url(category):
+    """:return: Hashed URL of the .glb model of a species ("Blue Whale" -> blue_whale.glb), None without model"""
+    return asset_url(f"{category.lower().replace('%20', '_').replace(' ', '_')}.glb")
+
+
+def likely_next(categories, category, n=PRELOAD_MODELS):
+    """:return: URLs of the models of the species around `category` in the dropdown (the next picks, most likely)"""
+    categories = list(categories)
+    if category not in categories:
+        return []
+    i = categories.index(category)
+    # Closest to the selected species in the dropdown first
+    neighbours = sorted((c for c in categories if c != category), key=lambda c: abs(categories.index(c) - i))
+    urls = [url for url in map(model_url, neighbours) if url]
+    return urls[:n]
+
+
+def preload_links(urls):
+    return [html.Link(rel='prefetch', href=url) for url in urls]
+
+
 def model_viewer(file_path):
+    """
+    Viewer created once per page: the species callback only swaps the `src` of its <model-viewer> in place
+    (`swapModel` in assets/model_viewer.js), so the viewer script is not booted again.
+    """
     viewer_html = f'''
-        <script type="module" src="/assets/model-viewer.min.js"></script>
-        <style>body {{ margin: 0; background-color: #f4f4f4; }}</style>        
-        <model-viewer 
-            src="{file_path}" 
-            style="width: 100vw; height: 100vh;" 
-            camera-controls 
+        <script type="module" src="{asset_url('model-viewer.min.js')}"></script>
+        <style>body {{ margin: 0; background-color: #f4f4f4; }}</style>
+        <model-viewer
+            src="{file_path or ''}"
+            style="width: 100vw; height: 100vh;{'' if file_path else ' visibility: hidden;'}"
+            camera-controls
             autoplay
             auto-rotate>
         </model-viewer>
@@ -20,4 +51,4 @@ def model_viewer(file_path):
             'height': '600px',
             'border': 'none'
         }
-    )
\ No newline at end of file
+    )
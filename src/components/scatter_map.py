@@ -1,14 +1,163 @@
-import plotly.express as px
-
-def scatter_map(dff, title, hover_data):
-    return px.scatter_map(
-        dff,
-        lat="latitude",
-        lon="longitude",
-        color="category",
-        size_max=15,
-        zoom=1,
-        map_style="open-street-map",
-        title=title,
-        hover_data=[hover_data]
-    )
\ No newline at end of file
+import math
+
+import numpy as np
+import pandas as pd
+from plotly.colors import qualitative
+
+from src.utils.spatial_index import normalize_bounds
+from src.utils.taxonomy import group_categories
+
+# Level of detail: above MAX_POINTS observations the map shows aggregated grid cells,
+# unless the user has zoomed in to DETAIL_ZOOM or closer.
+MAX_POINTS = 5000
+DETAIL_ZOOM = 6
+DEFAULT_ZOOM = 1
+COLORS = qualitative.Plotly
+
+
+def category_colors(categories):
+    """
+    Color of each category (and of OTHER), given the categories of the dataset in order: the same on every
+    figure of a page, whichever categories the selection holds.
+    """
+    names = group_categories(pd.Categorical([], categories=categories)).categories
+    return {name: COLORS[i % len(COLORS)] for i, name in enumerate(names)}
+
+
+def map_zoom(relayout_data):
+    """Current zoom of a map figure, read from its `relayoutData` (None if the event holds no zoom)."""
+    if not relayout_data:
+        return None
+    return relayout_data.get('map.zoom')
+
+
+def map_bounds(relayout_data):
+    """
+    Visible area of a map figure, read from the corners plotly reports in its `relayoutData`.
+    :return: (south, north, west, east), or None if the event holds no viewport
+    """
+    coordinates = ((relayout_data or {}).get('map._derived') or {}).get('coordinates')
+    if not coordinates:
+        return None
+    longitudes = [corner[0] for corner in coordinates]
+    latitudes = [corner[1] for corner in coordinates]
+    return normalize_bounds(min(latitudes), max(latitudes), min(longitudes), max(longitudes))
+
+
+def viewport_bounds(relayout_data, n_rows, zoomed, max_points=MAX_POINTS, detail_zoom=DETAIL_ZOOM):
+    """
+    Visible area the map of a selection of `n_rows` observations is limited to: after a pan/zoom of an aggregated
+    map, and on every update (slider, dropdown...) once zoomed in to raw points, which would otherwise draw every
+    matching observation worldwide.
+    :param zoomed: The update comes from a pan/zoom of the map
+    :return: (south, north, west, east), or None if the whole selection is drawn
+    """
+    if n_rows <= max_points:
+        return None
+    zoom = map_zoom(relayout_data)
+    if not zoomed and (zoom is None or zoom < detail_zoom):
+        return None
+    return map_bounds(relayout_data)
+
+
+def zoom_level(zoom, detail_zoom=DETAIL_ZOOM):
+    """Whole zoom level that decides the map level of detail (what the figure cache keys on)."""
+    if zoom is None:
+        return DEFAULT_ZOOM
+    return min(max(int(math.floor(zoom)), 0), detail_zoom)
+
+
+def cell_size(zoom):
+    """Grid cell size in degrees, halved at each zoom level (about 11° at zoom 1)."""
+    return 180 / 2 ** (zoom_level(zoom) + 3)
+
+
+def aggregate_cells(dff, cell_deg):
+    """
+    Counts the observations per (category, grid cell).
+    :return: DataFrame with the cell center, the category and the number of observations
+    """
+    lat_idx = np.floor((dff['latitude'].to_numpy() + 90) / cell_deg).astype(np.int64)
+    lon_idx = np.floor((dff['longitude'].to_numpy() + 180) / cell_deg).astype(np.int64)
+    categories = pd.Categorical(dff['category'])
+    n_lon = int(np.ceil(360 / cell_deg)) + 1
+    n_lat = int(np.ceil(180 / cell_deg)) + 1
+    keys = (np.asarray(categories.codes, dtype=np.int64) * n_lat + lat_idx) * n_lon + lon_idx
+    cells, counts = np.unique(keys, return_counts=True)
+
+    codes, rest = np.divmod(cells, n_lat * n_lon)
+    cell_lat, cell_lon = np.divmod(rest, n_lon)
+    return pd.DataFrame({
+        'latitude': (cell_lat + 0.5) * cell_deg - 90,
+        'longitude': (cell_lon + 0.5) * cell_deg - 180,
+        'category': pd.Categorical.from_codes(codes, categories.categories),
+        'observations': counts
+    })
+
+
+def scatter_map(dff, title, hover_data=None, max_points=MAX_POINTS, detail_zoom=DETAIL_ZOOM, zoom=None,
+                aggregation="grid", weight=1):
+    """
+    :param dff: Observations to plot (latitude, longitude, category)
+    :param max_points: Above this number of observations the map is aggregated
+    :param detail_zoom: From this zoom level on, raw points are always shown
+    :param zoom: Current zoom of the map (None = initial view)
+    :param aggregation: "grid" (one sized marker per cell and category) or "density" (heatmap layer)
+    :param weight: Number of observations each row stands for (> 1 for the sample of a preview map)
+    """
+    # Imported on first use: plotly.express alone adds ~0.2 s to the startup of the app
+    import plotly.express as px
+
+    category_orders, color_map = None, None
+    if hasattr(dff['category'], 'cat'):
+        # At most MAX_CATEGORIES colors, the less observed categories drawn as "Other"
+        dff = dff.assign(category=group_categories(dff['category'].array))
+        category_orders = {'category': list(dff['category'].cat.categories)}
+        color_map = category_colors(category_orders['category'])
+    current_zoom = DEFAULT_ZOOM if zoom is None else zoom
+    n_obs = f"{len(dff)} obs." if weight == 1 else f"about {len(dff) * weight} obs. (preview, refining...)"
+
+    if len(dff) <= max_points or current_zoom >= detail_zoom:
+        fig = px.scatter_map(
+            dff,
+            lat="latitude",
+            lon="longitude",
+            color="category",
+            category_orders=category_orders,
+            color_discrete_map=color_map,
+            size_max=15,
+            zoom=DEFAULT_ZOOM,
+            map_style="open-street-map",
+            title=title,
+            hover_data=[hover_data] if hover_data else None
+        )
+    elif aggregation == "density":
+        fig = px.density_map(
+            dff,
+            lat="latitude",
+            lon="longitude",
+            radius=8,
+            zoom=DEFAULT_ZOOM,
+            map_style="open-street-map",
+            title=f"{title} - density of {n_obs}"
+        )
+    else:
+        cells = aggregate_cells(dff, cell_size(current_zoom))
+        cells['observations'] *= weight
+        fig = px.scatter_map(
+            cells,
+            lat="latitude",
+            lon="longitude",
+            color="category",
+            size="observations",
+            category_orders=category_orders,
+            color_discrete_map=color_map,
+            size_max=25,
+            zoom=DEFAULT_ZOOM,
+            map_style="open-street-map",
+            title=f"{title} - {n_obs} grouped by area, zoom in for details",
+            hover_data=['observations']
+        )
+    # Keeps the user's pan/zoom when the figure is rebuilt
+    fig.update_layout(uirevision="map")
+    return fig
@@ -1,6 +1,12 @@
 from dash import dcc
 
-def slider(slider_min, slider_max, unit, step, step_marks_depth, id_):
+from config import SLIDER_UPDATEMODE
+
+
+def slider(slider_min, slider_max, unit, step, step_marks_depth, id_, updatemode=SLIDER_UPDATEMODE):
+    """
+    :param updatemode: "mouseup" (one callback per drag, the default) or "drag" (one per intermediate value)
+    """
     return dcc.RangeSlider(
                 min=slider_min,
                 max=slider_max,
@@ -8,5 +14,6 @@ def slider(slider_min, slider_max, unit, step, step_marks_depth, id_):
                 value=[slider_min, slider_max],
                 marks={i: f'{i}{unit}' for i in range(int(slider_min), int(slider_max) + 1, step_marks_depth)},
                 tooltip={"placement": "bottom", "always_visible": True},
+                updatemode=updatemode,
                 id=id_
-            )
\ No newline at end of file
+            )
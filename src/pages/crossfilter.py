@@ -0,0 +1,144 @@
+from dash import html, dcc, Output, Input, State, callback, ctx, no_update, ALL
+from dash.exceptions import PreventUpdate
+import numpy as np
+import plotly.graph_objects as go
+from src.components.slider import slider
+from src.components.scatter_map import scatter_map, map_zoom, viewport_bounds, zoom_level, MAX_POINTS
+from src.components.histogram import histogram
+from src.pages import depth, shore_distance, temperature, salinity
+from src.utils.data_store import get_dataset
+from src.utils.figure_cache import figure_cache
+from src.utils.metrics import stage, record_rows
+
+# Column, label, unit and slider settings of each dimension (the same sliders as the single-filter pages)
+DIMENSIONS = [
+    ('bathymetry', 'Depth', 'm', depth.slider_settings),
+    ('shoredistance', 'Distance to coast', 'm', shore_distance.slider_settings),
+    ('sst', 'Temperature', '°C', temperature.slider_settings),
+    ('sss', 'Salinity', 'g/L', salinity.slider_settings),
+]
+LABELS = {'bathymetry': 'Depth (m)', 'shoredistance': 'Distance (m)', 'sst': 'Temperature (°C)',
+          'sss': 'Salinity (g/L)', 'count': 'Obs.'}
+
+
+def layout_crossfilter(meta):
+    sliders = []
+    for column, label, unit, settings in DIMENSIONS:
+        slider_min, slider_max, step, step_marks = settings(meta)
+        sliders.append(html.Div([
+            html.Label(f"{label}:"),
+            slider(slider_min, slider_max, unit, step, step_marks, {'type': 'crossfilter-slider', 'column': column})
+        ], style={'padding': '10px 20px'}))
+
+    return html.Div([
+        html.H2("Combined Filters"),
+        html.Label("Select Species (all species when empty):"),
+        dcc.Dropdown(
+            options=[{'label': i, 'value': i} for i in meta.categories],
+            value=None,
+            placeholder="All species",
+            id='crossfilter-species'
+        ),
+        html.Div(sliders),
+        html.Label("Histogram of:"),
+        dcc.RadioItems(
+            options=[{'label': label, 'value': column} for column, label, _, _ in DIMENSIONS],
+            value='bathymetry',
+            inline=True,
+            id='crossfilter-hist-column'
+        ),
+        dcc.Loading(
+            id="loading-crossfilter",
+            type="circle",
+            color="#007bff",
+            children=html.Div([
+                dcc.Graph(id='graph-crossfilter-map', style={'width': '48%', 'display': 'inline-block'}),
+                dcc.Graph(id='graph-crossfilter-hist', style={'width': '48%', 'display': 'inline-block', 'float': 'right'})
+            ])
+        )
+    ])
+
+
+@callback(
+    Output('graph-crossfilter-map', 'figure'),
+    Output('graph-crossfilter-hist', 'figure'),
+    Input({'type': 'crossfilter-slider', 'column': ALL}, 'value'),
+    Input('crossfilter-species', 'value'),
+    Input('crossfilter-hist-column', 'value'),
+    Input('graph-crossfilter-map', 'relayoutData'),
+    State({'type': 'crossfilter-slider', 'column': ALL}, 'min'),
+    State({'type': 'crossfilter-slider', 'column': ALL}, 'max'),
+    State({'type': 'crossfilter-slider', 'column': ALL}, 'id'),
+    State('main-data-store', 'data')
+)
+def update_crossfilter_page(val_ranges, selected_category, hist_column, relayout_data, mins, maxs, ids, data_version):
+    dataset = get_dataset(data_version)
+    if not dataset: return go.Figure(), go.Figure()
+
+    # A slider left on its full extent does not filter (rows beyond the end of the distance slider included)
+    filters = {
+        slider_id['column']: tuple(val_range)
+        for val_range, slider_min, slider_max, slider_id in zip(val_ranges, mins, maxs, ids)
+        if val_range and list(val_range) != [slider_min, slider_max]
+    }
+    with stage("filter"):
+        rows = dataset.select_filters(filters, selected_category)
+    record_rows(len(rows))
+
+    zoom = map_zoom(relayout_data)
+    # A zoom/pan on the map only matters when the map is aggregated
+    zoomed = ctx.triggered_id == 'graph-crossfilter-map'
+    if zoomed and (zoom is None or len(rows) <= MAX_POINTS):
+        raise PreventUpdate
+    filter_key = tuple(sorted(filters.items()))
+
+    def build_map(rows):
+        with stage("filter"):
+            dff = dataset.take(rows, ['latitude', 'longitude', 'category', hist_column])
+        with stage("map"):
+            return scatter_map(dff, f"Locations ({len(rows)} observations)", hist_column, zoom=zoom)
+
+    bounds = viewport_bounds(relayout_data, len(rows), zoomed)
+    if bounds is not None:
+        # Pan/zoom of an aggregated map, or zoomed in to raw points: only the observations in view are sent
+        with stage("filter"):
+            visible = dataset.select_viewport(bounds, filters, selected_category)
+        fig_map = build_map(visible)
+    else:
+        # Raw points look the same at every zoom, aggregated cells depend on the zoom level
+        detail = zoom_level(zoom) if len(rows) > MAX_POINTS else None
+        fig_map = figure_cache.get_or_build(
+            ('crossfilter-map', dataset.version, filter_key, selected_category, hist_column, detail),
+            lambda: build_map(rows))
+    if zoomed:
+        return fig_map, no_update
+
+    def build_histogram():
+        with stage("histogram"):
+            # Same bars as the single-filter pages, counted over the rows left by every filter
+            val_range = filters.get(hist_column) or dataset.page_meta().bounds(hist_column)
+            edges, _ = dataset.histogram(hist_column, val_range)
+            values = np.asarray(dataset.column(hist_column)[rows], dtype=float)
+            codes = np.asarray(dataset.column('category').codes)[rows]
+            codes[np.isnan(values)] = -1
+            counts = {}
+            for code, category in enumerate(dataset.column('category').categories):
+                if category in dataset.page_meta().categories and selected_category in (None, category):
+                    category_counts = np.histogram(values[codes == code], bins=edges)[0]
+                    # Categories with no row left by the filters get no (empty) facet
+                    if category_counts.any():
+                        counts[category] = category_counts
+            fig_hist = histogram(edges, counts, hist_column, "Species Distribution (combined filters)", LABELS,
+                                 dataset.column('category').categories)
+            fig_hist.update_yaxes(matches=None, showticklabels=True)
+            fig_hist.update_xaxes(matches='x')
+            fig_hist.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font_color='black'
+            )
+            return fig_hist
+
+    fig_hist = figure_cache.get_or_build(
+        ('crossfilter-hist', dataset.version, filter_key, selected_category, hist_column), build_histogram)
+    return fig_map, fig_hist
@@ -1,19 +1,27 @@
-from dash import html, dcc, Output, Input, State, callback
-import plotly.express as px
-import pandas as pd
+from dash import html
 import math  # Nécessaire pour l'arrondi
 from src.components.slider import slider
-from src.components.scatter_map import scatter_map
-from src.components.histogram import histogram
+from src.utils.range_page import range_page_content, register_range_page
 
-def layout_depth(df):
-    real_max = df['bathymetry'].max()
-    real_min = df['bathymetry'].min()
+# Titles and labels, shared with the clientside callback (MAP_TITLE is formatted with the slider range)
+MAP_TITLE = "Distribution by species (Depth: {low}m to {high}m)"
+HIST_TITLE = "Species Distribution by Depth"
+LABELS = {'bathymetry': 'Depth (m)', 'count': 'Obs.'}
+
+
+def slider_settings(meta):
+    """:return: (min, max, step, marks step) of the depth slider"""
+    real_min, real_max = meta.bounds('bathymetry')
     step = 50
     slider_max = math.ceil(real_max / step) * step
     slider_min = math.floor(real_min / step) * step
     step_marks_depth = int(slider_max // 5)
     if step_marks_depth == 0: step_marks_depth = 1
+    return slider_min, slider_max, step, step_marks_depth
+
+
+def layout_depth(meta):
+    slider_min, slider_max, step, step_marks_depth = slider_settings(meta)
 
     return html.Div([
         html.H2("Analysis by Depth"),
@@ -23,36 +31,9 @@ def layout_depth(df):
             html.Label("Filter by depth (meters) :"),
             slider(slider_min, slider_max, "m", step, step_marks_depth, "depth-slider")
         ], style={'padding': '20px'}),
-        dcc.Loading(
-            id="loading-depth",
-            type="circle",
-            color="#007bff",
-            children= html.Div([
-                dcc.Graph(id='graph-depth-map', style={'width': '48%', 'display': 'inline-block'}),
-                dcc.Graph(id='graph-depth-hist', style={'width': '48%', 'display': 'inline-block', 'float': 'right'})
-            ])
-        )
+        *range_page_content('depth', 'bathymetry', MAP_TITLE, HIST_TITLE, LABELS)
     ])
 
 
-@callback(
-    Output('graph-depth-map', 'figure'),
-    Output('graph-depth-hist', 'figure'),
-    Input('depth-slider', 'value'),
-    State('main-data-store', 'data')
-)
-def update_depth_page(val_range, stored_data):
-    if not stored_data: return px.scatter(), px.histogram()
-    dff = pd.DataFrame(stored_data)
-
-    dff = dff[(dff['bathymetry'] >= val_range[0]) & (dff['bathymetry'] <= val_range[1])]
-    fig_map = scatter_map(dff, f"Distribution by species (Depth: {val_range[0]}m to {val_range[1]}m)", 'bathymetry')
-    fig_hist = histogram(dff, "bathymetry","Species Distribution by Depth", {'bathymetry': 'Depth (m)', 'count': 'Obs.'})
-    fig_hist.update_yaxes(matches=None, showticklabels=True)
-    fig_hist.update_xaxes(matches='x')
-    fig_hist.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_color='black'
-    )
-    return fig_map, fig_hist
\ No newline at end of file
+# Slider, map and histogram callbacks (src/utils/range_page.py)
+update_depth_page, refine_depth_map = register_range_page('depth', 'bathymetry', 'depth', MAP_TITLE, HIST_TITLE, LABELS)
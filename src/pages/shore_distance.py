@@ -1,60 +1,39 @@
-from dash import html, dcc, Output, Input, State, callback
-import plotly.express as px
-import pandas as pd
+from dash import html
 from src.components.slider import slider
-from src.components.scatter_map import scatter_map
-from src.components.histogram import histogram
+from src.utils.range_page import range_page_content, register_range_page
 
-def layout_distance(df):
-    max_dist_val = df['shoredistance'].quantile(0.98)
+# Titles and labels, shared with the clientside callback (MAP_TITLE is formatted with the slider range)
+MAP_TITLE = "Locations (Distance: {low}m - {high}m)"
+HIST_TITLE = "Species Distribution by Distance"
+LABELS = {'shoredistance': 'Distance (m)', 'count': 'Obs.'}
+
+
+def slider_settings(meta):
+    """:return: (min, max, step, marks step) of the distance slider"""
+    max_dist_val = meta.quantile('shoredistance', 0.98)
     max_dist = int(max_dist_val)
     step = max_dist // 5
     if step == 0: step = 1
     magnitude = 10 ** (len(str(step)) - 1)
     clean_step = round(step / magnitude) * magnitude
     if clean_step == 0: clean_step = step
+    return 0, max_dist, clean_step / 10, int(clean_step)
+
+
+def layout_distance(meta):
+    min_dist, max_dist, step, step_marks = slider_settings(meta)
     return html.Div([
     html.H2("Analysis by Distance to Coast"),
     html.Label("Select Distance:"),
 
     html.Div([
         html.Label(f"Filter by distance (0 - {max_dist} meters):"),
-        slider(0, max_dist, "m", clean_step / 10, int(clean_step), "distance-slider")
+        slider(min_dist, max_dist, "m", step, step_marks, "distance-slider")
     ], style={'padding': '20px'}),
-    dcc.Loading(
-        id="loading-distance",
-        type="circle",
-        color="#007bff",
-        children=html.Div([
-        dcc.Graph(id='graph-distance-map', style={'width': '48%', 'display': 'inline-block'}),
-        dcc.Graph(id='graph-distance-hist', style={'width': '48%', 'display': 'inline-block', 'float': 'right'})
-        ])
-    )
+    *range_page_content('distance', 'shoredistance', MAP_TITLE, HIST_TITLE, LABELS)
 ])
 
 
-@callback(
-    Output('graph-distance-map', 'figure'),
-    Output('graph-distance-hist', 'figure'),
-    Input('distance-slider', 'value'),
-    State('main-data-store', 'data')
-)
-def update_dist_page(val_range, stored_data):
-    if not stored_data: return px.scatter(), px.scatter()
-    dff = pd.DataFrame(stored_data)
-    if not val_range:
-        min_dist, max_dist = 0, dff['shoredistance'].max()
-    else:
-        min_dist, max_dist = val_range
-
-    dff = dff[(dff['shoredistance'] >= val_range[0]) & (dff['shoredistance'] <= val_range[1])]
-    fig_map = scatter_map(dff, f"Locations (Distance: {min_dist}m - {max_dist}m)", 'shoredistance')
-    fig_hist = histogram(dff, "shoredistance","Species Distribution by Distance", {'shoredistance': 'Distance (m)', 'count': 'Obs.'})
-    fig_hist.update_yaxes(matches=None, showticklabels=True)
-    fig_hist.update_xaxes(matches='x')
-    fig_hist.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',  # Fond du graphique transparent
-        paper_bgcolor='rgba(0,0,0,0)',  # Fond du papier transparent
-        font_color='black'  # (Optionnel) assure que le texte reste lisible
-    )
-    return fig_map, fig_hist
\ No newline at end of file
+# Slider, map and histogram callbacks (src/utils/range_page.py)
+update_distance_page, refine_distance_map = register_range_page('distance', 'shoredistance', 'distance',
+                                                                MAP_TITLE, HIST_TITLE, LABELS)
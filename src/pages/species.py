@@ -1,18 +1,44 @@
-from dash import html, dcc, Output, Input, State, callback
-import plotly.express as px
+from dash import html, dcc, Output, Input, State, callback, clientside_callback, ClientsideFunction, ctx, no_update
+from dash.exceptions import PreventUpdate
 import pandas as pd
-from src.components.model_viewer import model_viewer
-from config import SPECIES_INFO
+import plotly.graph_objects as go
+from src.components.model_viewer import model_viewer, model_url, likely_next, preload_links
+from src.components.slider import slider
+from src.components.scatter_map import scatter_map, map_zoom, viewport_bounds, zoom_level, MAX_POINTS
+from src.utils.data_store import get_dataset
+from src.utils.figure_cache import figure_cache
+from src.utils.metrics import stage, record_rows
+from src.utils.time_cube import MONTHS
+from src.utils.taxonomy import taxonomy
 
-def layout_species(df):
+def slider_settings(meta):
+    """:return: (min, max, step, marks step) of the year slider"""
+    first_year, last_year = meta.year_bounds
+    step_marks = max(1, round((last_year - first_year) / 25) * 5)
+    return first_year, last_year, 1, step_marks
+
+
+def layout_species(meta):
+    first_year, last_year, step, step_marks = slider_settings(meta)
     return html.Div([
         html.H2("Analysis by Species"),
         html.Label("Select Species to Analyze:"),
         dcc.Dropdown(
-            options=[{'label': i, 'value': i} for i in df['category'].unique()],
-            value=df['category'].unique()[0],
+            options=[{'label': i, 'value': i} for i in meta.categories],
+            value=meta.default_category,
             id='species-selection'
         ),
+        html.Div([
+            html.Label("Filter by year:"),
+            slider(first_year, last_year, "", step, step_marks, "species-year-slider"),
+            dcc.RadioItems(
+                options=[{'label': 'Trend by year', 'value': 'yearly'},
+                         {'label': 'Seasonality (month of the year)', 'value': 'seasonal'}],
+                value='yearly',
+                inline=True,
+                id='species-time-view'
+            )
+        ], style={'padding': '20px'}),
         dcc.Loading(
             id="loading-species",
             type="circle",
@@ -23,14 +49,17 @@ def layout_species(df):
             html.Div([
                 html.Div(
                     id='model-viewer-container',
-                    children=[model_viewer(f"/assets/{df['category'].unique()[0].lower().replace(' ', '_')}.glb")],
+                    children=[model_viewer(model_url(meta.default_category))],
                     style={'flex': '1', 'padding': '10px'}  # flex: 1 prend 50% de l'espace
                 ),
+                # Model shown by the viewer, and <link rel="prefetch"> of the models likely picked next
+                dcc.Store(id='model-src', data=model_url(meta.default_category)),
+                html.Div(id='model-prefetch', children=preload_links(likely_next(meta.categories, meta.default_category))),
                 html.Div([
                     html.H3("Description", style={'marginTop': '0'}),
                     html.Div(
                         id='species-description',
-                        children=SPECIES_INFO.get(df['category'].unique()[0], "Description non disponible."),
+                        children=taxonomy().description(meta.default_category),
                         style={'fontSize': '1.1em', 'lineHeight': '1.6', 'textAlign': 'justify'}
                     )
                 ], style={'flex': '1', 'padding': '20px', 'backgroundColor': '#f8f9fa', 'borderRadius': '10px'})
@@ -44,58 +73,106 @@ def layout_species(df):
 @callback(
     Output('graph-histogram', 'figure'),
     Output('graph-map', 'figure'),
-    Output('model-viewer-container', 'children'),
+    Output('model-src', 'data'),
+    Output('model-prefetch', 'children'),
     Output('species-description', 'children'),
     Input('species-selection', 'value'),
+    Input('species-year-slider', 'value'),
+    Input('species-time-view', 'value'),
+    Input('graph-map', 'relayoutData'),
     State('main-data-store', 'data')
 )
-def update_species_page(selected_category, stored_data):
-    if not stored_data: return px.scatter(), px.scatter(), ""
-
-    dff = pd.DataFrame(stored_data)
-    dff = dff[dff['category'] == selected_category]
-    dff = dff.dropna(subset=['year'])
-    dff['year'] = dff['year'].astype(int)
-
-    dff_counts = dff.groupby('year').size().reset_index(name='counts')
-    dff_counts = dff_counts.sort_values('year')
-
-    print(f"Selected: {selected_category} | Rows found: {len(dff)}")
-
-    if dff.empty:
-        return px.scatter(title="Pas de données"), px.scatter_map(title="Pas de données"), ""
-
-    fig_hist = px.bar(
-        dff_counts,
-        x=dff_counts['year'].astype(str),
-        y='counts',
-        color='year',
-        title=f"Observations: {selected_category}",
-        color_continuous_scale='Blues'
-    )
-
-    fig_hist.update_traces(
-        marker_line_width=0,
-        opacity=1
-    )
-
-    fig_hist.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        bargap=0.1,
-        yaxis_title="Nombre d'observations",
-        xaxis_title=None,
-        coloraxis_showscale=False,
-        xaxis={'type': 'category'}
-    )
-    fig_map = px.scatter_map(
-        dff,
-        lat="latitude",
-        lon="longitude",
-        map_style="open-street-map",
-        zoom=1,
-        title=f"Locations: {selected_category}"
-    )
-    new_model = model_viewer(f"/assets/{selected_category.lower().replace("%20", "_").replace(" ", "_")}.glb")
-    description_text = SPECIES_INFO.get(selected_category, "Description non disponible.")
-    return fig_hist, fig_map, new_model, description_text
\ No newline at end of file
+def update_species_page(selected_category, year_range, time_view, relayout_data, data_version):
+    dataset = get_dataset(data_version)
+    if not dataset: return go.Figure(), go.Figure(), None, [], ""
+
+    year_range = tuple(year_range or dataset.page_meta().year_bounds)
+    time_view = time_view or 'yearly'
+    with stage("filter"):
+        rows = dataset.select_range('year', year_range, selected_category)
+    record_rows(len(rows))
+    zoom = map_zoom(relayout_data)
+    # A zoom/pan on the map only matters when the map is aggregated
+    zoomed = ctx.triggered_id == 'graph-map'
+    if zoomed and (zoom is None or len(rows) <= MAX_POINTS):
+        raise PreventUpdate
+
+    if not len(rows):
+        return go.Figure(layout={'title': "Pas de données"}), go.Figure(layout={'title': "Pas de données"}), no_update, no_update, ""
+
+    def build_map(rows):
+        with stage("filter"):
+            dff = dataset.take(rows, ['latitude', 'longitude', 'category', 'year'])
+        with stage("map"):
+            fig_map = scatter_map(dff, f"Locations: {selected_category}", zoom=zoom)
+            fig_map.update_layout(showlegend=False)
+        return fig_map
+
+    bounds = viewport_bounds(relayout_data, len(rows), zoomed)
+    if bounds is not None:
+        # Pan/zoom of an aggregated map, or zoomed in to raw points: only the observations in view are sent
+        with stage("filter"):
+            visible = dataset.select_viewport(bounds, {'year': year_range}, selected_category)
+        fig_map = build_map(visible)
+    else:
+        # Raw points look the same at every zoom, aggregated cells depend on the zoom level
+        detail = zoom_level(zoom) if len(rows) > MAX_POINTS else None
+        fig_map = figure_cache.get_or_build(
+            ('species-map', dataset.version, selected_category, year_range, detail), lambda: build_map(rows))
+    if zoomed:
+        return no_update, fig_map, no_update, no_update, no_update
+
+    def build_histogram():
+        import plotly.express as px  # imported on first use, like in scatter_map
+        with stage("histogram"):
+            # Counts read from the (category, year, month) cube, not from the rows
+            if time_view == 'seasonal':
+                counts = dataset.time_cube.seasonal(selected_category, year_range)
+                dff_counts = pd.DataFrame({'period': MONTHS, 'counts': counts})
+                color = 'counts'
+            else:
+                years, counts = dataset.time_cube.yearly(selected_category, year_range)
+                dff_counts = pd.DataFrame({'period': years.astype(str), 'year': years, 'counts': counts})
+                dff_counts = dff_counts[dff_counts['counts'] > 0]
+                color = 'year'
+
+            fig_hist = px.bar(
+                dff_counts,
+                x='period',
+                y='counts',
+                color=color,
+                title=f"Observations: {selected_category}",
+                color_continuous_scale='Blues'
+            )
+
+            fig_hist.update_traces(
+                marker_line_width=0,
+                opacity=1
+            )
+
+            fig_hist.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                bargap=0.1,
+                yaxis_title="Nombre d'observations",
+                xaxis_title=None,
+                coloraxis_showscale=False,
+                xaxis={'type': 'category'}
+            )
+        return fig_hist
+
+    fig_hist = figure_cache.get_or_build(
+        ('species-hist', dataset.version, selected_category, year_range, time_view), build_histogram)
+    if ctx.triggered_id in ('species-year-slider', 'species-time-view'):
+        return fig_hist, fig_map, no_update, no_update, no_update
+    prefetch = preload_links(likely_next(dataset.page_meta().categories, selected_category))
+    description_text = taxonomy().description(selected_category)
+    return fig_hist, fig_map, model_url(selected_category), prefetch, description_text
+
+
+# Swaps the model of the viewer in place, without rebuilding it
+clientside_callback(
+    ClientsideFunction('models', 'swapModel'),
+    Output('model-viewer', 'title'),
+    Input('model-src', 'data')
+)
@@ -1,53 +1,35 @@
-from dash import html, dcc, Output, Input, State, callback
-import plotly.express as px
-import pandas as pd
+import math
+from dash import html
 from src.components.slider import slider
-from src.components.scatter_map import scatter_map
-from src.components.histogram import histogram
+from src.utils.range_page import range_page_content, register_range_page
 
-def layout_temperature(df):
-    min_temp = df['sst'].min()
-    max_temp = df['sst'].max()
+# Titles and labels, shared with the clientside callback (MAP_TITLE is formatted with the slider range)
+MAP_TITLE = "Locations (Temp: {low}°C - {high}°C)"
+HIST_TITLE = "Species Distribution by Temperature"
+LABELS = {'sst': 'Temperature (°C)', 'count': 'Obs.'}
+
+
+def slider_settings(meta):
+    """:return: (min, max, step, marks step) of the temperature slider"""
+    min_temp, max_temp = meta.bounds('sst')
+    # Whole degrees around the data: a slider at its full extent keeps every observation
+    return math.floor(min_temp), math.ceil(max_temp), 0.5, 5
+
+
+def layout_temperature(meta):
+    min_temp, max_temp, step, step_marks = slider_settings(meta)
     return html.Div([
     html.H2("Analysis by Water Temperature"),
     html.Label("Select Temperature Range (°C):"),
 
     html.Div([
         html.Label(f"Filter by temperature ({int(min_temp)}°C - {int(max_temp)}°C):"),
-        slider(int(min_temp), int(max_temp), "°C", 0.5, 5, "temp-slider")
+        slider(min_temp, max_temp, "°C", step, step_marks, "temp-slider")
     ], style={'padding': '20px'}),
-    dcc.Loading(
-        id="loading-temperature",
-        type="circle",
-        color="#007bff",
-        children=html.Div([
-        # Carte à gauche
-        dcc.Graph(id='graph-temp-map', style={'width': '48%', 'display': 'inline-block'}),
-        # Histogramme à droite
-        dcc.Graph(id='graph-temp-hist', style={'width': '48%', 'display': 'inline-block', 'float': 'right'})
-    ])
-    )
+    *range_page_content('temp', 'sst', MAP_TITLE, HIST_TITLE, LABELS)
 ])
 
 
-@callback(
-    Output('graph-temp-map', 'figure'),
-    Output('graph-temp-hist', 'figure'),
-    Input('temp-slider', 'value'),
-    State('main-data-store', 'data')
-)
-def update_temp_page(val_range, stored_data):
-    if not stored_data: return px.scatter(), px.scatter()
-
-    dff = pd.DataFrame(stored_data)
-    dff = dff[(dff['sst'] >= val_range[0]) & (dff['sst'] <= val_range[1])]
-    fig_map = scatter_map(dff, f"Locations (Temp: {val_range[0]}°C - {val_range[1]}°C)", 'sst')
-    fig_hist = histogram(dff, "sst", "Species Distribution by Temperature", {'sst': 'Temperature (°C)', 'count': 'Obs.'})
-    fig_hist.update_yaxes(matches=None, showticklabels=True)
-    fig_hist.update_xaxes(matches='x')
-    fig_hist.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',  # Fond du graphique transparent
-        paper_bgcolor='rgba(0,0,0,0)',  # Fond du papier transparent
-        font_color='black'  # (Optionnel) assure que le texte reste lisible
-    )
-    return fig_map, fig_hist
\ No newline at end of file
+# Slider, map and histogram callbacks (src/utils/range_page.py)
+update_temperature_page, refine_temperature_map = register_range_page('temp', 'sst', 'temperature',
+                                                                      MAP_TITLE, HIST_TITLE, LABELS)
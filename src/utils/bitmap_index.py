@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Buckets per column: a range costs two bitmap operations plus at most two partial buckets of rows
+N_BUCKETS = 64
+# Per-dimension range bitmaps kept, so that moving one slider reuses the bitmaps of the other ones
+CACHE_SIZE = 128
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _set_bits(bitmap, rows):
+    np.bitwise_or.at(bitmap, rows >> 3, (128 >> (rows & 7)).astype(np.uint8))
+
+
+class ColumnBitmaps:
+    """
+    Bitmaps of one column over equal-count buckets of its sorted index. `cumulative[b]` holds every row
+    below the b-th bucket boundary, so the rows of any span of whole buckets are `cumulative[j] & ~cumulative[i]`,
+    and only the rows of the two partial buckets at the ends of a range are set one by one.
+    """
+
+    def __init__(self, index, n_rows, n_buckets=N_BUCKETS):
+        self.index = index
+        self.n_rows = n_rows
+        self.positions = np.unique(np.linspace(0, len(index), n_buckets + 1).astype(np.intp))
+        self.cumulative = np.zeros((len(self.positions), (n_rows + 7) // 8), dtype=np.uint8)
+        mask = np.zeros(n_rows, dtype=bool)
+        for b in range(1, len(self.positions)):
+            mask[index.order[self.positions[b - 1]:self.positions[b]]] = True
+            self.cumulative[b] = np.packbits(mask)
+
+    def bitmap(self, low, high):
+        """Packed bitmap of the rows whose value lies in [low, high]."""
+        order = self.index.order
+        _, start, stop = self.index.bounds(low, high)
+        i = np.searchsorted(self.positions, start, side='left')  # first boundary inside the range
+        j = np.searchsorted(self.positions, stop, side='right') - 1  # last boundary inside the range
+        if i < j:
+            bitmap = self.cumulative[j] & ~self.cumulative[i]
+            _set_bits(bitmap, order[start:self.positions[i]])
+            _set_bits(bitmap, order[self.positions[j]:stop])
+        else:
+            bitmap = np.zeros(self.cumulative.shape[1], dtype=np.uint8)
+            _set_bits(bitmap, order[start:stop])
+        return bitmap
+
+
+class BitmapIndex:
+    """
+    Cross-filter engine: a conjunction of ranges on several columns (and optionally one category) resolves
+    to the AND of one packed bitmap per dimension. Column bitmaps are built on the first query of the column.
+    """
+
+    def __init__(self, n_rows, category=None, n_buckets=N_BUCKETS):
+        self.n_rows = n_rows
+        self.n_buckets = n_buckets
+        self.columns = {}
+        self.categories = {}
+        if category is not None:
+            codes = np.asarray(category.codes)
+            for code, name in enumerate(category.categories):
+                self.categories[name] = np.packbits(codes == code)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_column(self, name, index):
+        """:param index: `SortedColumnIndex` of the column"""
+        self.columns[name] = ColumnBitmaps(index, self.n_rows, self.n_buckets)
+
+    def range_bitmap(self, column, val_range):
+        key = (column, float(val_range[0]), float(val_range[1]))
+        with self._lock:
+            bitmap = self._cache.get(key)
+            if bitmap is not None:
+                self._cache.move_to_end(key)
+                return bitmap
+        bitmap = self.columns[column].bitmap(val_range[0], val_range[1])
+        with self._lock:
+            self._cache[key] = bitmap
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return bitmap
+
+    def category_bitmap(self, category):
+        bitmap = self.categories.get(category)
+        return bitmap if bitmap is not None else np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def query(self, filters, category=None):
+        """
+        :param filters: Dictionary {column: [low, high]} (bounds included)
+        :param category: Category to keep (None = every category)
+        :return: Packed bitmap of the rows matching every filter
+        """
+        bitmaps = [self.range_bitmap(column, val_range) for column, val_range in filters.items()]
+        if category is not None:
+            bitmaps.append(self.category_bitmap(category))
+        if not bitmaps:
+            return np.packbits(np.ones(self.n_rows, dtype=bool))
+        result = bitmaps[0].copy()
+        for bitmap in bitmaps[1:]:
+            result &= bitmap
+        return result
+
+    def rows(self, bitmap):
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    @staticmethod
+    def count(bitmap):
+        return int(POPCOUNT[bitmap].sum(dtype=np.int64))
@@ -1,46 +1,73 @@
+import numpy as np
 import pandas as pd
 
+from src.utils.taxonomy import taxonomy
+
+COLS_TO_KEEP = [
+    'scientificName', 'vernacularName',
+    'decimalLatitude', 'decimalLongitude',
+    'eventDate', 'year', 'month',
+    'basisOfRecord', 'datasetName',
+    'sst', 'sss', 'bathymetry', 'shoredistance',
+    'id'
+]
+
+RENAME_MAP = {
+    'decimalLatitude': 'latitude',
+    'decimalLongitude': 'longitude',
+    'lat': 'latitude',
+    'lng': 'longitude'
+}
+
+NUMERIC_COLUMNS = ['year', 'month', 'sst', 'sss', 'bathymetry', 'shoredistance']
+
+
+def to_numeric(values):
+    """`pd.to_numeric` that parses each distinct text value only once (OBIS sends `year`/`month` as text)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.Series(values).astype(float).to_numpy()
+    codes, uniques = pd.factorize(values)
+    parsed = np.append(pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float), np.nan)
+    return parsed[codes]
+
+
+def categorize_species(df):
+    """
+    Species category of each raw occurrence, from its taxon ids (see `TaxonomyRegistry.categorize`).
+    :return: Categorical of the species categories (NaN for the other taxa)
+    """
+    return taxonomy().categorize(df)
+
+
 def clean_data(df):
-    cols_to_keep = [
-        'scientificName', 'vernacularName',
-        'decimalLatitude', 'decimalLongitude',
-        'eventDate', 'year', 'month',
-        'basisOfRecord', 'datasetName',
-        'sst', 'sss', 'bathymetry', 'shoredistance',
-        'id'
-    ]
-
-    df_clean = df[[col for col in cols_to_keep if col in df.columns]].copy()
-
-    def categorize_species(name):
-        name = str(name).lower()
-        if 'megaptera' in name: return 'Humpback Whale'
-        if 'orcinus' in name: return 'Orca'
-        if 'delphinus' in name: return 'Dolphin'
-        if 'balaenoptera' in name: return 'Blue Whale'
-        return 'Other'
-
-    df_clean['category'] = df_clean['scientificName'].apply(categorize_species)
-    df_clean = df_clean[df_clean['category'] != 'Other']
-    df_clean['eventDate'] = pd.to_datetime(df_clean['eventDate'], errors='coerce')
-
-    rename_map = {
-        'decimalLatitude': 'latitude',
-        'decimalLongitude': 'longitude',
-        'lat': 'latitude',
-        'lng': 'longitude'
-    }
-    df_clean = df_clean.rename(columns=rename_map)
-
-    if 'location' in df_clean.columns and 'latitude' not in df_clean.columns:
-        df_clean[['latitude', 'longitude']] = df_clean['location'].str.split(',', expand=True).astype(float)
-
-    if 'latitude' in df_clean.columns:
-        df_clean['latitude'] = pd.to_numeric(df_clean['latitude'], errors='coerce')
-    if 'longitude' in df_clean.columns:
-        df_clean['longitude'] = pd.to_numeric(df_clean['longitude'], errors='coerce')
-
-    df_clean = df_clean.dropna(subset=['latitude', 'longitude'])
+    categories = categorize_species(df)
+    latitude_col = 'decimalLatitude' if 'decimalLatitude' in df.columns else 'lat'
+    longitude_col = 'decimalLongitude' if 'decimalLongitude' in df.columns else 'lng'
+    latitude = to_numeric(df[latitude_col])
+    longitude = to_numeric(df[longitude_col])
+
+    # Single filtering pass: known species with a position
+    keep = (np.asarray(categories.codes) >= 0) & ~np.isnan(latitude) & ~np.isnan(longitude)
+
+    data = {}
+    for col in COLS_TO_KEEP:
+        if col not in df.columns:
+            continue
+        name = RENAME_MAP.get(col, col)
+        if name == 'latitude':
+            data[name] = latitude[keep]
+        elif name == 'longitude':
+            data[name] = longitude[keep]
+        elif name in NUMERIC_COLUMNS:
+            data[name] = to_numeric(df[col])[keep]
+        else:
+            data[name] = df[col].array[keep]
+    data['category'] = categories[keep]
+    df_clean = pd.DataFrame(data)
+
+    if 'eventDate' in df_clean.columns:
+        df_clean['eventDate'] = pd.to_datetime(df_clean['eventDate'], errors='coerce', utc=True,
+                                               format='ISO8601').dt.tz_localize(None)
 
     if 'bathymetry' in df_clean.columns:
         df_clean['bathymetry'] = df_clean['bathymetry'].abs()
@@ -48,4 +75,16 @@ def clean_data(df):
     if 'shoredistance' in df_clean.columns:
         df_clean['shoredistance'] = df_clean['shoredistance'].abs()
 
-    return df_clean
\ No newline at end of file
+    return df_clean
+
+
+def clean_data_chunks(chunks):
+    """
+    Streaming mode: cleans raw occurrences chunk by chunk (e.g. one OBIS page at a time), so that the raw
+    pull never has to fit in memory at once.
+    :param chunks: Iterable of raw DataFrames
+    :return: Generator of cleaned DataFrames
+    """
+    for chunk in chunks:
+        if len(chunk) and 'scientificName' in chunk.columns:
+            yield clean_data(chunk)
@@ -0,0 +1,96 @@
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from dash import callback
+from flask import Response, abort
+
+from config import CLIENTSIDE_FILTERING
+from src.components.scatter_map import COLORS, DEFAULT_ZOOM, DETAIL_ZOOM, MAX_POINTS
+from src.utils.data_store import get_dataset
+from src.utils.range_index import RANGE_COLUMNS
+from src.utils.taxonomy import group_categories
+
+# Columns sent to the browser in clientside mode: the position plus every slider column, as float32
+CLIENT_COLUMNS = ['latitude', 'longitude'] + RANGE_COLUMNS
+# Encoded datasets kept in memory (the current version and the previous one)
+MAX_BLOBS = 2
+
+_blobs = OrderedDict()
+_lock = threading.Lock()
+
+
+def encode_dataset(dataset):
+    """
+    Compact binary copy of the columns the range pages filter on, read by `assets/clientside.js`:
+    a little-endian uint32 header length, a JSON header ({n_rows, categories, columns: [{name, dtype, offset}]}),
+    then the arrays (float32 columns, int16 category codes, -1 = no category), each aligned on 4 bytes.
+    """
+    arrays = [(name, np.asarray(dataset.columns[name], dtype='<f4'))
+              for name in CLIENT_COLUMNS if name in dataset.columns]
+    # Same "Other" grouping as the server figures
+    category = group_categories(dataset.columns['category'])
+    arrays.append(('category', np.asarray(category.codes, dtype='<i2')))
+
+    columns, offset = [], 0
+    for name, array in arrays:
+        columns.append({'name': name, 'dtype': array.dtype.name, 'offset': offset})
+        offset += -(-array.nbytes // 4) * 4
+    header = json.dumps({'version': dataset.version, 'n_rows': len(dataset),
+                         'categories': [str(name) for name in category.categories], 'columns': columns}).encode()
+    header += b' ' * (-len(header) % 4)
+
+    blob = bytearray(4 + len(header) + offset)
+    blob[:4] = np.uint32(len(header)).tobytes()
+    blob[4:4 + len(header)] = header
+    for entry, (_, array) in zip(columns, arrays):
+        start = 4 + len(header) + entry['offset']
+        blob[start:start + array.nbytes] = array.tobytes()
+    return bytes(blob)
+
+
+def dataset_blob(version):
+    """:return: The encoded dataset `version` (None if the version is unknown), encoded once per version"""
+    with _lock:
+        if version in _blobs:
+            return _blobs[version]
+    dataset = get_dataset(version)
+    if dataset is None or dataset.version != version:
+        return None
+    blob = encode_dataset(dataset)
+    with _lock:
+        _blobs[version] = blob
+        while len(_blobs) > MAX_BLOBS:
+            _blobs.popitem(last=False)
+    return blob
+
+
+def page_settings(column, map_title, hist_title, labels):
+    """
+    Settings of a range page for its clientside callback (stored in the page layout).
+    :param map_title: Map title, with `{low}` and `{high}` for the slider range
+    """
+    return {'column': column, 'map_title': map_title, 'hist_title': hist_title, 'labels': labels,
+            'max_points': MAX_POINTS, 'detail_zoom': DETAIL_ZOOM, 'default_zoom': DEFAULT_ZOOM, 'colors': COLORS}
+
+
+def server_callback(*args, **kwargs):
+    """`dash.callback`, left out in clientside mode: the range pages are then updated by `assets/clientside.js`."""
+    if CLIENTSIDE_FILTERING:
+        return lambda function: function
+    return callback(*args, **kwargs)
+
+
+def init_client_data(app):
+    """Adds the route serving the encoded dataset, `<prefix>data/<version>/columns.bin`."""
+    server = app.server
+
+    @server.route(f"{app.config.routes_pathname_prefix}data/<version>/columns.bin")
+    def _columns(version):
+        blob = dataset_blob(version)
+        if blob is None:
+            abort(404)
+        # The URL holds the version: the content never changes, browsers can keep it
+        return Response(blob, mimetype="application/octet-stream",
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
@@ -0,0 +1,125 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.dtypes import CATEGORICAL_COLUMNS, FLOAT32_COLUMNS, INT16_COLUMNS, UUID_COLUMNS, compact_int, \
+    encode_uuids, uuid_bytes
+
+# On-disk layout: one `.npy` file per column plus `schema.json`. Files are opened memory-mapped,
+# so every worker process shares the same page-cache copy instead of parsing its own.
+SCHEMA_FILE = "schema.json"
+DATETIME_COLUMNS = ['eventDate']
+
+
+def _codes_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode(name, series):
+    """:return: (array written to disk, schema entry of the column)"""
+    if name in DATETIME_COLUMNS or pd.api.types.is_datetime64_any_dtype(series):
+        values = pd.to_datetime(series, errors='coerce', utc=True, format='mixed').dt.tz_localize(None)
+        return values.to_numpy(dtype='datetime64[ns]'), {'kind': 'datetime'}
+
+    if name in CATEGORICAL_COLUMNS or isinstance(series.dtype, pd.CategoricalDtype):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categorical = series.array
+        else:
+            # Categories keep their order of appearance (it drives the color order of the figures)
+            categorical = pd.Categorical(series, categories=pd.unique(series.dropna()))
+        categories = [str(category) for category in categorical.categories]
+        codes = np.asarray(categorical.codes).astype(_codes_dtype(len(categories)))
+        return codes, {'kind': 'categorical', 'categories': categories}
+
+    if name in UUID_COLUMNS:
+        uuids = encode_uuids(series)
+        if uuids is not None:
+            return uuid_bytes(uuids), {'kind': 'uuid'}
+
+    if name in INT16_COLUMNS:
+        return compact_int(series), {'kind': 'numeric'}
+
+    if name in FLOAT32_COLUMNS:
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan), {'kind': 'numeric'}
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(), {'kind': 'numeric'}
+
+    # Free text (e.g. ids that are not UUIDs): fixed-width UTF-8 bytes, decoded when loaded
+    encoded = series.fillna('').astype(str).str.encode('utf-8')
+    width = max(1, int(encoded.str.len().max() or 1))
+    return encoded.to_numpy(dtype=f'S{width}'), {'kind': 'text'}
+
+
+def save_columnar(df, directory, version=None):
+    """
+    Writes `df` as typed, memory-mappable columns. The folder is replaced atomically.
+    :param version: Dataset version stored with the data (so that loading does not have to hash it again)
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    schema = {'n_rows': len(df), 'version': version, 'columns': []}
+    for i, name in enumerate(df.columns):
+        array, entry = _encode(name, df[name])
+        entry.update({'name': str(name), 'file': f"{i:03d}.npy", 'dtype': str(array.dtype)})
+        np.save(tmp_dir / entry['file'], array)
+        schema['columns'].append(entry)
+    with open(tmp_dir / SCHEMA_FILE, "w", encoding="utf-8") as file:
+        json.dump(schema, file)
+
+    old_dir = directory.with_name(directory.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if directory.exists():
+        directory.rename(old_dir)
+    tmp_dir.rename(directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def open_columnar(directory, columns=None):
+    """
+    :param columns: Columns to open (None = every column)
+    :return: (schema, {name: (memory-mapped array, schema entry)}), nothing decoded yet (see `decode_column`)
+    """
+    directory = Path(directory)
+    with open(directory / SCHEMA_FILE, encoding="utf-8") as file:
+        schema = json.load(file)
+    arrays = {entry['name']: (np.load(directory / entry['file'], mmap_mode='r'), entry)
+              for entry in schema['columns'] if columns is None or entry['name'] in columns}
+    return schema, arrays
+
+
+def decode_column(array, entry):
+    """
+    Values of a stored column (or of some of its rows): categories and text decoded, UUIDs kept as 16 bytes
+    (UUID_DTYPE, see `decode_uuids` for their strings).
+    """
+    if entry['kind'] == 'categorical':
+        return pd.Categorical.from_codes(array, categories=entry['categories'])
+    if entry['kind'] == 'uuid':
+        return uuid_bytes(array)
+    if entry['kind'] == 'text':
+        return np.char.decode(array, 'utf-8')
+    return array
+
+
+def load_columnar(directory, columns=None):
+    """
+    :param columns: Columns to load (None = every column)
+    :return: DataFrame backed by memory-mapped arrays, its version in `df.attrs['data_version']`
+    """
+    schema, arrays = open_columnar(directory, columns)
+    data = {name: decode_column(array, entry) for name, (array, entry) in arrays.items()}
+
+    df = pd.DataFrame(data, copy=False)
+    if schema.get('version'):
+        df.attrs['data_version'] = schema['version']
+    return df
@@ -0,0 +1,195 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.utils.bitmap_index import BitmapIndex
+from src.utils.histogram_cube import HistogramCube, build_histogram_cubes
+from src.utils.page_meta import PageMeta
+from src.utils.range_index import RANGE_COLUMNS, SortedColumnIndex, build_range_indexes
+from src.utils.spatial_index import GridIndex
+from src.utils.taxonomy import order_by_count
+from src.utils.time_cube import TimeCube
+
+# Number of dataset versions kept in memory (the current one plus the previous
+# one, so that browsers still holding an old token keep working during a refresh).
+MAX_VERSIONS = 2
+
+_lock = threading.Lock()
+_datasets = {}
+_current_version = None
+
+
+class ColumnarDataset:
+    """
+    Column-oriented, read-only copy of the cleaned observations.
+    Numeric columns are kept as typed NumPy arrays and text columns as pandas Categoricals,
+    so callbacks can filter on arrays and only materialize the rows they plot.
+    """
+
+    def __init__(self, df, version):
+        self.version = version
+        self.n_rows = len(df)
+        self.columns = {}
+        for name in df.columns:
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self.columns[name] = series.array
+            elif series.dtype.kind == 'S':
+                # Fixed-width bytes (UUID ids): kept as the raw array, one value per row
+                self.columns[name] = series.to_numpy()
+            elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                # Categories keep their order of appearance so that colors stay stable across filters
+                self.columns[name] = pd.Categorical(series, categories=pd.unique(series.dropna()))
+            else:
+                self.columns[name] = series.to_numpy()
+        if 'category' in self.columns:
+            # With many taxa, the most observed categories come first: the figures group the others (`group_categories`)
+            self.columns['category'] = order_by_count(self.columns['category'])
+        self.range_indexes = build_range_indexes(self.columns, self.columns.get('category'))
+        self.histogram_cubes = build_histogram_cubes(self.columns, RANGE_COLUMNS, self.range_indexes)
+        # Counts by (category, year, month): reused as is when the loader kept the incrementally updated cube
+        self.time_cube = df.attrs.get('time_cube')
+        if self.time_cube is None and 'year' in self.columns and 'category' in self.columns:
+            self.time_cube = TimeCube.from_columns(self.columns['year'], self.columns.get('month'),
+                                                   self.columns['category'])
+        self._page_meta = None
+        self._bitmap_index = None
+        self._spatial_index = None
+
+    def __len__(self):
+        return self.n_rows
+
+    def column(self, name):
+        return self.columns[name]
+
+    def range_index(self, column):
+        """Sorted index of `column`, built on first use for columns registered after loading."""
+        index = self.range_indexes.get(column)
+        if index is None:
+            index = SortedColumnIndex(self.columns[column], self.columns.get('category'))
+            self.range_indexes[column] = index
+        return index
+
+    def select_range(self, column, val_range, category=None):
+        """Indices of the rows whose `column` value lies within `val_range` (bounds included), in value order."""
+        return self.range_index(column).query(val_range[0], val_range[1], category)
+
+    def count_range(self, column, val_range, category=None):
+        return self.range_index(column).count(val_range[0], val_range[1], category)
+
+    def histogram(self, column, val_range, nbins=20):
+        """Per-category bin counts of `column` within `val_range`, read from the precomputed cube."""
+        cube = self.histogram_cubes.get(column)
+        if cube is None:
+            cube = HistogramCube(self.columns[column], self.columns['category'], index=self.range_index(column))
+            self.histogram_cubes[column] = cube
+        return cube.query(val_range[0], val_range[1], nbins)
+
+    def page_meta(self):
+        """Bounds, quantiles and categories read by the page layouts, computed once per dataset version."""
+        if self._page_meta is None:
+            self._page_meta = PageMeta(self)
+        return self._page_meta
+
+    def bitmap_index(self):
+        """Cross-filter bitmaps, built on first use (only the combined-filter page needs them)."""
+        if self._bitmap_index is None:
+            self._bitmap_index = BitmapIndex(self.n_rows, self.columns.get('category'))
+        return self._bitmap_index
+
+    def select_filters(self, filters, category=None):
+        """
+        Rows matching every range of `filters` ({column: [low, high]}) and `category`, in row order.
+        Each dimension is one cached bitmap: changing one range only rebuilds the bitmap of that column.
+        """
+        index = self.bitmap_index()
+        for column in filters:
+            if column not in index.columns:
+                index.add_column(column, self.range_index(column))
+        return index.rows(index.query(filters, category))
+
+    def spatial_index(self):
+        """Grid index of the positions, built on the first viewport query."""
+        if self._spatial_index is None:
+            self._spatial_index = GridIndex(self.columns['latitude'], self.columns['longitude'])
+        return self._spatial_index
+
+    def select_viewport(self, bounds, filters=None, category=None):
+        """
+        Rows inside the map viewport that also match `filters` ({column: [low, high]}) and `category`.
+        The filters are only evaluated on the rows in view.
+        :param bounds: (south, north, west, east) as returned by `map_bounds`
+        """
+        rows = self.spatial_index().query(*bounds)
+        keep = np.ones(len(rows), dtype=bool)
+        for column, (low, high) in (filters or {}).items():
+            values = self.columns[column][rows]
+            keep &= (values >= low) & (values <= high)
+        if category is not None:
+            categories = self.columns['category']
+            code = categories.categories.get_loc(category) if category in categories.categories else -2
+            keep &= np.asarray(categories.codes)[rows] == code
+        return rows[keep]
+
+    def select_category(self, category):
+        return np.flatnonzero(self.columns['category'] == category)
+
+    def take(self, rows=None, columns=None):
+        """
+        :param rows: Row indices to extract (None = every row)
+        :param columns: Column names to extract (None = every column)
+        :return: DataFrame holding only the requested rows and columns
+        """
+        names = columns if columns is not None else list(self.columns)
+        if rows is None:
+            return pd.DataFrame({name: self.columns[name] for name in names})
+        return pd.DataFrame({name: self.columns[name][rows] for name in names})
+
+
+def dataset_version(df):
+    """Stable content hash of a DataFrame, identical in every process that loads the same data."""
+    digest = hashlib.sha1(",".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def register_dataset(df):
+    """
+    Registers a DataFrame as the current dataset and returns its version token.
+    The token is what the browser keeps in `main-data-store`. A version already computed when the data
+    was cached (`df.attrs['data_version']`) is reused instead of hashing every row again.
+    """
+    global _current_version
+    version = df.attrs.get('data_version') or dataset_version(df)
+    with _lock:
+        if version not in _datasets:
+            _datasets[version] = ColumnarDataset(df, version)
+        _current_version = version
+        for old_version in list(_datasets)[:-MAX_VERSIONS]:
+            if old_version != _current_version:
+                del _datasets[old_version]
+    return version
+
+
+def get_dataset(version=None):
+    """
+    Returns the dataset registered under `version`, or the current one when the token is unknown
+    (e.g. a browser tab opened before a data refresh). Returns None if nothing is registered yet.
+    """
+    with _lock:
+        dataset = _datasets.get(version)
+        if dataset is None and _current_version is not None:
+            dataset = _datasets[_current_version]
+    return dataset
+
+
+def registered_versions():
+    """Versions of the datasets this process holds (the current one and the previous ones still served)."""
+    with _lock:
+        return list(_datasets)
+
+
+def current_version():
+    return _current_version
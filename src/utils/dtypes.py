@@ -0,0 +1,113 @@
+import binascii
+
+import numpy as np
+import pandas as pd
+
+# Compact in-memory schema of the cleaned data (the columnar store on disk uses the same types)
+CATEGORICAL_COLUMNS = ['category', 'scientificName', 'vernacularName', 'basisOfRecord', 'datasetName']
+FLOAT32_COLUMNS = ['sst', 'sss', 'bathymetry', 'shoredistance']
+INT16_COLUMNS = ['year', 'month']
+UUID_COLUMNS = ['id']
+# UUIDs are kept as their 16 bytes (not as 36-character strings), decoded only for the export
+UUID_DTYPE = np.dtype('S16')
+# Columns read by the pages: the others (names, dates, ids) are only needed to refresh or export the data
+PAGE_COLUMNS = ['category', 'latitude', 'longitude', 'year', 'month', 'sst', 'sss', 'bathymetry', 'shoredistance']
+
+UUID_PATTERN = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+
+
+def compact_int(values, missing=None):
+    """
+    :param missing: Value given to the missing entries (e.g. 0 for an unknown month), None to keep them
+    :return: int16 array, or float32 when some values are missing or not whole (float32 is exact for years)
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    if missing is not None:
+        values = np.where(np.isnan(values), missing, values)
+    info = np.iinfo(np.int16)
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.all(finite == np.round(finite)) \
+            and (not len(finite) or (finite.min() >= info.min and finite.max() <= info.max)):
+        return values.astype(np.int16)
+    return values.astype(np.float32)
+
+
+def encode_uuids(values):
+    """
+    :return: UUID_DTYPE array of the 128-bit UUIDs (returned as is if already encoded), or None if some values
+             are not UUIDs
+    """
+    if isinstance(values, (pd.Series, np.ndarray)) and values.dtype == UUID_DTYPE:
+        return np.asarray(values)
+    values = pd.Series(values, dtype=object)
+    if values.isna().any() or not values.astype(str).str.fullmatch(UUID_PATTERN).all():
+        return None
+    return np.frombuffer(bytes.fromhex("".join(values.str.replace("-", "", regex=False))), dtype=UUID_DTYPE)
+
+
+def uuid_bytes(array):
+    """:return: (n, 16) uint8 view of encoded UUIDs (the on-disk layout), or the UUID_DTYPE view of such an array"""
+    array = np.ascontiguousarray(array)
+    if array.dtype == UUID_DTYPE:
+        return array.view(np.uint8).reshape(-1, 16)
+    return array.view(UUID_DTYPE).reshape(-1)
+
+
+def decode_uuids(array):
+    """:return: Object array of the UUID strings of encoded UUIDs (UUID_DTYPE, or (n, 16) uint8)"""
+    raw = uuid_bytes(array) if np.asarray(array).dtype == UUID_DTYPE else np.ascontiguousarray(array)
+    # Hex digits of every id at once, then the dashes of the 8-4-4-4-12 groups
+    digits = np.frombuffer(binascii.hexlify(raw.tobytes()), dtype=np.uint8).reshape(-1, 32)
+    text = np.full((len(digits), 36), ord('-'), dtype=np.uint8)
+    for start, end, shift in ((0, 8, 0), (8, 12, 1), (12, 16, 2), (16, 20, 3), (20, 32, 4)):
+        text[:, start + shift:end + shift] = digits[:, start:end]
+    return text.view('S36').reshape(-1).astype('U36').astype(object)
+
+
+def comparable_ids(*columns):
+    """
+    Ids of several columns in one form, so that they can be compared or merged: encoded UUIDs when every
+    column holds UUIDs, strings otherwise.
+    """
+    encoded = [encode_uuids(column) for column in columns]
+    if all(column is not None for column in encoded):
+        return encoded
+    return [decode_uuids(uuids) if uuids is not None else pd.Series(column, dtype=object).astype(str).to_numpy()
+            for column, uuids in zip(columns, encoded)]
+
+
+def optimize_dtypes(df, keep_all=False, report=True):
+    """
+    Converts a cleaned DataFrame to the compact schema: categoricals for the repeated strings, float32 for
+    the environment measures, int16 for the year and month (an unknown month becomes 0, as in the time cube),
+    16 bytes per UUID id.
+    :param keep_all: Keeps the columns no page reads (needed to refresh or export the data)
+    :param report: Prints the memory used before and after
+    """
+    before = df.memory_usage(deep=True).sum()
+    data = {}
+    for name in df.columns:
+        if not keep_all and name not in PAGE_COLUMNS:
+            continue
+        series = df[name]
+        if name in CATEGORICAL_COLUMNS and not isinstance(series.dtype, pd.CategoricalDtype):
+            # Categories keep their order of appearance (it drives the color order of the figures)
+            data[name] = pd.Categorical(series, categories=pd.unique(series.dropna()))
+        elif name in FLOAT32_COLUMNS and series.dtype != np.float32:
+            data[name] = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+        elif name in INT16_COLUMNS and series.dtype != np.int16:
+            data[name] = compact_int(series, missing=0 if name == 'month' else None)
+        elif name in UUID_COLUMNS and series.dtype != UUID_DTYPE:
+            uuids = encode_uuids(series)
+            data[name] = series if uuids is None else uuids
+        else:
+            data[name] = series
+    optimized = pd.DataFrame(data, copy=False)
+    optimized.attrs = dict(df.attrs)
+
+    if report:
+        after = optimized.memory_usage(deep=True).sum()
+        dropped = len(df.columns) - len(optimized.columns)
+        print(f"🗜️ Memory: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB"
+              + (f" ({dropped} unused columns dropped)" if dropped else ""))
+    return optimized
@@ -0,0 +1,194 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import ENRICH_GRIDS_DIR, ENRICH_MODE, ENRICH_METHOD, ENRICH_CELL_DEGREES
+
+# Columns that a local grid can fill, in data/grids/<column>.npy (+ <column>.json)
+ENRICH_COLUMNS = ['sst', 'sss', 'bathymetry', 'shoredistance']
+# Sampled cells kept per grid between two enrichments (the cache is emptied beyond)
+MAX_CACHED_CELLS = 5_000_000
+
+
+class Grid:
+    """
+    Regular latitude/longitude grid of one column, memory-mapped: only the pages around the sampled points are read.
+    `<column>.npy` holds (n_lat, n_lon) values, or (12, n_lat, n_lon) for a monthly climatology, in the units of the
+    cleaned data (°C, PSU, positive depths and distances in metres), NaN where there is no value (land...).
+    `<column>.json` gives the centre of the first cell and the steps: {"lat_min", "lon_min", "lat_step", "lon_step"}.
+    """
+
+    def __init__(self, values, lat_min, lon_min, lat_step, lon_step):
+        self.values = values
+        self.lat_min, self.lon_min = lat_min, lon_min
+        self.lat_step, self.lon_step = lat_step, lon_step
+        self.monthly = values.ndim == 3
+        self.n_lat, self.n_lon = values.shape[-2:]
+        # Global grid: the longitudes wrap around (the cell after the last one is the first one)
+        self.wraps = abs(self.n_lon * lon_step - 360) < lon_step / 2
+        self._flat = values.reshape(-1)
+        # Sampled cells, one cache per method: {method: (cell keys, values)}
+        self._caches = {}
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path.with_suffix(".json"), encoding="utf-8") as file:
+            meta = json.load(file)
+        values = np.load(path, mmap_mode='r')
+        if values.ndim not in (2, 3) or (values.ndim == 3 and values.shape[0] != 12):
+            raise ValueError(f"{path.name}: expected (n_lat, n_lon) or (12, n_lat, n_lon) values, got {values.shape}")
+        return cls(values, *(float(meta[key]) for key in ('lat_min', 'lon_min', 'lat_step', 'lon_step')))
+
+    def _read(self, iy, ix, layer):
+        """Values at integer grid positions, NaN outside the grid."""
+        iy, ix = iy.astype(np.intp), ix.astype(np.intp)
+        if self.wraps:
+            ix = ix % self.n_lon
+        inside = (iy >= 0) & (iy < self.n_lat) & (ix >= 0) & (ix < self.n_lon)
+        flat = iy[inside] * self.n_lon + ix[inside]
+        if layer is not None:
+            flat += layer[inside] * (self.n_lat * self.n_lon)
+        values = np.full(len(iy), np.nan)
+        values[inside] = self._flat[flat]
+        return values
+
+    def _sample(self, lat, lon, layer, method):
+        y = (lat - self.lat_min) / self.lat_step
+        x = (lon - self.lon_min) / self.lon_step
+        if method == 'nearest':
+            corners = [(np.rint(y), np.rint(x), 1.0)]
+        else:
+            y0, x0 = np.floor(y), np.floor(x)
+            fy, fx = y - y0, x - x0
+            corners = [(y0, x0, (1 - fy) * (1 - fx)), (y0, x0 + 1, (1 - fy) * fx),
+                       (y0 + 1, x0, fy * (1 - fx)), (y0 + 1, x0 + 1, fy * fx)]
+
+        # Corners without value (land for the SST, outside the grid) are left out and the others reweighted,
+        # so that a coastal observation still gets the value of the nearby sea
+        total, weights = np.zeros(len(lat)), np.zeros(len(lat))
+        for iy, ix, weight in corners:
+            values = self._read(iy, ix, layer)
+            valid = ~np.isnan(values)
+            total += np.where(valid, values * weight, 0)
+            weights += np.where(valid, weight, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weights > 0, total / weights, np.nan)
+
+    def sample(self, lat, lon, month=None, method=ENRICH_METHOD):
+        """
+        Vectorized lookup of the grid at each point ("nearest" cell or "bilinear" interpolation of the 4 around).
+        :param month: Month of each point (1-12) for a monthly grid; an unknown month (0, NaN) gets the annual mean
+        :return: float array, NaN where the grid has no value
+        """
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        if not self.monthly:
+            return self._sample(lat, lon, None, method)
+
+        month = np.zeros(len(lat), dtype=int) if month is None else np.nan_to_num(np.asarray(month, dtype=float)).astype(int)
+        known = (month >= 1) & (month <= 12)
+        result = np.full(len(lat), np.nan)
+        result[known] = self._sample(lat[known], lon[known], month[known] - 1, method)
+
+        unknown = np.flatnonzero(~known)
+        if len(unknown):
+            months = np.stack([self._sample(lat[unknown], lon[unknown], np.full(len(unknown), m), method)
+                               for m in range(12)])
+            counts = (~np.isnan(months)).sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[unknown] = np.where(counts > 0, np.nansum(months, axis=0) / counts, np.nan)
+        return result
+
+    def sample_cells(self, lat, lon, month=None, method=ENRICH_METHOD, cell=ENRICH_CELL_DEGREES):
+        """
+        `sample` through a cache of (lat, lon, month) cells of `cell` degrees: each distinct cell is sampled once,
+        at its centre, and kept for the next calls (refresh, fallback reload). Observations are often repeated
+        at the same stations, so there are far fewer cells than points. Each method has its own cache.
+        Every point of a cell gets the value at the cell centre: with "bilinear", the position within the cell
+        is not interpolated (`cell` is far below the grid step, e.g. 0.01° for a 0.25° climatology).
+        :return: (values of the points, number of cells sampled in this call)
+        """
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        n_y, n_x = int(np.ceil(180 / cell)) + 1, int(np.ceil(360 / cell)) + 1
+        iy = np.floor((np.clip(lat, -90, 90) + 90) / cell).astype(np.int64)
+        ix = np.floor(np.mod(lon + 180, 360) / cell).astype(np.int64)
+        if self.monthly and month is not None:
+            layer = np.nan_to_num(np.asarray(month, dtype=float)).astype(np.int64)
+            layer = np.where((layer >= 1) & (layer <= 12), layer, 0)
+        else:
+            layer = np.zeros(len(lat), dtype=np.int64)
+        # Points with no position get a key of their own and no value
+        missing = np.isnan(lat) | np.isnan(lon)
+        keys = np.where(missing, -1, (layer * n_y + iy) * n_x + ix)
+
+        codes, cells = pd.factorize(keys)
+        cells = np.asarray(cells)
+        cache_keys, cache_values = self._caches.get(method, (pd.Index([], dtype='int64'), np.empty(0)))
+        positions = cache_keys.get_indexer(cells)
+        values = np.full(len(cells), np.nan)
+        values[positions >= 0] = cache_values[positions[positions >= 0]]
+
+        new = np.flatnonzero((positions < 0) & (cells >= 0))
+        if len(new):
+            new_keys = cells[new]
+            new_ix, rest = new_keys % n_x, new_keys // n_x
+            new_iy, new_layer = rest % n_y, rest // n_y
+            values[new] = self.sample((new_iy + 0.5) * cell - 90, (new_ix + 0.5) * cell - 180,
+                                      new_layer if self.monthly else None, method)
+            if len(cache_keys) + len(new) > MAX_CACHED_CELLS:
+                cache_keys, cache_values = pd.Index([], dtype='int64'), np.empty(0)
+            self._caches[method] = (cache_keys.append(pd.Index(new_keys)),
+                                    np.concatenate([cache_values, values[new]]))
+        return values[codes], len(new)
+
+
+@lru_cache(maxsize=4)
+def load_grids(grids_dir=ENRICH_GRIDS_DIR):
+    """:return: {column: Grid} of the grids found in `grids_dir` (empty without grids: no enrichment)"""
+    grids = {}
+    for column in ENRICH_COLUMNS:
+        path = Path(grids_dir) / f"{column}.npy"
+        if not path.exists():
+            continue
+        try:
+            grids[column] = Grid.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Grid {path} ignored: {e}")
+    return grids
+
+
+def enrich(df, grids_dir=ENRICH_GRIDS_DIR, mode=ENRICH_MODE, method=ENRICH_METHOD):
+    """
+    Environmental values of the cleaned observations sampled from the local grids (`load_grids`), so that the rows
+    OBIS left without sst/sss/depth/distance still show on their pages. Works offline; a no-op without grids.
+    :param mode: "fill" samples only the missing values, "override" replaces the OBIS values where the grid has one
+    :return: df, with the enriched columns replaced
+    """
+    grids = load_grids(str(grids_dir))
+    if not grids or not len(df) or not {'latitude', 'longitude'} <= set(df.columns):
+        return df
+
+    df = df.copy(deep=False)
+    latitude = df['latitude'].to_numpy(dtype=float)
+    longitude = df['longitude'].to_numpy(dtype=float)
+    month = df['month'].to_numpy(dtype=float) if 'month' in df.columns else None
+    report = []
+    for column, grid in grids.items():
+        current = df[column].to_numpy(dtype=float) if column in df.columns else np.full(len(df), np.nan)
+        rows = np.flatnonzero(np.isnan(current)) if mode == "fill" else np.arange(len(df))
+        if not len(rows):
+            continue
+        sampled, n_cells = grid.sample_cells(latitude[rows], longitude[rows],
+                                             None if month is None else month[rows], method)
+        values = current.copy()
+        found = ~np.isnan(sampled)
+        values[rows[found]] = sampled[found]
+        changed = int(np.sum(found & (sampled != current[rows])))
+        df[column] = values
+        report.append(f"{column} {changed:,} ({n_cells:,} cells)")
+    if report:
+        print(f"🌍 Enrichment ({mode}, {method}): " + ", ".join(report))
+    return df
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from flask import Response, abort, request, send_file
+
+from src.utils.columnar_cache import SCHEMA_FILE, decode_column, open_columnar
+from src.utils.data_store import get_dataset
+from src.utils.dtypes import UUID_DTYPE, decode_uuids
+from src.utils.load_data import CLEANED_STORE
+from src.utils.range_index import RANGE_COLUMNS
+
+# Media type of each export format (Arrow needs the optional `pyarrow` package)
+EXPORT_FORMATS = {
+    'csv': "text/csv",
+    'geojson': "application/geo+json",
+    'arrow': "application/vnd.apache.arrow.stream",
+}
+# Rows converted and sent at a time
+CHUNK_ROWS = 50_000
+# Completed exports, kept to answer the Range requests that resume an interrupted download
+EXPORT_DIR = Path("data/exports")
+MAX_EXPORT_FILES = 8
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2)
+def stored_columns(version):
+    """
+    :return: {name: (memory-mapped array, schema entry)} of the cleaned data store when it holds the data
+             `version` (the columns the pages do not load: ids, names, dates...), {} otherwise
+    """
+    if not (CLEANED_STORE / SCHEMA_FILE).exists():
+        return {}
+    schema, arrays = open_columnar(CLEANED_STORE)
+    return arrays if schema.get('version') == version else {}
+
+
+def _exported(array, entry):
+    """Stored values as written to the export: the ids as UUID strings."""
+    values = decode_column(array, entry)
+    return decode_uuids(values) if entry['kind'] == 'uuid' else values
+
+
+def _loaded(values):
+    """Getter of a column loaded in the dataset: the ids (kept as bytes) as UUID strings."""
+    if values.dtype == UUID_DTYPE:
+        return lambda rows: decode_uuids(values[rows])
+    return lambda rows: values[rows]
+
+
+def export_columns(dataset):
+    """
+    Columns that can be exported, in the order of the cleaned data: every column of the store (read from
+    the memory-mapped files, only for the exported rows), and the columns loaded for the pages.
+    :return: {name: function rows -> values}
+    """
+    getters = {}
+    for name, (array, entry) in stored_columns(dataset.version).items():
+        # Loaded columns are read from the dataset (same rows, categories in the order of the figures)
+        if name not in dataset.columns:
+            getters[name] = lambda rows, array=array, entry=entry: _exported(array[rows], entry)
+        else:
+            getters[name] = _loaded(dataset.columns[name])
+    for name, values in dataset.columns.items():
+        getters.setdefault(name, _loaded(values))
+    return getters
+
+
+def parse_export_args(args, dataset, available):
+    """
+    Filters of an export request, with the parameters of the pages: `category=Orca`, one `<column>=low,high`
+    per slider column (`bathymetry`, `shoredistance`, `sst`, `sss`) and `year=low,high`, optional `columns=a,b`.
+    :param available: Exportable columns (`export_columns`)
+    :return: (filters {column: (low, high)}, category or None, exported columns)
+    """
+    filters = {}
+    for column in RANGE_COLUMNS + ['year']:
+        if column not in args:
+            continue
+        try:
+            low, high = (float(value) for value in args[column].split(','))
+        except ValueError:
+            abort(400, f"{column} must be 'low,high'")
+        if column not in dataset.columns:
+            abort(400, f"unknown column {column}")
+        filters[column] = (low, high)
+
+    columns = list(available)
+    if args.get('columns'):
+        columns = args['columns'].split(',')
+        unknown = [name for name in columns if name not in available]
+        if unknown:
+            abort(400, f"unknown columns {', '.join(unknown)}")
+    return filters, args.get('category') or None, columns
+
+
+def export_key(version, fmt, filters, category, columns):
+    """Identifies one export: same key, same bytes (used as the ETag and as the name of the saved file)."""
+    text = json.dumps([version, fmt, sorted(filters.items()), category, columns])
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def take(getters, rows, columns):
+    return pd.DataFrame({name: getters[name](rows) for name in columns})
+
+
+def _chunks(getters, rows, columns):
+    for start in range(0, len(rows), CHUNK_ROWS):
+        yield take(getters, rows[start:start + CHUNK_ROWS], columns)
+
+
+def csv_chunks(getters, rows, columns):
+    yield ",".join(columns).encode() + b"\n"
+    for df in _chunks(getters, rows, columns):
+        yield df.to_csv(index=False, header=False).encode()
+
+
+def geojson_chunks(getters, rows, columns):
+    """FeatureCollection of points, the columns other than the position as properties."""
+    properties = [name for name in columns if name not in ('latitude', 'longitude')]
+    yield b'{"type": "FeatureCollection", "features": ['
+    first = True
+    for df in _chunks(getters, rows, ['longitude', 'latitude'] + properties):
+        for name in df.columns:
+            if df[name].dtype == np.float32:
+                # Through the shortest float32 text (12.3, not 12.300000190734863)
+                df[name] = df[name].to_numpy().astype(str).astype(float)
+        df = df.astype(object).where(df.notna(), None)
+        features = [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [record[0], record[1]]},
+             "properties": dict(zip(properties, record[2:]))}
+            for record in df.itertuples(index=False, name=None)
+        ]
+        if features:
+            text = ",".join(json.dumps(feature, default=str) for feature in features)
+            yield (text if first else "," + text).encode()
+            first = False
+    yield b"]}"
+
+
+class _Sink:
+    """File-like object collecting what the Arrow writer emits, drained after each batch."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def arrow_chunks(getters, rows, columns):
+    """Arrow IPC stream: the schema, then one record batch per chunk (categoricals as dictionaries)."""
+    import pyarrow as pa
+
+    sink = _Sink()
+    # Types read on the first row (an empty text column would have no type)
+    schema = pa.Schema.from_pandas(take(getters, rows[:1], columns), preserve_index=False)
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for df in _chunks(getters, rows, columns):
+            writer.write_batch(pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {'csv': csv_chunks, 'geojson': geojson_chunks, 'arrow': arrow_chunks}
+
+
+def _prune():
+    files = sorted(EXPORT_DIR.glob("*.export"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files[MAX_EXPORT_FILES:]:
+        path.unlink(missing_ok=True)
+
+
+def _spooled(chunks, path):
+    """
+    Yields the chunks while writing them to `path`: once the export is complete, the file answers the
+    Range requests. An interrupted download leaves no file.
+    """
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+        with _lock:
+            _prune()
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def init_export(app):
+    """
+    Adds the bulk export of the observations selected by the page filters, `<prefix>export/<format>`
+    (csv, geojson or arrow), e.g. `/export/csv?category=Orca&sst=10,20&year=2000,2020`.
+    Every column of the cleaned data can be exported (id, scientificName, vernacularName, eventDate, year,
+    month, basisOfRecord, datasetName, positions, environmental values, category), all of them by default;
+    only the page columns when the data does not come from the store (fallback CSV).
+    The rows are selected like on the Combined page (`dataset.select_filters`) and sent by chunks of
+    CHUNK_ROWS. A `Range` request (resumed download) is answered from the completed export file; before the
+    file is complete, the whole export is sent again (200).
+    """
+    server = app.server
+
+    @server.route(f"{app.config.routes_pathname_prefix}export/<fmt>")
+    def _export(fmt):
+        if fmt not in EXPORT_FORMATS:
+            abort(404)
+        if fmt == 'arrow':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                abort(501, "the arrow format needs the pyarrow package")
+        dataset = get_dataset(request.args.get('version'))
+        if dataset is None:
+            abort(503, "data is still loading")
+
+        getters = export_columns(dataset)
+        filters, category, columns = parse_export_args(request.args, dataset, getters)
+        if fmt == 'geojson' and not {'latitude', 'longitude'} <= set(getters):
+            abort(400, "the data has no positions")
+        key = export_key(dataset.version, fmt, filters, category, columns)
+        path = EXPORT_DIR / f"{key}.{fmt}.export"
+        download_name = f"whalife-{dataset.version}.{fmt}"
+
+        if path.exists():
+            return send_file(path.resolve(), mimetype=EXPORT_FORMATS[fmt], as_attachment=True,
+                             download_name=download_name, conditional=True, etag=key)
+
+        # Streamed whole (200, the Range is ignored) until the export file is complete: spooling a full export
+        # inside the request could outlast the worker timeout
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        rows = dataset.select_filters(filters, category)
+        response = Response(_spooled(WRITERS[fmt](getters, rows, columns), path), mimetype=EXPORT_FORMATS[fmt])
+        response.headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+        response.headers["Accept-Ranges"] = "bytes"
+        response.set_etag(key)
+        response.headers["X-Export-Rows"] = str(len(rows))
+        return response
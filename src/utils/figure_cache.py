@@ -0,0 +1,156 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from plotly.utils import PlotlyJSONEncoder
+
+from config import FIGURE_CACHE_SIZE, FIGURE_CACHE_DIR
+from src.utils.data_store import MAX_VERSIONS, registered_versions
+
+
+def snap_range(val_range, step, bounds=None):
+    """
+    Rounds slider values outward to the slider `step` (low bound down, high bound up), so that equivalent ranges
+    give the same cache key and the snapped range still holds every observation of the selected one.
+    :param bounds: (min, max) of the slider: the snapped range stops there, so a slider at its full extent
+                   keeps its exact bounds (and every observation)
+    """
+    if not step:
+        return tuple(val_range)
+    low = round(math.floor(val_range[0] / step + 1e-9) * step, 10)
+    high = round(math.ceil(val_range[1] / step - 1e-9) * step, 10)
+    if bounds is not None:
+        low, high = max(low, bounds[0]), min(high, bounds[1])
+    return low, high
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except OSError:  # already evicted by another worker
+        return 0
+
+
+class FigureCache:
+    """
+    Size-bounded LRU cache of figures, shared by every page callback of the process.
+    Keys start with the page name and the dataset version: a data refresh changes the version, so
+    figures of the previous data are never served again. Figures of a version are dropped (in memory and on
+    disk) once the dataset registry no longer holds it: during a refresh, workers serving the previous version
+    keep their figures.
+    With a `directory`, figures are also written as JSON files (one directory per version) that every
+    Gunicorn worker can read.
+    """
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE, directory=FIGURE_CACHE_DIR):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key[2:]).encode()).hexdigest()
+        return self.directory / str(key[1]) / f"{key[0]}-{digest}.json"
+
+    def _evict_versions(self, version):
+        """
+        Called on the first figure of a new dataset `version`: forgets the figures of the versions the registry
+        no longer holds. On disk, the most recently written other versions (MAX_VERSIONS in all) stay as well,
+        since other workers may still serve them (each worker registers the data it loaded).
+        """
+        held = set(registered_versions()) | {version}
+        self._versions = held
+        for key in [key for key in self._entries if key[1] not in held]:
+            del self._entries[key]
+        if self.directory and self.directory.exists():
+            version_dirs = sorted((path for path in self.directory.iterdir() if path.name != str(version)),
+                                  key=_mtime, reverse=True)
+            for version_dir in version_dirs[MAX_VERSIONS - 1:]:
+                if version_dir.name not in map(str, held):
+                    shutil.rmtree(version_dir, ignore_errors=True)
+
+    def get(self, key):
+        with self._lock:
+            if key[1] not in self._versions:
+                self._evict_versions(key[1])
+            figure = self._entries.get(key)
+            if figure is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return figure
+
+        figure = self._read(key)
+        with self._lock:
+            if figure is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, figure)
+        return figure
+
+    def set(self, key, figure):
+        # Stored as plain JSON-compatible dicts: Dash sends them as they are, and they can go to disk
+        figure = json.loads(json.dumps(figure, cls=PlotlyJSONEncoder))
+        with self._lock:
+            if key[1] not in self._versions:
+                self._evict_versions(key[1])
+            self._store(key, figure)
+        self._write(key, figure)
+        return figure
+
+    def get_or_build(self, key, build):
+        figure = self.get(key)
+        if figure is None:
+            figure = self.set(key, build())
+        return figure
+
+    def _store(self, key, figure):
+        self._entries[key] = figure
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as file:
+                figure = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return figure
+
+    def _write(self, key, figure):
+        if not self.directory:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(figure, file)
+        os.replace(tmp_path, path)
+
+        # LRU on disk: the least recently read files (oldest mtime) go first
+        files = sorted(path.parent.glob("*.json"), key=_mtime)
+        for old_path in files[:-self.max_entries]:
+            old_path.unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions = set()
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+figure_cache = FigureCache()
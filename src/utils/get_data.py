@@ -1,24 +1,145 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Can point to a local stub server replaying recorded pages (see scripts/obis_stub_server.py)
+OBIS_API_URL = os.environ.get("OBIS_API_URL", "https://api.obis.org/v3")
+PAGE_SIZE = 5000
+COMPLETE_MARKER = "complete"
+
 
-def get_data(taxon_id: int, size: int = 300):
+def get_data(taxon_id: int, size: int = 300, after: str = None, session: requests.Session = None,
+             filters: dict = None):
     """
     :param taxon_id: Entier correspondant au taxonID OBIS (exemple : https://obis.org/taxon/137092)
     :param size: Nombre de résultats à renvoyer
+    :param after: Identifiant de la dernière occurrence déjà reçue (pagination)
+    :param session: Session HTTP à réutiliser (une requête isolée sinon)
+    :param filters: Paramètres de filtrage supplémentaires de l'API (exemple : {"startdate": "2024-01-01"})
     :return: Données JSON de l’API OBIS ou None en cas d’erreur
     """
 
-    base_url = "https://api.obis.org/v3/occurrence"
+    base_url = f"{OBIS_API_URL}/occurrence"
 
     params = {
         "taxonid": taxon_id,
         "size": size
     }
+    if after:
+        params["after"] = after
+    if filters:
+        params.update(filters)
 
     try:
-        response = requests.get(base_url, params=params)
+        response = (session or requests).get(base_url, params=params, timeout=60)
         response.raise_for_status()
     except requests.RequestException as err:
         print(f"Erreur lors de la requête API OBIS : {err}")
         return None
 
-    return response.json()
\ No newline at end of file
+    return response.json()
+
+
+def make_session(retries: int = 5, backoff: float = 1.0, pool_size: int = 8):
+    """
+    :param retries: Nombre de nouvelles tentatives par requête (erreurs réseau, 429 et 5xx)
+    :param backoff: Facteur d'attente exponentielle entre deux tentatives, en secondes
+    :param pool_size: Nombre de connexions gardées ouvertes vers l'API
+    :return: Session HTTP partagée par tous les téléchargements
+    """
+    retry = Retry(
+        total=retries,
+        connect=min(retries, 2),  # no network at all: fail fast and fall back to local data
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _write_json(path: Path, data):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+def page_files(taxon_dir: Path):
+    return sorted(taxon_dir.glob("page_*.json"))
+
+
+def iter_records(taxon_dir: Path):
+    """Renvoie, page par page, les occurrences déjà enregistrées pour un taxon."""
+    for page in page_files(taxon_dir):
+        with open(page, encoding="utf-8") as file:
+            yield json.load(file)["results"]
+
+
+def fetch_taxon(session: requests.Session, taxon_id: int, taxon_dir: Path, page_size: int = PAGE_SIZE,
+                max_records: int = None, filters: dict = None):
+    """
+    Parcourt l'endpoint `occurrence` d'OBIS avec le curseur `after` et enregistre chaque page dans
+    `taxon_dir/page_XXXXX.json`. Un téléchargement interrompu reprend après la dernière page sur le disque.
+    :param max_records: Nombre maximal d'occurrences (None = toutes les occurrences)
+    :return: Nombre d'occurrences enregistrées pour ce taxon
+    """
+    taxon_dir.mkdir(parents=True, exist_ok=True)
+    cursor_file = taxon_dir / "cursor.json"
+    cursor = {"taxon_id": taxon_id, "after": None, "pages": 0, "fetched": 0}
+    if cursor_file.exists():
+        with open(cursor_file, encoding="utf-8") as file:
+            cursor = json.load(file)
+    if (taxon_dir / COMPLETE_MARKER).exists():
+        return cursor["fetched"]
+
+    while max_records is None or cursor["fetched"] < max_records:
+        size = page_size if max_records is None else min(page_size, max_records - cursor["fetched"])
+        data = get_data(taxon_id, size, after=cursor["after"], session=session, filters=filters)
+        if data is None:
+            raise RuntimeError(f"OBIS page {cursor['pages'] + 1} of taxon {taxon_id} could not be fetched")
+
+        records = data.get("results", [])
+        if records:
+            # The page is written before the cursor: a crash in between only refetches that page
+            _write_json(taxon_dir / f"page_{cursor['pages'] + 1:05d}.json", data)
+            cursor["pages"] += 1
+            cursor["fetched"] += len(records)
+            cursor["after"] = records[-1]["id"]
+            _write_json(cursor_file, cursor)
+        if len(records) < size:
+            (taxon_dir / COMPLETE_MARKER).touch()
+            break
+
+    return cursor["fetched"]
+
+
+def fetch_all(taxon_config: dict, raw_dir: Path, max_records: int = None, page_size: int = PAGE_SIZE,
+              workers: int = 4, filters: dict = None):
+    """
+    Télécharge plusieurs taxons en parallèle sur une même session HTTP.
+    :param taxon_config: Dictionnaire {nom de l'espèce: taxonID}
+    :param raw_dir: Dossier des pages brutes, un sous-dossier par espèce
+    :param filters: Dictionnaire {nom de l'espèce: paramètres de filtrage de l'API}
+    :return: Dictionnaire {nom de l'espèce: dossier des pages}
+    """
+    session = make_session(pool_size=workers)
+    taxon_dirs = {species: Path(raw_dir) / species for species in taxon_config}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            species: executor.submit(fetch_taxon, session, taxon_id, taxon_dirs[species], page_size, max_records,
+                                     (filters or {}).get(species))
+            for species, taxon_id in taxon_config.items()
+        }
+        for species, future in futures.items():
+            print(f"📥 {species}: {future.result()} occurrences")
+    return taxon_dirs
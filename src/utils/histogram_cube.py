@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+
+from src.utils.range_index import SortedColumnIndex
+
+# Number of fine bins precomputed per column; slider ranges are resolved at this resolution.
+FINE_BINS = 4000
+
+
+def nice_width(raw_width):
+    """Rounds a bin width up to 1, 2 or 5 times a power of ten."""
+    if raw_width <= 0 or not math.isfinite(raw_width):
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(raw_width))
+    for factor in (1, 2, 5, 10):
+        if factor * magnitude >= raw_width:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+class HistogramCube:
+    """
+    Per-category cumulative counts of one numeric column over fine, evenly spaced bins.
+    The counts of any [low, high] range, regrouped into about `nbins` bars, are differences
+    of the prefix sums: the cost depends on the number of bins, not on the number of rows.
+    The ends of the range and the long tail beyond the fine bins are counted exactly from the sorted
+    values of each category (`SortedColumnIndex`), one `searchsorted` per category and edge.
+    """
+
+    def __init__(self, values, categories, fine_bins=FINE_BINS, index=None):
+        values = np.asarray(values, dtype=float)
+        codes = np.asarray(categories.codes)
+        valid = ~np.isnan(values) & (codes >= 0)
+        self.categories = list(categories.categories)
+        self.index = index if index is not None else SortedColumnIndex(values, categories)
+
+        if valid.any():
+            self.low, self.high = values[valid].min(), values[valid].max()
+            # The fine bins cover the bulk of the distribution, the long tail is read from the sorted values
+            span_high = np.quantile(values[valid], 0.99)
+            if span_high <= self.low:
+                span_high = self.high
+        else:
+            self.low, self.high, span_high = 0.0, 1.0, 1.0
+        self.width = nice_width((span_high - self.low) / fine_bins)
+        self.origin = math.floor(self.low / self.width) * self.width
+        self.n_bins = max(1, math.ceil((span_high - self.origin) / self.width) + 1)
+
+        bins = np.floor((values[valid] - self.origin) / self.width).astype(np.intp)
+        in_span = bins < self.n_bins
+        flat = codes[valid][in_span].astype(np.intp) * self.n_bins + bins[in_span]
+        counts = np.bincount(flat, minlength=len(self.categories) * self.n_bins)
+        counts = counts.reshape(len(self.categories), self.n_bins)
+        self.cumulative = np.zeros((len(self.categories), self.n_bins + 1), dtype=np.int64)
+        np.cumsum(counts, axis=1, out=self.cumulative[:, 1:])
+
+    def _below(self, x, side='left'):
+        """Per-category number of values < x (<= x with side='right'), from the sorted values."""
+        empty = (None, np.array([]))
+        return np.array([np.searchsorted(self.index.partitions.get(category, empty)[1], x, side=side)
+                         for category in self.categories], dtype=np.int64)
+
+    def _cumulative_at(self, x):
+        """Per-category number of values < x: a column of the prefix sums when x is a fine bin edge."""
+        b = round((x - self.origin) / self.width)
+        if 0 <= b <= self.n_bins and math.isclose(self.origin + b * self.width, x, abs_tol=self.width * 1e-9):
+            return self.cumulative[:, b]
+        return self._below(x)
+
+    def query(self, low, high, nbins=20):
+        """
+        :param low: Lower bound of the slider range
+        :param high: Upper bound of the slider range
+        :param nbins: Approximate number of bars
+        :return: (edges, {category: counts}) for the categories with at least one observation.
+                 The first and last edges are the range bounds (within the data), the last bar includes `high`.
+        """
+        low, high = max(low, self.low), min(high, self.high)
+        if high < low:
+            return np.array([low]), {}
+
+        bar_width = max(1, round(nice_width((high - low) / nbins) / self.width)) * self.width
+        # Inner edges on multiples of the bar width, so that they stay round numbers (and fine bin edges)
+        first, last = math.floor(low / bar_width) + 1, math.ceil(high / bar_width)
+        inner = [k * bar_width for k in range(first, last) if low < k * bar_width < high]
+        # Partial bars at the ends of the range are merged into their neighbour
+        if inner and 2 * (high - inner[-1]) < bar_width:
+            inner.pop()
+        if inner and 2 * (inner[0] - low) < bar_width:
+            inner.pop(0)
+
+        edges = np.array([low] + inner + [high], dtype=float)
+        below = np.column_stack([self._below(low)] + [self._cumulative_at(x) for x in inner]
+                                + [self._below(high, side='right')])
+        counts = np.diff(below, axis=1)
+        return edges, {
+            category: counts[code]
+            for code, category in enumerate(self.categories)
+            if counts[code].any()
+        }
+
+
+def build_histogram_cubes(columns, column_names, range_indexes=None):
+    """
+    Builds a `HistogramCube` for every numeric column of `column_names` present in `columns`.
+    :param range_indexes: {column: SortedColumnIndex} already built, shared with the cubes
+    """
+    categories = columns.get('category')
+    if categories is None:
+        return {}
+    return {
+        name: HistogramCube(columns[name], categories, index=(range_indexes or {}).get(name))
+        for name in column_names
+        if name in columns and np.asarray(columns[name]).dtype.kind in 'iuf'
+    }
@@ -0,0 +1,161 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import MAX_RECORDS_PER_TAXON, OBIS_PAGE_SIZE, OBIS_WORKERS, EXPORT_CSV
+from src.utils.clean_data import clean_data, clean_data_chunks
+from src.utils.columnar_cache import load_columnar, save_columnar
+from src.utils.data_store import dataset_version
+from src.utils.dtypes import PAGE_COLUMNS, UUID_COLUMNS, UUID_DTYPE, comparable_ids, decode_uuids, optimize_dtypes
+from src.utils.enrichment import enrich
+from src.utils.get_data import fetch_all, iter_records
+from src.utils.taxonomy import taxonomy
+from src.utils.time_cube import TimeCube
+
+# Typed, memory-mapped copy of the cleaned data (what the app reads)
+CLEANED_STORE = Path("data/cleaned/cleaned_data")
+# CSV export of the same data, never read back except to migrate an existing install
+CLEANED_FILE = Path("data/cleaned/cleaned_data.csv")
+# Counts by (category, year, month) of the cleaned data, updated in place by the incremental refresh
+TIME_CUBE_FILE = Path("data/cleaned/time_cube.npz")
+RAW_DIR = Path("data/raw")
+FALLBACK_CSV = Path("data/fallback_data.csv")
+
+
+def save_cleaned(df, time_cube=None):
+    """:param time_cube: Up-to-date `TimeCube` of `df` (counted from `df` when None)"""
+    version = dataset_version(df)
+    save_columnar(df, CLEANED_STORE, version)
+    if time_cube is None and 'year' in df.columns:
+        time_cube = TimeCube.from_columns(df['year'], df['month'] if 'month' in df.columns else None,
+                                          pd.Categorical(df['category']))
+    if time_cube is not None:
+        time_cube.save(TIME_CUBE_FILE, version)
+    if EXPORT_CSV:
+        # Ids written as UUID strings, as the CSV had them
+        uuids = {name: decode_uuids(df[name]) for name in UUID_COLUMNS
+                 if name in df.columns and df[name].dtype == UUID_DTYPE}
+        df.assign(**uuids).to_csv(CLEANED_FILE, index=False)
+
+
+def load_store(all_columns=False):
+    """
+    :param all_columns: Also loads the columns no page reads (ids, names, dates)
+    :return: The cleaned data, memory-mapped, with its saved time cube in `df.attrs['time_cube']`
+    """
+    df = load_columnar(CLEANED_STORE, None if all_columns else PAGE_COLUMNS)
+    time_cube = TimeCube.load(TIME_CUBE_FILE, df.attrs.get('data_version'))
+    if time_cube is not None:
+        df.attrs['time_cube'] = time_cube
+    return df
+
+
+def load_data(all_columns=False):
+    """
+    :param all_columns: Keeps the columns no page reads (what the refresh needs to rewrite the cleaned data)
+    :return: The cleaned data, in the compact types of `dtypes.py`
+    """
+    if CLEANED_STORE.exists():
+        print("✅ Loading clean data from disk...")
+        return load_store(all_columns)
+
+    if CLEANED_FILE.exists():
+        print("🔁 Converting the cleaned CSV to the binary cache...")
+        df_csv = optimize_dtypes(pd.read_csv(CLEANED_FILE, low_memory=False), keep_all=True)
+        save_columnar(df_csv, CLEANED_STORE, dataset_version(df_csv))
+        TIME_CUBE_FILE.unlink(missing_ok=True)
+        return load_store(all_columns)
+
+    try:
+        print("🌐 Clean data not found. Attempting to fetch from API...")
+        RAW_DIR.mkdir(parents=True, exist_ok=True)
+        CLEANED_FILE.parent.mkdir(parents=True, exist_ok=True)
+        cleaned_chunks = []
+
+        # Pages are checkpointed in data/raw/<species>/, an interrupted download resumes on the next start
+        taxon_dirs = fetch_all(taxonomy().fetch_config(), RAW_DIR, MAX_RECORDS_PER_TAXON, OBIS_PAGE_SIZE, OBIS_WORKERS)
+        for taxon_dir in taxon_dirs.values():
+            # Cleaned one page at a time: the raw pull never sits in memory as a whole
+            pages = (pd.DataFrame(records) for records in iter_records(taxon_dir))
+            cleaned_chunks.extend(clean_data_chunks(pages))
+
+        # Missing environmental values sampled from the local grids (data/grids/), when there are any
+        df_final = optimize_dtypes(enrich(pd.concat(cleaned_chunks, ignore_index=True)), keep_all=True)
+
+        save_cleaned(df_final)
+        return load_store(all_columns)
+
+    except Exception as e:
+        print(f"⚠️ Fetch failed (No internet or API error): {e}")
+        if FALLBACK_CSV.exists():
+            print(f"💾 Using local fallback: {FALLBACK_CSV}")
+            fallback = enrich(pd.read_csv(FALLBACK_CSV, low_memory=False))
+            return optimize_dtypes(fallback, keep_all=all_columns)
+        else:
+            print("❌ Error: No clean data, no internet, and no fallback data found.")
+            return pd.DataFrame(
+                columns=['category', 'bathymetry', 'sst', 'sss', 'shoredistance', 'latitude', 'longitude', 'year'])
+
+
+def enrich_cleaned():
+    """
+    Samples the local grids again over the whole cleaned data, after a grid was added or updated
+    (new downloads and refreshes are enriched on the way). The time cube does not change.
+    """
+    existing = load_data(all_columns=True)
+    save_cleaned(optimize_dtypes(enrich(existing), keep_all=True), existing.attrs.get('time_cube'))
+
+
+def _unseen(records, known):
+    """:return: The records whose `id` is not among `known` (sorted ids of the cleaned data)"""
+    ids, known = comparable_ids([record.get("id") for record in records], known)
+    if not len(known):
+        return list(records)
+    positions = np.minimum(np.searchsorted(known, ids), len(known) - 1)
+    return [record for record, seen in zip(records, known[positions] == ids) if not seen]
+
+
+def refresh_data():
+    """
+    Incremental refresh of the cleaned data: each taxon is read again in the OBIS order, up to
+    MAX_RECORDS_PER_TAXON occurrences as in the initial download, and only the occurrences whose `id` is not in
+    the cleaned data yet are cleaned, enriched and merged. The ids are the cursor, not the event dates: OBIS has no
+    filter on the publication date, and a record published late can carry an old event date.
+    :return: Number of new occurrences added to the cleaned data
+    """
+    if not CLEANED_STORE.exists() and not CLEANED_FILE.exists():
+        load_data()
+        return 0
+
+    existing = load_data(all_columns=True)
+    # Sorted once, each downloaded page is then checked against it
+    known = np.sort(existing['id'].to_numpy())
+    # Checkpoints of an unfinished refresh (data/raw/updates/<species>/) are resumed, then removed once merged
+    updates_dir = RAW_DIR / "updates"
+    taxon_dirs = fetch_all(taxonomy().fetch_config(), updates_dir, MAX_RECORDS_PER_TAXON, OBIS_PAGE_SIZE, OBIS_WORKERS)
+
+    new_records = []
+    for taxon_dir in taxon_dirs.values():
+        for records in iter_records(taxon_dir):
+            new_records.extend(_unseen(records, known))
+
+    added = 0
+    if new_records:
+        delta = enrich(clean_data(pd.DataFrame(new_records)))
+        # Ids in the same form (16-byte UUIDs, or strings) on both sides of the merge
+        existing_ids, delta_ids = comparable_ids(existing['id'], delta['id'])
+        delta = delta.assign(id=delta_ids).drop_duplicates(subset='id', keep='last')
+        merged = pd.concat([existing.assign(id=existing_ids), delta], ignore_index=True)
+        merged = merged.drop_duplicates(subset='id', keep='last')
+        merged = optimize_dtypes(merged, keep_all=True)
+        added = len(merged) - len(existing)
+        # The time cube only counts the new rows (their ids are not in the existing data)
+        time_cube = existing.attrs.get('time_cube')
+        if time_cube is not None and 'year' in delta.columns:
+            time_cube.add(delta['year'], delta['month'] if 'month' in delta.columns else None, delta['category'].array)
+        save_cleaned(merged, time_cube)
+    shutil.rmtree(updates_dir, ignore_errors=True)
+    print(f"🔄 Refresh done: {added} new occurrences")
+    return added
@@ -0,0 +1,180 @@
+import cProfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from flask import Response, g, has_request_context, request
+
+from config import PROFILE_CALLBACKS, PROFILE_MIN_SECONDS, PROFILE_DIR
+from src.utils.figure_cache import figure_cache
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+ROWS_BUCKETS = (100, 1e3, 1e4, 1e5, 1e6, 1e7)
+QUANTILES = (0.5, 0.9, 0.99)
+# Observations kept per series for the quantiles (the buckets count every observation since startup)
+WINDOW = 1000
+
+
+class Histogram:
+    """Cumulative Prometheus buckets, plus a rolling window of the last observations for the quantiles."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.window = deque(maxlen=WINDOW)
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.window.append(value)
+
+    def quantile(self, q):
+        values = sorted(self.window)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}  # name -> (help text, buckets, {labels: Histogram})
+
+    def observe(self, name, help_text, buckets, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._metrics.setdefault(name, (help_text, buckets, {}))[2]
+            series.setdefault(key, Histogram(buckets)).observe(value)
+
+    def render(self):
+        """:return: Every metric in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets, series) in sorted(self._metrics.items()):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for key, histogram in sorted(series.items()):
+                    labels = ",".join(f'{k}="{v}"' for k, v in key)
+                    cumulative = 0
+                    for bound, count in zip(list(buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+                lines += [f"# HELP {name}_recent Quantiles of the last {WINDOW} observations",
+                          f"# TYPE {name}_recent gauge"]
+                for key, histogram in sorted(series.items()):
+                    labels = ",".join(f'{k}="{v}"' for k, v in key)
+                    for q in QUANTILES:
+                        lines.append(f'{name}_recent{{{labels},quantile="{q}"}} {histogram.quantile(q)}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _current_stages():
+    """Stage timings and row count of the callback running in the current request (None outside of one)."""
+    return g.get("callback_stages") if has_request_context() else None
+
+
+@contextmanager
+def stage(name):
+    """
+    Times one stage of the running callback (e.g. `with stage("filter"):`).
+    Outside of a callback request the block simply runs untimed.
+    """
+    stages = _current_stages()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stages is not None:
+            stages["seconds"][name] = stages["seconds"].get(name, 0) + time.perf_counter() - start
+
+
+def record_rows(n_rows):
+    """Records the number of rows the running callback works on."""
+    stages = _current_stages()
+    if stages is not None:
+        stages["rows"] = n_rows
+
+
+def _callback_name(app, body):
+    output = body.get("output", "")
+    callback = app.callback_map.get(output, {}).get("callback")
+    return getattr(callback, "__name__", None) or output
+
+
+def init_metrics(app):
+    """
+    Instruments every Dash callback of `app` through the Flask request hooks, and adds a `/metrics` route.
+    Each callback reports its total duration, the stages timed with `stage()`, the time spent outside of
+    them ("other": request parsing and JSON serialization), the request/response sizes and its row count.
+    With PROFILE_CALLBACKS, callbacks slower than PROFILE_MIN_SECONDS also dump a cProfile trace.
+    """
+    server = app.server
+    profile_lock = threading.Lock()
+    callback_path = f"{app.config.routes_pathname_prefix}_dash-update-component"
+
+    @server.before_request
+    def _start_callback():
+        if request.path != callback_path:
+            return
+        g.callback_start = time.perf_counter()
+        g.callback_stages = {"seconds": {}, "rows": None}
+        # One profiled request at a time: a second active cProfile would fail
+        if PROFILE_CALLBACKS and profile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @server.after_request
+    def _end_callback(response):
+        if request.path != callback_path or "callback_start" not in g:
+            return response
+        total = time.perf_counter() - g.callback_start
+        profiler = g.get("profiler")
+        if profiler is not None:
+            profiler.disable()
+
+        body = request.get_json(silent=True) or {}
+        labels = {"callback": _callback_name(app, body)}
+        stages = g.callback_stages
+        timed = dict(stages["seconds"], other=max(0.0, total - sum(stages["seconds"].values())), total=total)
+        for name, seconds in timed.items():
+            registry.observe("whalife_callback_seconds", "Callback duration by stage", SECONDS_BUCKETS,
+                             dict(labels, stage=name), seconds)
+        registry.observe("whalife_callback_request_bytes", "Size of the callback request", BYTES_BUCKETS,
+                         labels, request.content_length or 0)
+        if not response.direct_passthrough:
+            registry.observe("whalife_callback_response_bytes", "Size of the callback response", BYTES_BUCKETS,
+                             labels, response.content_length or len(response.get_data()))
+        if stages["rows"] is not None:
+            registry.observe("whalife_callback_rows", "Rows handled by the callback", ROWS_BUCKETS,
+                             labels, stages["rows"])
+
+        if profiler is not None and total >= PROFILE_MIN_SECONDS:
+            Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(Path(PROFILE_DIR) / f"{labels['callback']}-{int(total * 1000)}ms-{time.time():.0f}.prof")
+        return response
+
+    @server.teardown_request
+    def _release_profiler(exc):
+        # Also runs when the callback raised and after_request was skipped: the next requests can profile again
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            profile_lock.release()
+
+    @server.route("/metrics")
+    def _metrics():
+        text = registry.render()
+        for name, value in (("hits", figure_cache.hits), ("misses", figure_cache.misses)):
+            text += f"# TYPE whalife_figure_cache_{name}_total counter\nwhalife_figure_cache_{name}_total {value}\n"
+        return Response(text, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class PageMeta:
+    """
+    Summary of a dataset read by the page layouts (column bounds, quantiles, category list).
+    Built once per dataset version, so rendering a page never scans a full column again.
+    """
+
+    def __init__(self, dataset):
+        self.version = dataset.version
+        self._dataset = dataset
+        self._quantiles = {}
+        category = dataset.columns.get('category')
+        # Observed categories, in order of appearance (same order as the figure colors)
+        self.categories = [] if category is None else [str(c) for c in pd.unique(category) if not pd.isna(c)]
+
+    def _sorted_values(self, column):
+        if column not in self._dataset.columns or np.asarray(self._dataset.columns[column]).dtype.kind not in 'iuf':
+            return np.array([])
+        return self._dataset.range_index(column).sorted_values
+
+    def bounds(self, column):
+        """:return: (min, max) of `column`, read from the ends of its sorted index ((0, 0) when it is empty)"""
+        values = self._sorted_values(column)
+        if not len(values):
+            return 0, 0
+        return float(values[0]), float(values[-1])
+
+    def quantile(self, column, q):
+        """Same value as `df[column].quantile(q)` (linear interpolation), read from the sorted index."""
+        key = (column, q)
+        if key not in self._quantiles:
+            values = self._sorted_values(column)
+            if not len(values):
+                self._quantiles[key] = 0
+            else:
+                position = q * (len(values) - 1)
+                low, high = math.floor(position), math.ceil(position)
+                self._quantiles[key] = float(values[low] + (values[high] - values[low]) * (position - low))
+        return self._quantiles[key]
+
+    @property
+    def year_bounds(self):
+        """:return: (first year, last year) of the observations, read from the time cube"""
+        time_cube = self._dataset.time_cube
+        if time_cube is None or not time_cube.counts.shape[1]:
+            return 0, 0
+        return time_cube.first_year, time_cube.last_year
+
+    @property
+    def default_category(self):
+        return self.categories[0] if self.categories else ""
@@ -0,0 +1,60 @@
+import math
+
+from dash import Patch
+from dash.exceptions import PreventUpdate
+
+from config import PREVIEW_ROWS
+from src.utils.figure_cache import figure_cache
+
+# Slider moves sent as deltas in a row before the whole map is sent again (each delta adds traces)
+MAX_DELTAS = 8
+
+
+def preview_rows(rows, limit=PREVIEW_ROWS):
+    """
+    Evenly spaced sample of a selection, for the first (preview) map of a large selection.
+    :return: (at most `limit` rows, number of observations each sampled row stands for)
+    """
+    step = max(1, math.ceil(len(rows) / limit))
+    return rows[::step], step
+
+
+def refine_map(refine, current_range, key, build):
+    """
+    Second step of a progressive map: the exact map of the previewed selection, sent as a partial update
+    (the traces and the title only: the layout and the user's view stay as they are).
+    :param refine: Selection of the preview, as stored by the page callback ({'range', 'zoom'})
+    :param current_range: Current (snapped) slider range
+    """
+    # The slider has moved since the preview: the page callback is already sending a newer map
+    if not refine or list(current_range) != list(refine['range']):
+        raise PreventUpdate
+    figure = figure_cache.get_or_build(key, build)
+    patch = Patch()
+    patch['data'] = figure['data']
+    patch['layout']['title'] = figure['layout'].get('title')
+    return patch
+
+
+def widened_rows(index, shown, version, val_range):
+    """
+    Observations entering the selection when the slider only widens the raw-point map on screen.
+    :param index: `SortedColumnIndex` of the slider column
+    :param shown: Selection of the map on screen, as stored by the page ({'range', 'version', 'deltas'})
+    :return: The entering rows, or None when the whole map has to be sent (other data, narrowed range...)
+    """
+    if not shown or shown['version'] != version or shown['deltas'] >= MAX_DELTAS:
+        return None
+    entering, leaving = index.delta(shown['range'], val_range)
+    if len(leaving) or not len(entering):
+        return None
+    return entering
+
+
+def delta_patch(figure):
+    """Partial update adding the traces of `figure` (the entering observations) to the map on screen."""
+    figure.update_traces(showlegend=False)
+    patch = Patch()
+    patch['data'].extend(figure.data)
+    patch['layout']['title']['text'] = figure.layout.title.text
+    return patch
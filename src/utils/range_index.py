@@ -0,0 +1,83 @@
+import numpy as np
+
+# Numeric columns indexed when a dataset is registered.
+# New filter pages add their own column with `register_range_column` before the data is loaded
+# (columns registered later are indexed on their first query).
+RANGE_COLUMNS = ['bathymetry', 'shoredistance', 'sst', 'sss']
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+def register_range_column(column):
+    """Declares a numeric column that range sliders will filter on."""
+    if column not in RANGE_COLUMNS:
+        RANGE_COLUMNS.append(column)
+
+
+class SortedColumnIndex:
+    """
+    Presorted permutation of one numeric column, optionally partitioned by category.
+    A [low, high] query is two `searchsorted` calls plus a slice: O(log n + k) instead of a full mask scan.
+    Missing values are left out of the index, like they are left out by a `>=`/`<=` comparison.
+    """
+
+    def __init__(self, values, partition=None):
+        values = np.asarray(values)
+        valid = np.flatnonzero(~np.isnan(values)) if values.dtype.kind == 'f' else np.arange(len(values))
+        self.order = valid[np.argsort(values[valid], kind='stable')]
+        self.sorted_values = values[self.order]
+
+        self.partitions = {}
+        if partition is not None:
+            codes = np.asarray(partition.codes)[self.order]
+            for code, name in enumerate(partition.categories):
+                rows = self.order[codes == code]
+                self.partitions[name] = (rows, values[rows])
+
+    def __len__(self):
+        return len(self.order)
+
+    def bounds(self, low, high, category=None):
+        """
+        :param low: Inclusive lower bound
+        :param high: Inclusive upper bound
+        :param category: Restricts the lookup to one category (None = every category)
+        :return: (rows, start, stop) where rows[start:stop] are the matching rows in value order
+        """
+        if category is None:
+            rows, sorted_values = self.order, self.sorted_values
+        else:
+            rows, sorted_values = self.partitions.get(category, (_EMPTY, _EMPTY))
+        start = np.searchsorted(sorted_values, low, side='left')
+        stop = np.searchsorted(sorted_values, high, side='right')
+        return rows, start, stop
+
+    def query(self, low, high, category=None):
+        """Row indices whose value lies in [low, high], sorted by value."""
+        rows, start, stop = self.bounds(low, high, category)
+        return rows[start:stop]
+
+    def count(self, low, high, category=None):
+        _, start, stop = self.bounds(low, high, category)
+        return int(stop - start)
+
+    def delta(self, old_range, new_range, category=None):
+        """
+        Rows that enter and leave the selection when a slider moves from `old_range` to `new_range`.
+        Both windows are slices of the sorted order, so the difference is at most two slices each way.
+        :return: (entering rows, leaving rows)
+        """
+        rows, old_start, old_stop = self.bounds(*old_range, category)
+        _, start, stop = self.bounds(*new_range, category)
+        entering = np.concatenate([rows[start:min(stop, old_start)], rows[max(start, old_stop):stop]])
+        leaving = np.concatenate([rows[old_start:min(old_stop, start)], rows[max(old_start, stop):old_stop]])
+        return entering, leaving
+
+
+def build_range_indexes(columns, partition=None):
+    """Builds a `SortedColumnIndex` for every registered column present in `columns`."""
+    return {
+        name: SortedColumnIndex(columns[name], partition)
+        for name in RANGE_COLUMNS
+        if name in columns and np.asarray(columns[name]).dtype.kind in 'iuf'
+    }
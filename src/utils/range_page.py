@@ -0,0 +1,164 @@
+from dash import html, dcc, Output, Input, State, ctx, no_update, clientside_callback, ClientsideFunction
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+
+from config import PREVIEW_ROWS, CLIENTSIDE_FILTERING
+from src.components.histogram import histogram
+from src.components.scatter_map import scatter_map, map_zoom, viewport_bounds, zoom_level, MAX_POINTS
+from src.utils.client_data import page_settings, server_callback
+from src.utils.data_store import get_dataset
+from src.utils.figure_cache import figure_cache, snap_range
+from src.utils.metrics import stage, record_rows
+from src.utils.progressive import preview_rows, refine_map, widened_rows, delta_patch
+
+
+def range_page_content(prefix, column, map_title, hist_title, labels):
+    """
+    Stores and graphs of a range page, below its slider `<prefix>-slider`: the map `graph-<prefix>-map`,
+    the histogram `graph-<prefix>-hist`, and the stores read by the callbacks of `register_range_page`.
+    """
+    return [
+        dcc.Store(id=f'{prefix}-refine'),
+        dcc.Store(id=f'{prefix}-shown'),
+        dcc.Store(id=f'{prefix}-client', data=page_settings(column, map_title, hist_title, labels)),
+        dcc.Loading(
+            id=f"loading-{prefix}",
+            # The preview of a large selection stays visible while the exact map is computed
+            overlay_style={"visibility": "visible", "opacity": .5},
+            type="circle",
+            color="#007bff",
+            children=html.Div([
+                # Carte à gauche, histogramme à droite
+                dcc.Graph(id=f'graph-{prefix}-map', style={'width': '48%', 'display': 'inline-block'}),
+                dcc.Graph(id=f'graph-{prefix}-hist', style={'width': '48%', 'display': 'inline-block', 'float': 'right'})
+            ])
+        )
+    ]
+
+
+def register_range_page(prefix, column, name, map_title, hist_title, labels):
+    """
+    Registers the callbacks of a page whose slider filters one numeric column (depth, distance, temperature...).
+    On every slider move: the map (raw points, or aggregated above MAX_POINTS; a preview first above PREVIEW_ROWS,
+    only the entering observations when the range widens, only the rows in view on a pan/zoom) and the histogram,
+    both cached in `figure_cache`.
+    :param prefix: Prefix of the component ids (see `range_page_content`)
+    :param name: Page name, in the figure cache keys and the callback names (`update_<name>_page`, `refine_<name>_map`)
+    :param map_title: Map title, with `{low}` and `{high}` for the slider range
+    :return: (page callback, map refinement callback)
+    """
+    map_id, hist_id, slider_id = f'graph-{prefix}-map', f'graph-{prefix}-hist', f'{prefix}-slider'
+
+    def build_map(dataset, val_range, zoom, rows=None, weight=1):
+        """Map of the observations within `val_range` (or of `rows`, e.g. the sample of a preview)."""
+        title = map_title.format(low=val_range[0], high=val_range[1])
+        with stage("filter"):
+            if rows is None:
+                rows = dataset.select_range(column, val_range)
+            dff = dataset.take(rows, ['latitude', 'longitude', 'category', column])
+        with stage("map"):
+            return scatter_map(dff, title, column, zoom=zoom, weight=weight)
+
+    def build_histogram(dataset, val_range):
+        with stage("histogram"):
+            edges, counts = dataset.histogram(column, val_range)
+            # Colors and "Other" grouping of the dataset categories, as on the map
+            fig_hist = histogram(edges, counts, column, hist_title, labels, dataset.column('category').categories)
+            fig_hist.update_yaxes(matches=None, showticklabels=True)
+            fig_hist.update_xaxes(matches='x')
+            fig_hist.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font_color='black'
+            )
+            return fig_hist
+
+    def update_page(val_range, relayout_data, data_version, step, slider_min, slider_max, shown):
+        dataset = get_dataset(data_version)
+        if not dataset: return go.Figure(), go.Figure(), no_update, no_update
+
+        val_range = snap_range(val_range or (slider_min, slider_max), step, (slider_min, slider_max))
+        zoom = map_zoom(relayout_data)
+        n_rows = dataset.count_range(column, val_range)
+        record_rows(n_rows)
+        # A zoom/pan on the map only matters when the map is aggregated
+        zoomed = ctx.triggered_id == map_id
+        if zoomed and (zoom is None or n_rows <= MAX_POINTS):
+            raise PreventUpdate
+
+        # Raw points look the same at every zoom, aggregated cells depend on the zoom level
+        detail = zoom_level(zoom) if n_rows > MAX_POINTS else None
+        key = (f'{name}-map', dataset.version, val_range, detail)
+        # Raw-point map on screen after this update: the next slider move may only add the entering observations
+        selection = {'range': val_range, 'version': dataset.version, 'deltas': 0} if n_rows <= MAX_POINTS else None
+        entering, refine = None, no_update
+        bounds = viewport_bounds(relayout_data, n_rows, zoomed)
+        if bounds is not None:
+            # Pan/zoom of an aggregated map, or zoomed in to raw points: only the observations in view are sent
+            rows = dataset.select_viewport(bounds, {column: val_range})
+            fig_map, refine = build_map(dataset, val_range, zoom, rows), None
+        elif selection and not zoomed:
+            entering = widened_rows(dataset.range_index(column), shown, dataset.version, val_range)
+        if entering is not None:
+            # Widened range: the entering observations are added to the map as extra traces
+            fig_map = delta_patch(build_map(dataset, val_range, zoom, entering))
+            selection['deltas'] = shown['deltas'] + 1
+        elif bounds is None:
+            fig_map = figure_cache.get(key)
+            if fig_map is None and not zoomed and n_rows > PREVIEW_ROWS:
+                # Large selection: the map of a sample now, the exact map right after (refine callback below)
+                rows, weight = preview_rows(dataset.select_range(column, val_range))
+                fig_map = build_map(dataset, val_range, zoom, rows, weight)
+                refine = {'range': val_range, 'zoom': zoom}
+            elif fig_map is None:
+                fig_map = figure_cache.set(key, build_map(dataset, val_range, zoom))
+        if zoomed:
+            return fig_map, no_update, no_update, no_update
+
+        fig_hist = figure_cache.get_or_build((f'{name}-hist', dataset.version, val_range),
+                                             lambda: build_histogram(dataset, val_range))
+        return fig_map, fig_hist, refine, selection
+
+    def refine_page_map(refine, val_range, data_version, step, slider_min, slider_max):
+        dataset = get_dataset(data_version)
+        if not dataset or not refine: raise PreventUpdate
+        val_range = snap_range(val_range or (slider_min, slider_max), step, (slider_min, slider_max))
+        key = (f'{name}-map', dataset.version, val_range, zoom_level(refine['zoom']))
+        return refine_map(refine, val_range, key, lambda: build_map(dataset, val_range, refine['zoom']))
+
+    # Callback names, as timed on /metrics and called by the warmup
+    update_page.__name__ = update_page.__qualname__ = f"update_{name}_page"
+    refine_page_map.__name__ = refine_page_map.__qualname__ = f"refine_{name}_map"
+
+    slider_states = [State('main-data-store', 'data'), State(slider_id, 'step'),
+                     State(slider_id, 'min'), State(slider_id, 'max')]
+    update_page = server_callback(
+        Output(map_id, 'figure'),
+        Output(hist_id, 'figure'),
+        Output(f'{prefix}-refine', 'data'),
+        Output(f'{prefix}-shown', 'data'),
+        Input(slider_id, 'value'),
+        Input(map_id, 'relayoutData'),
+        *slider_states,
+        State(f'{prefix}-shown', 'data')
+    )(update_page)
+    refine_page_map = server_callback(
+        Output(map_id, 'figure', allow_duplicate=True),
+        Input(f'{prefix}-refine', 'data'),
+        State(slider_id, 'value'),
+        *slider_states,
+        prevent_initial_call=True
+    )(refine_page_map)
+
+    if CLIENTSIDE_FILTERING:
+        # Slider and map zoom handled in the browser (assets/clientside.js), without a server round trip
+        clientside_callback(
+            ClientsideFunction('whalife', 'rangePage'),
+            Output(map_id, 'figure'),
+            Output(hist_id, 'figure'),
+            Input(slider_id, 'value'),
+            Input(map_id, 'relayoutData'),
+            *slider_states,
+            State(f'{prefix}-client', 'data')
+        )
+    return update_page, refine_page_map
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+# Size of the index cells in degrees (a 180 x 360 grid)
+CELL_DEG = 1.0
+
+
+def normalize_bounds(south, north, west, east):
+    """
+    Clamps a map viewport to valid coordinates. Longitudes are wrapped to [-180, 180), so a viewport
+    crossing the antimeridian comes back with west > east; a viewport wider than the world covers every longitude.
+    """
+    south, north = max(-90.0, min(south, north)), min(90.0, max(south, north))
+    if east - west >= 360:
+        return south, north, -180.0, 180.0
+    return south, north, (west + 180) % 360 - 180, (east + 180) % 360 - 180
+
+
+class GridIndex:
+    """
+    Rows sorted by the uniform grid cell of their position. The cells of one grid row are contiguous, so the
+    rows under a viewport are one slice per grid row: the cost follows the number of points in view.
+    """
+
+    def __init__(self, latitude, longitude, cell_deg=CELL_DEG):
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.longitude = np.asarray(longitude, dtype=float)
+        self.cell_deg = cell_deg
+        self.n_lat = math.ceil(180 / cell_deg)
+        self.n_lon = math.ceil(360 / cell_deg)
+
+        valid = np.flatnonzero(~np.isnan(self.latitude) & ~np.isnan(self.longitude))
+        cells = self._lat_cell(self.latitude[valid]) * self.n_lon + self._lon_cell(self.longitude[valid])
+        self.order = valid[np.argsort(cells, kind='stable')]
+        # Rows of cell c: order[starts[c]:starts[c + 1]]
+        self.starts = np.zeros(self.n_lat * self.n_lon + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cells, minlength=self.n_lat * self.n_lon), out=self.starts[1:])
+
+    def _lat_cell(self, latitude):
+        return np.clip(np.floor((latitude + 90) / self.cell_deg), 0, self.n_lat - 1).astype(np.intp)
+
+    def _lon_cell(self, longitude):
+        return np.clip(np.floor((longitude + 180) / self.cell_deg), 0, self.n_lon - 1).astype(np.intp)
+
+    def query(self, south, north, west, east):
+        """
+        :return: Rows whose position lies within the bounds (grouped by cell, not in row order).
+        `west > east` means the viewport crosses the antimeridian.
+        """
+        # Spans of longitude cells (first, last): two when the viewport crosses the antimeridian. The second one
+        # stops before the first cell of the other, a cell shared by both (a view of almost 360°) is read once
+        west_cell, east_cell = int(self._lon_cell(west)), int(self._lon_cell(east))
+        if west <= east:
+            spans = [(west_cell, east_cell)]
+        else:
+            spans = [(west_cell, self.n_lon - 1), (0, min(east_cell, west_cell - 1))]
+        lat_cells = np.arange(self._lat_cell(south), self._lat_cell(north) + 1)
+        pieces = []
+        for first_cell, last_cell in spans:
+            if last_cell < first_cell:
+                continue
+            first = lat_cells * self.n_lon + first_cell
+            last = lat_cells * self.n_lon + last_cell
+            pieces += [self.order[start:stop] for start, stop in zip(self.starts[first], self.starts[last + 1])]
+        if not pieces:
+            return np.array([], dtype=np.intp)
+        candidates = np.concatenate(pieces)
+
+        # Exact test for the points of the border cells
+        latitude, longitude = self.latitude[candidates], self.longitude[candidates]
+        inside = (latitude >= south) & (latitude <= north)
+        if west <= east:
+            inside &= (longitude >= west) & (longitude <= east)
+        else:
+            inside &= (longitude >= west) | (longitude <= east)
+        return candidates[inside]
@@ -0,0 +1,72 @@
+import threading
+import time
+import traceback
+
+from flask import jsonify
+
+_lock = threading.Lock()
+_started = time.monotonic()
+# What /health reports: "loading", "ready" or "failed", the current loading step and the version served
+_status = {'state': 'loading', 'step': 'starting', 'version': None, 'error': None, 'ready_after_s': None}
+
+
+def set_step(step):
+    """Records the loading step shown by /health and by the "data warming" page."""
+    with _lock:
+        _status['step'] = step
+
+
+def mark_ready(version):
+    with _lock:
+        _status.update(state='ready', step=None, version=version, error=None)
+        if _status['ready_after_s'] is None:
+            _status['ready_after_s'] = round(time.monotonic() - _started, 3)
+
+
+def status():
+    """:return: Copy of the loading status, with the seconds since the process started"""
+    with _lock:
+        return dict(_status, uptime_s=round(time.monotonic() - _started, 3))
+
+
+def is_serving():
+    """True once a dataset is served (it stays true while a reload builds the next one)."""
+    return _status['version'] is not None
+
+
+def start_background(load):
+    """
+    Runs `load()` in a daemon thread, so the server binds its port and answers while the data loads.
+    `load` reports its steps with `set_step` and returns the version it registered. Calling it again reloads
+    the data: the current version keeps being served until the new one is registered.
+    :return: The loading thread
+    """
+    def _run():
+        with _lock:
+            _status.update(state='loading', step='starting', error=None)
+        try:
+            mark_ready(load())
+        except Exception as e:
+            traceback.print_exc()
+            with _lock:
+                _status.update(state='failed' if _status['version'] is None else 'ready', step=None, error=repr(e))
+
+    thread = threading.Thread(target=_run, name="whalife-loader", daemon=True)
+    thread.start()
+    return thread
+
+
+def init_health(app):
+    """
+    Adds the probes of the container orchestrator: `/health` (liveness, always 200, with the loading
+    status as JSON) and `/ready` (readiness, 503 until a dataset is served).
+    """
+    server = app.server
+
+    @server.route("/health")
+    def _health():
+        return jsonify(status())
+
+    @server.route("/ready")
+    def _ready():
+        return jsonify(status()), 200 if is_serving() else 503
@@ -0,0 +1,90 @@
+import hashlib
+import mimetypes
+import threading
+from pathlib import Path
+
+from flask import abort, redirect, request, send_file
+
+ASSETS_DIR = Path("assets")
+# Output of scripts/build_assets.py: size-reduced models and their precompressed (.br, .gz) variants.
+# A file found there is served instead of the one of ASSETS_DIR
+BUILD_DIR = Path("build/assets")
+ROUTE = "/cached-assets/"
+MIMETYPES = {'.glb': "model/gltf-binary", '.js': "text/javascript"}
+# Variants tried in order of preference, when the browser accepts them
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_hashes = {}
+_lock = threading.Lock()
+
+
+def source_path(name):
+    """:return: The file served for the asset `name` (built variant first), None if there is none"""
+    for folder in (BUILD_DIR, ASSETS_DIR):
+        path = folder / name
+        if path.is_file():
+            return path
+    return None
+
+
+def file_hash(path):
+    """Content hash of a file, computed once per (path, modification time, size)."""
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _hashes:
+            return _hashes[key]
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    with _lock:
+        _hashes[key] = digest.hexdigest()[:12]
+    return _hashes[key]
+
+
+def asset_url(name):
+    """
+    Content-hashed URL of an asset ("orca.glb" -> "/cached-assets/orca.<hash>.glb"): it changes with the file,
+    so browsers can keep it forever. None if the asset does not exist.
+    """
+    path = source_path(name)
+    if path is None:
+        return None
+    stem, suffix = name.rsplit('.', 1)
+    return f"{ROUTE}{stem}.{file_hash(path)}.{suffix}"
+
+
+def init_static_assets(app):
+    """
+    Adds the route of the hashed asset URLs: immutable cache headers, precompressed variant picked from
+    Accept-Encoding, conditional and Range requests handled by `send_file`.
+    """
+    server = app.server
+
+    @server.route(f"{ROUTE}<filename>")
+    def _cached_asset(filename):
+        parts = filename.rsplit('.', 2)
+        if len(parts) != 3:
+            abort(404)
+        name = f"{parts[0]}.{parts[2]}"
+        path = source_path(name)
+        if path is None:
+            abort(404)
+        if parts[1] != file_hash(path):
+            # URL of a previous build (page opened before a deployment): sent to the current file
+            return redirect(asset_url(name))
+
+        # Given explicitly: the variants would otherwise be typed from their .br/.gz suffix
+        mimetype = MIMETYPES.get(path.suffix) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        for encoding, suffix in ENCODINGS:
+            variant = path.with_name(path.name + suffix)
+            if encoding in request.accept_encodings and variant.is_file():
+                response = send_file(variant.resolve(), mimetype=mimetype, conditional=True)
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_file(path.resolve(), mimetype=mimetype, conditional=True)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
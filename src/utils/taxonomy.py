@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from config import TAXONOMY_FILE, MAX_CATEGORIES
+
+# Taxon id columns of an OBIS occurrence, from the most to the least specific: the first one found in the
+# registry gives the category (a registered genus or family covers all of its species)
+ID_COLUMNS = ['aphiaID', 'taxonID', 'speciesid', 'genusid', 'familyid']
+# Category of the observations that are not among the MAX_CATEGORIES most observed, in the figures
+OTHER = "Other"
+NO_DESCRIPTION = "Description non disponible."
+
+
+def taxon_ids(values):
+    """
+    Numeric taxon ids of a column (ints, floats, or WoRMS LSIDs such as "urn:lsid:marinespecies.org:taxname:137092").
+    Each distinct value is parsed once. :return: float array, NaN when there is no id
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return np.asarray(values, dtype=float)
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_numeric(pd.Series(uniques, dtype=object).astype(str).str.extract(r'(\d+)\s*$')[0],
+                           errors='coerce').to_numpy(dtype=float)
+    return np.append(parsed, np.nan)[codes]
+
+
+def _subset(series, rows):
+    """Values of `series` at `rows`, without copying when every row is asked for."""
+    return series if len(rows) == len(series) else series.iloc[rows]
+
+
+class TaxonomyRegistry:
+    """
+    Taxon id -> category table (data/taxonomy.csv: taxon_id, category, rank, scientific_name,
+    vernacular_name, fetch, description). Several taxa can share a category; categories keep the order of the table.
+    """
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.categories = list(pd.unique(self.table['category']))
+        self._ids = pd.Index(self.table['taxon_id'].astype('int64'))
+        self._codes = np.array([self.categories.index(c) for c in self.table['category']], dtype=np.int16)
+        self._descriptions = {row.category: row.description for row in self.table.itertuples()
+                              if isinstance(row.description, str) and row.description}
+
+        # Names, for the records without taxon id: full scientific names, then genera that map to one category
+        self._names = {}
+        genera = {}
+        for name, code in zip(self.table['scientific_name'].str.lower(), self._codes):
+            self._names[name] = code
+            genera.setdefault(name.split()[0], set()).add(code)
+        for genus, codes in genera.items():
+            if len(codes) == 1:
+                self._names.setdefault(genus, codes.pop())
+
+    @classmethod
+    def load(cls, path=TAXONOMY_FILE):
+        return cls(pd.read_csv(path, dtype={'fetch': 'Int8'}, keep_default_na=False, na_values=['']))
+
+    def fetch_config(self):
+        """:return: {download folder name: taxon id} of the taxa downloaded from OBIS (the `fetch` column)"""
+        fetched = self.table[self.table['fetch'].fillna(0).astype(bool)]
+        return {category.upper().replace(' ', '_'): int(taxon_id)
+                for category, taxon_id in zip(fetched['category'], fetched['taxon_id'])}
+
+    def description(self, category):
+        return self._descriptions.get(category, NO_DESCRIPTION)
+
+    def _code_of_name(self, name):
+        words = str(name).lower().split()
+        # Longest registered prefix of the name (species, then genus)
+        for n in range(len(words), 0, -1):
+            code = self._names.get(" ".join(words[:n]))
+            if code is not None:
+                return code
+        return -1
+
+    def categorize(self, df):
+        """
+        Category of each raw occurrence: a hash lookup of its taxon ids (one `get_indexer` per id column),
+        the scientific name only for the records without a registered id (one lookup per distinct name).
+        :return: Categorical of the categories (NaN for the taxa that are not registered)
+        """
+        codes = np.full(len(df), -1, dtype=np.int16)
+        for column in ID_COLUMNS:
+            pending = np.flatnonzero(codes < 0)
+            if column not in df.columns or not len(pending):
+                continue
+            ids = taxon_ids(_subset(df[column], pending))
+            known = ~np.isnan(ids)
+            positions = np.full(len(ids), -1, dtype=np.intp)
+            positions[known] = self._ids.get_indexer(ids[known].astype('int64'))
+            codes[pending] = np.where(positions >= 0, self._codes[positions], -1)
+
+        pending = np.flatnonzero(codes < 0)
+        if 'scientificName' in df.columns and len(pending):
+            name_codes, names = pd.factorize(_subset(df['scientificName'], pending))
+            by_name = np.append(np.array([self._code_of_name(name) for name in names], dtype=np.int16), -1)
+            codes[pending] = by_name[name_codes]
+        return pd.Categorical.from_codes(codes, categories=self.categories)
+
+
+@lru_cache(maxsize=1)
+def taxonomy():
+    """Registry of data/taxonomy.csv, read once per process."""
+    return TaxonomyRegistry.load()
+
+
+def order_by_count(category):
+    """
+    Categorical whose categories are sorted by decreasing number of observations (ties in their current order),
+    so that the MAX_CATEGORIES most observed come first. Left as is when there are few categories.
+    """
+    if len(category.categories) <= MAX_CATEGORIES:
+        return category
+    counts = np.bincount(np.asarray(category.codes)[np.asarray(category.codes) >= 0], minlength=len(category.categories))
+    order = np.argsort(-counts, kind='stable')
+    return category.reorder_categories(category.categories[order])
+
+
+def group_categories(category, max_categories=MAX_CATEGORIES):
+    """
+    Keeps the first `max_categories` categories (the most observed, see `order_by_count`) and merges the others
+    into OTHER, so that a figure never has more than max_categories + 1 colors, facets or legend entries.
+    """
+    category = pd.Categorical(category)
+    if len(category.categories) <= max_categories:
+        return category
+    codes = np.asarray(category.codes).copy()
+    codes[codes >= max_categories] = max_categories
+    return pd.Categorical.from_codes(codes, categories=list(category.categories[:max_categories]) + [OTHER])
+
+
+def group_counts(counts, categories=None, max_categories=MAX_CATEGORIES):
+    """
+    Same grouping for a {category: counts} dictionary: the categories after the first `max_categories` of
+    `categories` (the dataset order, as `group_categories` sees it; the order of `counts` when None) are summed
+    into OTHER, whichever of them have counts.
+    """
+    order = list(counts) if categories is None else list(categories)
+    if len(order) <= max_categories:
+        return counts
+    kept = order[:max_categories]
+    grouped = {name: counts[name] for name in kept if name in counts}
+    others = [np.asarray(values) for name, values in counts.items() if name not in kept]
+    if others:
+        grouped[OTHER] = np.sum(others, axis=0)
+    return grouped
@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+class TimeCube:
+    """
+    Observation counts by (category, year, month), with prefix sums over the years.
+    Month 0 holds the observations whose month is unknown. Trends over any year range are read from
+    the cube: the cost depends on the number of years, never on the number of rows.
+    """
+
+    def __init__(self, categories=(), first_year=0, counts=None):
+        self.categories = list(categories)
+        self.first_year = int(first_year)
+        self.counts = counts if counts is not None else np.zeros((len(self.categories), 0, 13), dtype=np.int64)
+        self._accumulate()
+
+    @classmethod
+    def from_columns(cls, year, month, category):
+        """
+        :param year: Year of each row (NaN when unknown: the row is left out, like `dropna(subset=['year'])`)
+        :param month: Month of each row (None if the column is missing)
+        :param category: pandas Categorical of the species
+        """
+        cube = cls([str(name) for name in category.categories])
+        cube.add(year, month, category)
+        return cube
+
+    @property
+    def last_year(self):
+        return self.first_year + self.counts.shape[1] - 1
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def _accumulate(self):
+        self.cumulative = np.zeros((self.counts.shape[0], self.counts.shape[1] + 1, 13), dtype=np.int64)
+        np.cumsum(self.counts, axis=1, out=self.cumulative[:, 1:])
+
+    def add(self, year, month, category):
+        """Adds new observations (e.g. the rows merged by a refresh) without recounting the existing ones."""
+        year = np.asarray(year, dtype=float)
+        month = np.zeros(len(year)) if month is None else np.nan_to_num(np.asarray(month, dtype=float))
+        codes = np.asarray(category.codes)
+        valid = ~np.isnan(year) & (codes >= 0)
+        if not valid.any():
+            return self
+        year, month, codes = year[valid].astype(int), month[valid].astype(int), codes[valid]
+        month[(month < 1) | (month > 12)] = 0
+
+        # Categories and years of the new rows that the cube does not know yet
+        names = [str(name) for name in category.categories]
+        for name in names:
+            if name not in self.categories:
+                self.categories.append(name)
+        codes = np.array([self.categories.index(name) for name in names], dtype=np.intp)[codes]
+        first = min(year.min(), self.first_year) if self.counts.shape[1] else year.min()
+        last = max(year.max(), self.last_year) if self.counts.shape[1] else year.max()
+        counts = np.zeros((len(self.categories), last - first + 1, 13), dtype=np.int64)
+        offset = self.first_year - first
+        counts[:self.counts.shape[0], offset:offset + self.counts.shape[1]] = self.counts
+        self.first_year = int(first)
+
+        cells = (codes * counts.shape[1] + (year - first)) * 13 + month
+        counts += np.bincount(cells, minlength=counts.size).reshape(counts.shape)
+        self.counts = counts
+        self._accumulate()
+        return self
+
+    def _span(self, year_range):
+        """:return: Positions [start, stop) of the years of `year_range` in the cube"""
+        if year_range is None:
+            return 0, self.counts.shape[1]
+        start = int(np.clip(np.ceil(year_range[0]) - self.first_year, 0, self.counts.shape[1]))
+        stop = int(np.clip(np.floor(year_range[1]) - self.first_year + 1, start, self.counts.shape[1]))
+        return start, stop
+
+    def yearly(self, category, year_range=None):
+        """:return: (years, number of observations per year) of `category` within `year_range`"""
+        start, stop = self._span(year_range)
+        years = np.arange(self.first_year + start, self.first_year + stop)
+        if category not in self.categories:
+            return years, np.zeros(len(years), dtype=np.int64)
+        return years, self.counts[self.categories.index(category), start:stop].sum(axis=1)
+
+    def seasonal(self, category, year_range=None):
+        """:return: Number of observations per month of the year (January first) of `category` within `year_range`"""
+        start, stop = self._span(year_range)
+        if category not in self.categories:
+            return np.zeros(12, dtype=np.int64)
+        c = self.categories.index(category)
+        return (self.cumulative[c, stop] - self.cumulative[c, start])[1:]
+
+    def save(self, path, version=None):
+        tmp_path = Path(path).with_suffix(".tmp")
+        with open(tmp_path, "wb") as file:
+            np.savez(file, counts=self.counts, first_year=self.first_year, categories=np.array(self.categories),
+                     version=np.array(version or ""))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, version=None):
+        """:return: The saved cube, or None when it is missing or was saved for another data version"""
+        try:
+            with np.load(path) as data:
+                if version is not None and str(data['version']) != version:
+                    return None
+                return cls(data['categories'].tolist(), int(data['first_year']), data['counts'])
+        except (OSError, KeyError, ValueError):
+            return None
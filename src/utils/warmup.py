@@ -0,0 +1,83 @@
+from config import CLIENTSIDE_FILTERING
+from src.pages import depth, shore_distance, temperature, salinity
+from src.utils.client_data import dataset_blob
+from src.utils.data_store import get_dataset
+from src.utils.range_index import RANGE_COLUMNS
+
+CALLBACK_PATH = "/_dash-update-component"
+# Range page callbacks, the slider settings that give their initial value, and the callbacks that send the
+# exact map after the preview of a large selection
+RANGE_CALLBACKS = {
+    depth.update_depth_page.__name__: (depth.slider_settings, depth.refine_depth_map.__name__),
+    shore_distance.update_distance_page.__name__: (shore_distance.slider_settings,
+                                                   shore_distance.refine_distance_map.__name__),
+    temperature.update_temperature_page.__name__: (temperature.slider_settings, temperature.refine_temperature_map.__name__),
+    salinity.update_salinity_page.__name__: (salinity.slider_settings, salinity.refine_salinity_map.__name__),
+}
+
+
+def callback_body(app, name, value, version, step=None, slider_value=None, bounds=(None, None)):
+    """
+    Request body of the Dash callback `name`, as the browser sends it when its first input changes.
+    :param value: Value of the first input (slider range or dropdown value), the other inputs are empty
+    :param slider_value: Slider range, for the callbacks that read it as a state (map refinement)
+    :param bounds: (min, max) of the slider
+    """
+    for output, callback in app.callback_map.items():
+        if getattr(callback.get('callback'), '__name__', None) == name:
+            break
+    else:
+        raise KeyError(name)
+    outputs = [{'id': id_, 'property': prop}
+               for id_, prop in (part.rsplit('.', 1) for part in output.strip('.').split('...'))]
+    inputs = callback['inputs']
+    # Other stores (map on screen, preview) are empty, as on a first visit
+    states = {'main-data-store.data': version, 'step': step, 'value': slider_value, 'min': bounds[0], 'max': bounds[1]}
+    return {
+        'output': output,
+        # Multi-output callbacks ("..a.x...b.y..") get a list, single-output ones a single item
+        'outputs': outputs if output.startswith('..') else outputs[0],
+        'inputs': [dict(inputs[0], value=value)] + [dict(item, value=None) for item in inputs[1:]],
+        'state': [dict(item, value=states.get(f"{item['id']}.{item['property']}", states.get(item['property'])))
+                  for item in callback['state']],
+        'changedPropIds': [f"{inputs[0]['id']}.{inputs[0]['property']}"],
+    }
+
+
+def warm_figures(app, version=None):
+    """
+    Fills the caches of the process before it serves its first request: the figures every page shows when
+    it opens (through the callback endpoint, so with the same cache keys as the browser), the
+    cross-filter bitmaps and the spatial index of the map viewports.
+    :return: Number of figures requests that failed
+    """
+    dataset = get_dataset(version)
+    if not dataset or not len(dataset):
+        return 0
+    meta = dataset.page_meta()
+    client = app.server.test_client()
+    client.get('/')  # the callback map is only complete after the first request
+
+    body = callback_body(app, 'update_species_page', meta.default_category, dataset.version)
+    failed = int(client.post(CALLBACK_PATH, json=body).status_code != 200)
+    # In clientside mode the range pages have no server callback, only the encoded data to prepare
+    for name, (settings, refine_name) in ({} if CLIENTSIDE_FILTERING else RANGE_CALLBACKS).items():
+        slider_min, slider_max, step, _ = settings(meta)
+        response = client.post(CALLBACK_PATH, json=callback_body(app, name, [slider_min, slider_max], dataset.version, step,
+                                                                    bounds=(slider_min, slider_max)))
+        if response.status_code != 200:
+            failed += 1
+            continue
+        # Large selection: the page sent a preview, the exact map comes from its refine callback
+        refine = next((outputs['data'] for component, outputs in response.get_json()['response'].items()
+                       if component.endswith('-refine')), None)
+        if refine:
+            body = callback_body(app, refine_name, refine, dataset.version, step, [slider_min, slider_max],
+                                 (slider_min, slider_max))
+            failed += client.post(CALLBACK_PATH, json=body).status_code != 200
+
+    dataset.select_filters({column: meta.bounds(column) for column in RANGE_COLUMNS if column in dataset.columns})
+    dataset.spatial_index()
+    if CLIENTSIDE_FILTERING:
+        dataset_blob(dataset.version)
+    return failed
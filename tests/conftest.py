@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Same imports as the app (`from src.utils... import`, `from config import`), from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
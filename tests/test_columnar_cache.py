@@ -0,0 +1,55 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.utils.columnar_cache import load_columnar, save_columnar
+from src.utils.dtypes import UUID_DTYPE, comparable_ids, decode_uuids, encode_uuids, optimize_dtypes
+
+
+def make_ids(n):
+    ids = [str(uuid.UUID(int=i * 0x10001000100010001 + 7)) for i in range(n)]
+    # Trailing zero bytes (`S16` values drop them when read one at a time)
+    return ids + ["12345678-9abc-def0-1234-560000000000"]
+
+
+def test_uuids_round_trip():
+    ids = make_ids(50)
+    encoded = encode_uuids(ids)
+    assert encoded.dtype == UUID_DTYPE and encoded.nbytes == 16 * len(ids)
+    assert list(decode_uuids(encoded)) == ids
+    assert encode_uuids(ids[:2] + ["not-a-uuid"]) is None
+
+
+def test_store_keeps_ids_as_bytes(tmp_path):
+    ids = make_ids(20)
+    df = optimize_dtypes(pd.DataFrame({'id': ids, 'year': np.arange(len(ids))}), keep_all=True, report=False)
+    assert df['id'].dtype == UUID_DTYPE
+    save_columnar(df, tmp_path / "store")
+    loaded = load_columnar(tmp_path / "store")
+    assert loaded['id'].dtype == UUID_DTYPE
+    assert list(decode_uuids(loaded['id'])) == ids
+
+
+def test_comparable_ids():
+    ids = make_ids(5)
+    stored = encode_uuids(ids)
+    new, known = comparable_ids([ids[1], "12345678-aaaa-bbbb-cccc-000000000000"], stored)
+    assert list(np.isin(new, known)) == [True, False]
+    # An id that is not a UUID: both sides compared as strings
+    new, known = comparable_ids([ids[0], "obis-42"], stored)
+    assert list(np.isin(new, known)) == [True, False]
+
+
+def test_register_all_columns():
+    from src.utils.data_store import get_dataset, register_dataset
+
+    ids = make_ids(3)
+    df = optimize_dtypes(pd.DataFrame({'id': ids, 'category': list('abab'), 'year': [2000, 2001, 2002, 2003]}),
+                         keep_all=True, report=False)
+    dataset = get_dataset(register_dataset(df))
+    assert dataset.column('id').dtype == UUID_DTYPE
+    assert list(decode_uuids(dataset.column('id'))) == ids
+    # Exported as strings
+    from src.utils.export import export_columns
+    assert list(export_columns(dataset)['id'](np.arange(len(ids)))) == ids
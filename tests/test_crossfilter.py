@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pandas as pd
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+from src.pages import crossfilter
+from src.utils.data_store import register_dataset
+from src.utils.dtypes import optimize_dtypes
+
+FALLBACK_CSV = Path(__file__).resolve().parent.parent / "data" / "fallback_data.csv"
+
+
+def test_histogram_skips_empty_categories():
+    df = optimize_dtypes(pd.read_csv(FALLBACK_CSV, low_memory=False), report=False)
+    version = register_dataset(df)
+    context_value.set(AttributeDict(triggered_inputs=[{'prop_id': 'crossfilter-hist-column.value', 'value': 'sst'}]))
+
+    # No dolphin in water below 7 °C in the fallback data
+    _, fig_hist = crossfilter.update_crossfilter_page(
+        [[-2, 6]], None, 'sst', None, [-10], [40], [{'type': 'crossfilter-slider', 'column': 'sst'}], version)
+    # Cached figures are plain dicts
+    shown = {trace['name'] for trace in fig_hist['data']}
+    assert shown == {'Blue Whale', 'Humpback Whale', 'Orca'}
@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.utils.enrichment import Grid
+
+
+def make_grid(step=1.0):
+    lat = np.arange(-90 + step / 2, 90, step)
+    lon = np.arange(-180 + step / 2, 180, step)
+    # Linear in longitude: bilinear and nearest differ away from the cell centres
+    values = np.repeat(lon[None, :], len(lat), axis=0).astype(np.float32)
+    return Grid(values, lat[0], lon[0], step, step)
+
+
+def test_cell_cache_is_per_method():
+    grid = make_grid()
+    lat, lon = np.array([10.2, 10.2]), np.array([20.3, 20.3])
+    bilinear, _ = grid.sample_cells(lat, lon, method='bilinear', cell=0.01)
+    nearest, n_cells = grid.sample_cells(lat, lon, method='nearest', cell=0.01)
+    assert n_cells == 1
+    assert np.allclose(nearest, grid.sample(lat, lon, method='nearest'))
+    assert np.allclose(bilinear, grid.sample(lat, lon, method='bilinear'), atol=0.01)
+    assert not np.allclose(nearest, bilinear)
+    # Second call: served from the cache of its own method
+    again, n_cells = grid.sample_cells(lat, lon, method='bilinear', cell=0.01)
+    assert n_cells == 0 and np.array_equal(again, bilinear)
+
+
+def test_bilinear_skips_missing_corners():
+    grid = make_grid()
+    grid.values[100, 200] = np.nan
+    value = grid.sample([10.0], [20.0], method='bilinear')[0]
+    assert not np.isnan(value)
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pandas as pd
+from dash import Dash, html
+
+import src.utils.export as export
+from src.utils.data_store import register_dataset
+from src.utils.dtypes import optimize_dtypes
+
+FALLBACK_CSV = Path(__file__).resolve().parent.parent / "data" / "fallback_data.csv"
+
+
+def test_range_before_the_export_is_complete(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_DIR', tmp_path)
+    version = register_dataset(optimize_dtypes(pd.read_csv(FALLBACK_CSV, low_memory=False), report=False))
+    app = Dash(__name__)
+    app.layout = html.Div()
+    export.init_export(app)
+    client = app.server.test_client()
+    url = f"/export/csv?version={version}&category=Orca"
+
+    # Not exported yet: the whole export is streamed, the Range is ignored
+    response = client.get(url, headers={'Range': "bytes=10-"})
+    assert response.status_code == 200
+    full = response.get_data()
+    assert full.count(b"\n") == int(response.headers['X-Export-Rows']) + 1
+    # Complete now: the resumed download is answered from the file
+    response = client.get(url, headers={'Range': "bytes=10-"})
+    assert response.status_code == 206
+    assert response.get_data() == full[10:]
@@ -0,0 +1,27 @@
+import src.utils.figure_cache as figure_cache
+from src.utils.figure_cache import FigureCache
+
+FIGURE = {'data': [], 'layout': {'title': {'text': 'map'}}}
+
+
+def test_versions_served_side_by_side(tmp_path, monkeypatch):
+    registry = ['v1', 'v2']
+    monkeypatch.setattr(figure_cache, 'registered_versions', lambda: list(registry))
+    cache = FigureCache(directory=tmp_path)
+    cache.set(('map', 'v1', 0), FIGURE)
+    cache.set(('map', 'v2', 0), FIGURE)
+    # Both versions are still registered: switching between them keeps every figure
+    assert cache.get(('map', 'v1', 0)) == FIGURE and cache.misses == 0
+
+    # Another worker, that only registered the refreshed data, does not remove the figures of the previous one
+    other_worker = FigureCache(directory=tmp_path)
+    monkeypatch.setattr(figure_cache, 'registered_versions', lambda: ['v2'])
+    other_worker.set(('map', 'v2', 1), FIGURE)
+    assert FigureCache(directory=tmp_path).get(('map', 'v1', 0)) == FIGURE
+
+    # Versions the registry dropped are evicted, in memory and on disk
+    registry[:] = ['v2', 'v3']
+    monkeypatch.setattr(figure_cache, 'registered_versions', lambda: list(registry))
+    cache.set(('map', 'v3', 0), FIGURE)
+    assert all(key[1] != 'v1' for key in cache._entries)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['v2', 'v3']
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.histogram_cube import HistogramCube
+
+
+@pytest.fixture(scope="module")
+def tailed():
+    """Values 0-1000 with a 2% tail up to 8000 (beyond the fine bins), in three categories."""
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.uniform(0, 1000, 98_000), rng.uniform(1000, 8000, 2_000)])
+    values[rng.random(len(values)) < 0.01] = np.nan
+    categories = pd.Categorical(rng.choice(['a', 'b', 'c'], len(values)))
+    return values, categories, HistogramCube(values, categories)
+
+
+@pytest.mark.parametrize("low, high", [
+    (0, 5000),        # high in the tail
+    (100, 200),       # bounds on fine bin edges
+    (250.3, 731.7),   # bounds inside fine bins
+    (999, 1001),
+    (-5, 1e9),        # whole column
+])
+def test_query_matches_brute_force(tailed, low, high):
+    values, categories, cube = tailed
+    edges, counts = cube.query(low, high)
+
+    selected = (values >= low) & (values <= high)
+    assert edges[0] >= low and edges[-1] <= high
+    for category in categories.categories:
+        in_category = selected & (categories == category)
+        expected = np.histogram(values[in_category], bins=edges)[0]
+        assert (counts[category] == expected).all()
+        assert counts[category].sum() == in_category.sum()
+
+
+def test_last_edge_is_high(tailed):
+    _, _, cube = tailed
+    assert cube.query(0, 5000)[0][-1] == 5000
+    assert cube.query(100, 200)[0][-1] == 200
+
+
+def test_empty_range(tailed):
+    _, _, cube = tailed
+    edges, counts = cube.query(9000, 9500)
+    assert counts == {}
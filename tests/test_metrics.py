@@ -0,0 +1,41 @@
+import pytest
+from dash import Dash, Input, Output, html
+
+import src.utils.metrics as metrics
+
+
+def make_app():
+    app = Dash(__name__, routes_pathname_prefix='/whalife/', requests_pathname_prefix='/whalife/')
+    app.layout = html.Div([html.Button(id='button'), html.Div(id='out')])
+
+    @app.callback(Output('out', 'children'), Input('button', 'n_clicks'))
+    def failing_callback(n_clicks):
+        if n_clicks:
+            raise ValueError("boom")
+        return "ok"
+
+    metrics.init_metrics(app)
+    return app
+
+
+def body(n_clicks):
+    return {'output': 'out.children', 'outputs': {'id': 'out', 'property': 'children'},
+            'inputs': [{'id': 'button', 'property': 'n_clicks', 'value': n_clicks}], 'changedPropIds': []}
+
+
+def test_profiler_released_after_a_failing_callback(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'PROFILE_CALLBACKS', True)
+    monkeypatch.setattr(metrics, 'PROFILE_MIN_SECONDS', 0)
+    monkeypatch.setattr(metrics, 'PROFILE_DIR', str(tmp_path))
+    app = make_app()
+    app.server.config['PROPAGATE_EXCEPTIONS'] = True  # as with the debug server
+    client = app.server.test_client()
+    client.get('/whalife/')
+
+    # Raised through the request (as in debug mode): after_request does not run
+    with pytest.raises(ValueError):
+        client.post('/whalife/_dash-update-component', json=body(1))
+    # The next callback is profiled again (a leaked lock would skip it) and timed under the prefix
+    assert client.post('/whalife/_dash-update-component', json=body(None)).status_code == 200
+    assert len(list(tmp_path.glob("failing_callback-*.prof"))) == 1
+    assert 'callback="failing_callback"' in metrics.registry.render()
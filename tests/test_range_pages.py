@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.pages import depth, salinity, shore_distance, temperature
+from src.utils.data_store import register_dataset, get_dataset
+from src.utils.dtypes import optimize_dtypes
+from src.utils.figure_cache import snap_range
+
+FALLBACK_CSV = Path(__file__).resolve().parent.parent / "data" / "fallback_data.csv"
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = optimize_dtypes(pd.read_csv(FALLBACK_CSV, low_memory=False), report=False)
+    return get_dataset(register_dataset(df))
+
+
+@pytest.mark.parametrize("page, column", [
+    (depth, 'bathymetry'), (salinity, 'sss'), (shore_distance, 'shoredistance'), (temperature, 'sst'),
+])
+def test_full_extent_slider_keeps_every_row(dataset, page, column):
+    slider_min, slider_max, step, _ = page.slider_settings(dataset.page_meta())
+    val_range = snap_range([slider_min, slider_max], step, (slider_min, slider_max))
+
+    values = np.asarray(dataset.column(column), dtype=float)
+    # The distance slider stops at the 98th percentile on purpose
+    expected = np.sum((values >= slider_min) & (values <= slider_max))
+    if page is not shore_distance:
+        assert expected == np.sum(~np.isnan(values))
+    assert dataset.count_range(column, val_range) == expected
+
+
+def test_snap_range_is_outward():
+    assert snap_range([17.49, 20.01], 0.5) == (17.0, 20.5)
+    assert snap_range([16.99, 38.54], 0.5, (16.99, 38.54)) == (16.99, 38.54)
+    # Values already on the step are kept (float noise included)
+    assert snap_range([0.1 + 0.2, 1.5], 0.1) == (0.3, 1.5)
+
+
+def trace_colors(figure):
+    """{category: color} of the traces of a figure (cached figures are plain dicts)"""
+    data = figure['data'] if isinstance(figure, dict) else figure.to_plotly_json()['data']
+    return {trace['name']: trace['marker']['color'] for trace in data}
+
+
+def test_histogram_colors_match_the_map(dataset):
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+
+    context_value.set(AttributeDict(triggered_inputs=[{'prop_id': 'temp-slider.value', 'value': [2, 4]}]))
+    slider_min, slider_max, step, _ = temperature.slider_settings(dataset.page_meta())
+    fig_map, fig_hist, _, _ = temperature.update_temperature_page(
+        [2, 4], None, dataset.version, step, slider_min, slider_max, None)
+    map_colors, hist_colors = trace_colors(fig_map), trace_colors(fig_hist)
+    # Some categories are missing from this range: the colors still follow the dataset order
+    assert len(hist_colors) < len(dataset.column('category').categories)
+    assert hist_colors and all(map_colors[name] == color for name, color in hist_colors.items())
+
+
+def test_other_groups_by_dataset_order():
+    from src.utils.taxonomy import OTHER, group_counts
+
+    counts = {'b': np.array([1, 2]), 'd': np.array([3, 4])}
+    grouped = group_counts(counts, ['a', 'b', 'c', 'd'], max_categories=2)
+    assert list(grouped) == ['b', OTHER] and list(grouped[OTHER]) == [3, 4]
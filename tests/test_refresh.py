@@ -0,0 +1,43 @@
+import json
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import src.utils.load_data as load_data
+from src.utils.dtypes import decode_uuids, optimize_dtypes
+
+
+def make_records(n, year):
+    return [{'id': str(uuid.uuid4()), 'category': 'Orca', 'latitude': 10.0 + i, 'longitude': 20.0,
+             'eventDate': f"{year}-06-01", 'year': year, 'month': 6} for i in range(n)]
+
+
+def test_refresh_merges_late_publications(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stored = make_records(3, 2024)
+    df = optimize_dtypes(pd.DataFrame(stored).assign(category=lambda d: pd.Categorical(d['category'])),
+                         keep_all=True, report=False)
+    load_data.CLEANED_STORE.parent.mkdir(parents=True)
+    load_data.save_cleaned(df)
+
+    # Published after the first download, with an event date older than every stored record
+    late = make_records(1, 1995)
+    page_dir = tmp_path / "pages" / "Orca"
+    page_dir.mkdir(parents=True)
+    (page_dir / "page_00001.json").write_text(json.dumps({'results': stored + late}))
+    calls = []
+
+    def fetch_all(taxa, raw_dir, max_records, *args, **kwargs):
+        calls.append(max_records)
+        return {'Orca': page_dir}
+
+    monkeypatch.setattr(load_data, 'fetch_all', fetch_all)
+    monkeypatch.setattr(load_data, 'taxonomy', lambda: type('Taxonomy', (), {'fetch_config': lambda self: {'Orca': 1}})())
+    monkeypatch.setattr(load_data, 'clean_data', lambda d: d.assign(category=pd.Categorical(d['category'])))
+
+    assert load_data.refresh_data() == 1
+    assert calls == [load_data.MAX_RECORDS_PER_TAXON]
+    refreshed = load_data.load_data(all_columns=True)
+    assert sorted(decode_uuids(refreshed['id'].to_numpy())) == sorted(record['id'] for record in stored + late)
+    assert np.sort(refreshed['year'].to_numpy()).tolist() == [1995, 2024, 2024, 2024]
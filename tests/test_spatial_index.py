@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from src.utils.spatial_index import GridIndex, normalize_bounds
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    latitude, longitude = rng.uniform(-80, 80, 50_000), rng.uniform(-180, 180, 50_000)
+    return latitude, longitude, GridIndex(latitude, longitude)
+
+
+def brute_force(latitude, longitude, south, north, west, east):
+    inside = (latitude >= south) & (latitude <= north)
+    if west <= east:
+        return np.flatnonzero(inside & (longitude >= west) & (longitude <= east))
+    return np.flatnonzero(inside & ((longitude >= west) | (longitude <= east)))
+
+
+@pytest.mark.parametrize("bounds", [
+    (-10, 40, -30, 60),
+    (-60, 60, 170, -170),          # across the antimeridian
+    (-80, 80, 10.7, 10.2),         # almost 360°, both ends in the same cell
+    (-80, 80, -179.5, -179.9),     # almost 360°, at the edge of the grid
+    normalize_bounds(-50, 50, 100, 455),
+])
+def test_query_matches_brute_force(points, bounds):
+    latitude, longitude, index = points
+    rows = index.query(*bounds)
+    assert len(rows) == len(np.unique(rows))
+    assert np.array_equal(np.sort(rows), brute_force(latitude, longitude, *bounds))
+
+
+def test_random_viewports_across_the_antimeridian(points):
+    latitude, longitude, index = points
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        south, north = np.sort(rng.uniform(-90, 90, 2))
+        west = rng.uniform(-180, 180)
+        bounds = normalize_bounds(south, north, west, west + rng.uniform(0, 360))
+        rows = index.query(*bounds)
+        assert np.array_equal(np.sort(rows), brute_force(latitude, longitude, *bounds))
@@ -0,0 +1,48 @@
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+import src.utils.range_page as range_page
+from src.components.scatter_map import viewport_bounds
+from src.pages import depth
+from src.utils.data_store import register_dataset, get_dataset
+from src.utils.dtypes import optimize_dtypes
+
+FALLBACK_CSV = Path(__file__).resolve().parent.parent / "data" / "fallback_data.csv"
+
+
+def relayout(zoom, south, north, west, east):
+    corners = [[west, north], [east, north], [east, south], [west, south]]
+    return {'map.zoom': zoom, 'map.center': {}, 'map._derived': {'coordinates': corners}}
+
+
+def test_viewport_bounds():
+    close = relayout(7, 20, 60, -80, 10)
+    assert viewport_bounds(close, 100, False, max_points=10) == (20, 60, -80, 10)
+    # Whole selection drawn: few rows, or far zoom on a slider move
+    assert viewport_bounds(close, 5, False, max_points=10) is None
+    assert viewport_bounds(relayout(2, 20, 60, -80, 10), 100, False, max_points=10) is None
+    # Pan/zoom of an aggregated map
+    assert viewport_bounds(relayout(2, 20, 60, -80, 10), 100, True, max_points=10) == (20, 60, -80, 10)
+
+
+def test_slider_move_when_zoomed_in_sends_the_view_only(monkeypatch):
+    df = optimize_dtypes(pd.read_csv(FALLBACK_CSV, low_memory=False), report=False)
+    dataset = get_dataset(register_dataset(df))
+    monkeypatch.setattr(range_page, 'MAX_POINTS', 10)
+    monkeypatch.setattr(range_page, 'viewport_bounds', partial(viewport_bounds, max_points=10))
+    context_value.set(AttributeDict(triggered_inputs=[{'prop_id': 'depth-slider.value', 'value': [0, 6000]}]))
+
+    fig_map, fig_hist, refine, _ = depth.update_depth_page(
+        [0, 6000], relayout(7, 20, 60, -80, 10), dataset.version, 1, 0, 6000, None)
+    values = np.asarray(dataset.column('bathymetry'), dtype=float)
+    latitude, longitude = (np.asarray(dataset.column(name)) for name in ('latitude', 'longitude'))
+    in_view = (values >= 0) & (values <= 6000) & (latitude >= 20) & (latitude <= 60) \
+        & (longitude >= -80) & (longitude <= 10)
+    assert sum(len(trace.lat) for trace in fig_map.data) == in_view.sum() < (values <= 6000).sum()
+    # The histogram still counts the whole selection, and no exact map of every row follows
+    assert fig_hist is not None and refine is None